@@ -0,0 +1,117 @@
+# backend/api/authentication.py
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models.user import AccountMembership
+from .sharding import route_to_account
+
+ACCOUNT_ID_CLAIM = "account_id"
+ACCOUNT_ROLE_CLAIM = "account_role"
+MEMBERSHIP_VERSION_CLAIM = "membership_version"
+
+MEMBERSHIP_CLAIMS = (ACCOUNT_ID_CLAIM, ACCOUNT_ROLE_CLAIM, MEMBERSHIP_VERSION_CLAIM)
+
+
+def default_membership(user_id):
+    """
+    The membership used when a client does not pick an account explicitly.
+    Must match the fallback in ActiveAccountMiddleware.
+    """
+    return AccountMembership.objects.filter(user_id=user_id).order_by("id").first()
+
+
+def apply_membership_claims(token, membership):
+    """
+    Embeds (or clears) the account id, role and membership version in `token`.
+    """
+    for claim in MEMBERSHIP_CLAIMS:
+        if claim in token:
+            del token[claim]
+    if membership is not None:
+        token[ACCOUNT_ID_CLAIM] = membership.account_id
+        token[ACCOUNT_ROLE_CLAIM] = membership.role
+        token[MEMBERSHIP_VERSION_CLAIM] = membership.version
+
+
+class MembershipRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens always carry the *current* membership
+    claims, so a refreshed access token picks up role changes and removals.
+    """
+
+    # Set at login by MyTokenObtainPairSerializer.get_token, which already
+    # looked the membership up; refreshes look it up again
+    membership = None
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        membership = self.membership or self._current_membership()
+        apply_membership_claims(access, membership)
+        return access
+
+    def _current_membership(self):
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        account_id = self.payload.get(ACCOUNT_ID_CLAIM)
+
+        membership = None
+        if account_id is not None:
+            membership = AccountMembership.objects.filter(
+                user_id=user_id, account_id=account_id
+            ).first()
+        if membership is None:
+            membership = default_membership(user_id)
+        return membership
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Trusts the membership claims of the access token on read-only requests:
+    the user is a TokenUser built from the token, so no query is issued.
+
+    Writes load the user as usual and reject tokens whose membership version
+    no longer matches the database (role changed or member removed). Reads
+    may therefore see a stale role for at most one access token lifetime.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        # Unless the URL or X-Account-ID header chose another (api.sharding)
+        route_to_account(validated_token.get(ACCOUNT_ID_CLAIM))
+
+        if request.method in SAFE_METHODS and ACCOUNT_ID_CLAIM in validated_token:
+            return TokenUser(validated_token), validated_token
+
+        user = self.get_user(validated_token)
+        if ACCOUNT_ID_CLAIM in validated_token:
+            membership = (
+                AccountMembership.objects.select_related("account")
+                .filter(
+                    user_id=user.pk,
+                    account_id=validated_token[ACCOUNT_ID_CLAIM],
+                    version=validated_token.get(MEMBERSHIP_VERSION_CLAIM),
+                )
+                .first()
+            )
+            if membership is None:
+                raise AuthenticationFailed(
+                    "Account membership has changed; refresh the token.",
+                    code="membership_changed",
+                )
+            # Already verified: lets ActiveAccountMiddleware skip its own lookup.
+            # `request` is a DRF Request, or a plain HttpRequest in async views
+            getattr(request, "_request", request)._verified_membership = membership
+        return user, validated_token
@@ -0,0 +1,6 @@
+# backend/api/benchmarks/__init__.py
+
+from .datasets import seed_tenant
+from .harness import auth_headers, benchmark_database, run_counted
+
+__all__ = ["seed_tenant", "auth_headers", "benchmark_database", "run_counted"]
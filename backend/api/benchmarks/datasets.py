@@ -0,0 +1,155 @@
+# backend/api/benchmarks/datasets.py
+
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from ..models.group import Group
+from ..models.question import Question
+from ..models.quiz import Quiz
+from ..models.quiz_event import QuizEvent
+from ..models.user import Account, AccountMembership, User, UserResult
+from ..utils import generate_prefixed_uuid
+
+BENCHMARK_PASSWORD = "bench-pass-1"
+EVENT_TYPES = ["started", "answered", "completed"]
+
+# Hashing is deliberately slow; hash once and share it between seeded users
+_password_hash = None
+
+
+def _benchmark_password_hash():
+    global _password_hash
+    if _password_hash is None:
+        _password_hash = make_password(BENCHMARK_PASSWORD)
+    return _password_hash
+
+
+def _new_user(label, index):
+    email = f"{label}-user{index}@bench.local"
+    return User(
+        id=generate_prefixed_uuid("u"),
+        email=email,
+        username=email,
+        password=_benchmark_password_hash(),
+    )
+
+
+def seed_tenant(
+    label,
+    groups=2,
+    quizzes_per_group=3,
+    questions_per_quiz=5,
+    members=3,
+    results_per_quiz=0,
+    events_per_quiz=0,
+    seed=0,
+):
+    """
+    Seeds one account (owner + members, groups, quizzes, questions, results
+    and quiz events spread over the last 90 days) with bulk inserts. Returns
+    a dict with the created objects so callers can build requests against
+    them.
+
+    Ids are generated explicitly because the model defaults are fixed strings.
+    Counters are set on the inserted rows, as api.services.counters would
+    leave them.
+    """
+    rng = random.Random(seed)
+
+    owner = _new_user(label, 0)
+    users = [owner] + [_new_user(label, i) for i in range(1, members + 1)]
+    User.objects.bulk_create(users)
+
+    account = Account.objects.create(
+        name=f"{label} account",
+        owner=owner,
+        num_quizzes=groups * quizzes_per_group,
+        num_results=groups * quizzes_per_group * results_per_quiz,
+    )
+    AccountMembership.objects.bulk_create(
+        [AccountMembership(account=account, user=owner, role="owner")]
+        + [AccountMembership(account=account, user=u, role="member") for u in users[1:]]
+    )
+
+    group_objs = Group.objects.bulk_create(
+        [
+            Group(
+                account=account,
+                name=f"{label} group {g}",
+                order=g,
+                num_quizzes=quizzes_per_group,
+                num_results=quizzes_per_group * results_per_quiz,
+            )
+            for g in range(groups)
+        ]
+    )
+
+    quizzes = []
+    for group in group_objs:
+        for q in range(quizzes_per_group):
+            quizzes.append(
+                Quiz(
+                    id=generate_prefixed_uuid("q"),
+                    account=account,
+                    group=group,
+                    order=q,
+                    title=f"{group.name} quiz {q}",
+                    topic=rng.choice(["math", "history", "biology", "physics"]),
+                    question_count=questions_per_quiz,
+                    num_questions=questions_per_quiz,
+                )
+            )
+
+    results = []
+    for quiz in quizzes:
+        takers = [rng.choice(users) for _ in range(results_per_quiz)]
+        quiz.num_results = len(takers)
+        quiz.num_participants = len({user.id for user in takers})
+        results.extend(
+            UserResult(quiz=quiz, user=user, score=rng.randint(0, questions_per_quiz))
+            for user in takers
+        )
+    Quiz.objects.bulk_create(quizzes)
+
+    Question.objects.bulk_create(
+        [
+            Question(
+                quiz=quiz,
+                question_text=f"Question {n} of {quiz.title}",
+                option_a="Option A",
+                option_b="Option B",
+                option_c="Option C",
+                option_d="Option D",
+                correct_answer=rng.choice("ABCD"),
+            )
+            for quiz in quizzes
+            for n in range(questions_per_quiz)
+        ]
+    )
+
+    UserResult.objects.bulk_create(results)
+
+    now = timezone.now()
+    QuizEvent.objects.bulk_create(
+        [
+            QuizEvent(
+                quiz=quiz,
+                participant_email=rng.choice(users).email,
+                event_type=rng.choice(EVENT_TYPES),
+                timestamp=now - timedelta(seconds=rng.randrange(90 * 24 * 3600)),
+            )
+            for quiz in quizzes
+            for _ in range(events_per_quiz)
+        ]
+    )
+
+    return {
+        "account": account,
+        "owner": owner,
+        "users": users,
+        "groups": group_objs,
+        "quizzes": quizzes,
+    }
@@ -0,0 +1,220 @@
+# backend/api/benchmarks/endpoints.py
+
+"""
+Latency, throughput and memory benchmarks for the main endpoints.
+
+Each endpoint is requested in-process through DRF's test client against
+tenants seeded at every size in TENANT_SIZES (same seed, same data on
+every run). Writes run in a transaction that is rolled back, so the data
+does not drift between samples; quiz creation uses the FakeBackend AI.
+
+Latency samples are taken with tracemalloc and query capture off; query
+counts and the peak memory of a request are measured in separate, traced
+requests, since tracing slows every allocation down.
+"""
+
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .datasets import seed_tenant
+from .harness import auth_headers
+from .query_budgets import FAKE_AI_BACKENDS, QUIZ_PAYLOAD, Scenario
+
+TENANT_SIZES = {
+    "small": dict(
+        groups=2,
+        quizzes_per_group=5,
+        questions_per_quiz=5,
+        members=5,
+        results_per_quiz=5,
+        events_per_quiz=5,
+    ),
+    "medium": dict(
+        groups=5,
+        quizzes_per_group=10,
+        questions_per_quiz=10,
+        members=25,
+        results_per_quiz=20,
+        events_per_quiz=20,
+    ),
+    "large": dict(
+        groups=10,
+        quizzes_per_group=30,
+        questions_per_quiz=10,
+        members=100,
+        results_per_quiz=40,
+        events_per_quiz=40,
+    ),
+}
+
+ENDPOINTS = [
+    Scenario("list_quizzes", "GET"),
+    Scenario("quiz_detail", "GET", lambda t: {"quiz_id": t["quizzes"][0].id}),
+    Scenario("group_list", "GET"),
+    Scenario(
+        "list_account_members", "GET", lambda t: {"account_id": t["account"].id}
+    ),
+    Scenario("create_quiz", "POST", data=QUIZ_PAYLOAD),
+    Scenario(
+        "submit_quiz_results",
+        "POST",
+        data=lambda t: {"quiz_id": t["quizzes"][0].id, "score": 3},
+    ),
+]
+
+# Generated quizzes must never be refused for quota during a run
+UNLIMITED_QUOTAS = {"PLANS": {}, "DEFAULT": None}
+
+PERCENTILES = (50, 95, 99)
+
+
+def seed_benchmark_tenant(size, seed=0):
+    """Seeds the tenant for `size` (a TENANT_SIZES key)."""
+    tenant = seed_tenant(f"endpoints-{size}", seed=seed, **TENANT_SIZES[size])
+    tenant["headers"] = auth_headers(tenant["owner"], tenant["account"])
+    return tenant
+
+
+def percentiles(samples):
+    """{"p50": .., "p95": .., "p99": ..} of `samples` (at least two)."""
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {f"p{p}": cuts[p - 1] for p in PERCENTILES}
+
+
+def _request(client, scenario, tenant):
+    path, data, query = scenario.resolve(tenant)
+    if query:
+        return client.get(path, query, **tenant["headers"])
+    return getattr(client, scenario.method.lower())(
+        path, data=data, format="json", **tenant["headers"]
+    )
+
+
+def _in_rollback(scenario, issue):
+    """Runs issue(); writes are rolled back so every sample sees the same data."""
+    if scenario.method == "GET":
+        return issue()
+    with transaction.atomic():
+        outcome = issue()
+        transaction.set_rollback(True)
+    return outcome
+
+
+def _timed_request(client, scenario, tenant):
+    """Issues one request; returns (status, seconds)."""
+
+    def issue():
+        started = time.perf_counter()
+        response = _request(client, scenario, tenant)
+        return response.status_code, time.perf_counter() - started
+
+    return _in_rollback(scenario, issue)
+
+
+def _traced_request(client, scenario, tenant):
+    """
+    Issues one request with its queries captured and its allocations
+    traced; returns (queries, peak bytes above what was allocated before).
+    """
+
+    def issue():
+        with CaptureQueriesContext(connection) as ctx:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            _request(client, scenario, tenant)
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        return len(ctx.captured_queries), peak
+
+    return _in_rollback(scenario, issue)
+
+
+def benchmark_endpoint(
+    scenario, tenant, repeat=50, warmup=5, max_seconds=None, traced=3
+):
+    """
+    Requests `scenario` `repeat` times (fewer once `max_seconds` of samples
+    have been taken) after `warmup` untimed requests, then `traced` more
+    times to count queries and measure peak memory. Returns the sample
+    count, statuses, queries per request, throughput (sequential requests
+    per second), mean and percentile latencies in ms, and the highest peak
+    memory of a request in KiB.
+    """
+    client = APIClient()
+    with override_settings(
+        AI_BACKENDS=FAKE_AI_BACKENDS, AI_TOKEN_QUOTAS=UNLIMITED_QUOTAS
+    ):
+        for _ in range(warmup):
+            _timed_request(client, scenario, tenant)
+
+        samples, statuses = [], set()
+        for _ in range(max(repeat, 2)):
+            status, elapsed = _timed_request(client, scenario, tenant)
+            statuses.add(status)
+            samples.append(elapsed)
+            if max_seconds and sum(samples) >= max_seconds and len(samples) >= 2:
+                break
+
+        queries, peak = 0, 0
+        tracemalloc.start()
+        try:
+            for _ in range(max(traced, 1)):
+                queries, request_peak = _traced_request(client, scenario, tenant)
+                peak = max(peak, request_peak)
+        finally:
+            tracemalloc.stop()
+
+    latencies = [seconds * 1000 for seconds in samples]
+    return {
+        "samples": len(samples),
+        "statuses": sorted(statuses),
+        "queries": queries,
+        "throughput_rps": round(len(samples) / sum(samples), 1),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        **{
+            f"{name}_ms": round(value, 3)
+            for name, value in percentiles(latencies).items()
+        },
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_suite(sizes=None, endpoints=ENDPOINTS, seed=0, **options):
+    """
+    Seeds a tenant per size and benchmarks every endpoint against it.
+    `options` are passed to benchmark_endpoint. Returns one dict per
+    (size, endpoint).
+    """
+    results = []
+    for size in sizes or TENANT_SIZES:
+        tenant = seed_benchmark_tenant(size, seed=seed)
+        for scenario in endpoints:
+            results.append(
+                {
+                    "size": size,
+                    "endpoint": scenario.label,
+                    **benchmark_endpoint(scenario, tenant, **options),
+                }
+            )
+    return results
+
+
+def compare(baseline, results, key="p50_ms"):
+    """
+    Pairs `results` with the matching entries of an earlier run's results.
+    Returns (size, endpoint, before, after, change in %) for `key`.
+    """
+    before = {(entry["size"], entry["endpoint"]): entry for entry in baseline}
+    rows = []
+    for entry in results:
+        old = before.get((entry["size"], entry["endpoint"]))
+        if old is None or not old.get(key):
+            continue
+        change = (entry[key] - old[key]) / old[key] * 100
+        rows.append((entry["size"], entry["endpoint"], old[key], entry[key], change))
+    return rows
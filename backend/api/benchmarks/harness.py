@@ -0,0 +1,61 @@
+# backend/api/benchmarks/harness.py
+
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+
+from ..serializers.user_serializer import MyTokenObtainPairSerializer
+from ..services.activity_tracker import activity_tracker
+from ..services.token_usage import token_usage
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Runs the block against throwaway test databases, the same way the
+    Django test runner does, so benchmarks never touch real data.
+    """
+    setup_test_environment()
+    old_config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        # Drain the write-behind trackers while their tables still exist,
+        # otherwise their atexit flush fails against the dropped database
+        activity_tracker.flush()
+        token_usage.flush()
+        teardown_databases(old_config, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def auth_headers(user, account=None):
+    """
+    Builds the Authorization (and optional X-Account-ID) headers for `user`,
+    using the same token (and claims) the login endpoint issues.
+    """
+    token = MyTokenObtainPairSerializer.get_token(user).access_token
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+    if account is not None:
+        headers["HTTP_X_ACCOUNT_ID"] = str(account.id)
+    return headers
+
+
+def run_counted(method, path, headers=None, data=None):
+    """
+    Issues one request through the test client and captures its SQL.
+    Returns (response, captured_queries).
+    """
+    client = APIClient()
+    with CaptureQueriesContext(connection) as ctx:
+        response = getattr(client, method.lower())(
+            path, data=data, format="json", **(headers or {})
+        )
+    return response, ctx.captured_queries
@@ -0,0 +1,501 @@
+# backend/api/benchmarks/load_data.py
+
+"""
+Production-scale synthetic data for load testing.
+
+Everything is drawn from one seeded random.Random, so the same options
+produce the same rows. Quiz popularity follows a Zipf law (a few quizzes
+take most results and events), activity grows towards the end of the time
+window, and scores are normally distributed around a fraction of the
+quiz's question count.
+
+Rows are streamed into their tables in batches, with executemany() INSERTs
+(or COPY on PostgreSQL). Model save() overrides, signals and field
+pre_save hooks never run, so auto_now_add timestamps keep their generated
+values. Primary keys are assigned explicitly, after the current maximum,
+and sequences are reset at the end. Commits are not waited for on disk
+(synchronous = OFF on SQLite, synchronous_commit = off on PostgreSQL)
+while the data is written. Only the ids of quizzes and members
+are kept in memory, never the generated rows.
+"""
+
+import io
+import itertools
+import json
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import Max
+
+from ..models.group import Group
+from ..models.question import Question
+from ..models.quiz import Quiz
+from ..models.quiz_event import QuizEvent
+from ..models.user import Account, AccountMembership, User, UserResult
+from .datasets import BENCHMARK_PASSWORD
+
+TOPICS = [
+    "math",
+    "history",
+    "biology",
+    "physics",
+    "chemistry",
+    "geography",
+    "literature",
+    "music",
+    "programming",
+    "economics",
+]
+PLANS = ["Free Plan", "Pro Plan", "Enterprise Plan"]
+# (event type, share of events)
+EVENT_TYPES = [
+    ("started", 0.45),
+    ("answered", 0.35),
+    ("completed", 0.15),
+    (QuizEvent.AI_GENERATION, 0.05),
+]
+
+
+@dataclass
+class LoadProfile:
+    """Volumes and distributions of the generated data."""
+
+    label: str = "load"
+    accounts: int = 10
+    members_per_account: int = 200
+    groups_per_account: int = 20
+    quizzes_per_account: int = 1000
+    questions_per_quiz: tuple = (5, 15)  # inclusive range
+    results: int = 1_000_000
+    events: int = 2_000_000
+    # Zipf exponent of quiz popularity; 0 spreads activity evenly
+    popularity_skew: float = 1.0
+    # 0: activity uniform over the window; higher values favour recent days
+    growth: float = 1.0
+    days: int = 365
+    end: datetime = None  # defaults to today, 00:00 UTC
+    anonymous_share: float = 0.3
+    score_mean: float = 0.7  # fraction of the questions answered correctly
+    score_stddev: float = 0.15
+    seed: int = 0
+
+
+@dataclass
+class _Tenant:
+    account_id: int
+    member_ids: list = field(default_factory=list)
+
+
+class TableWriter:
+    """
+    Streams rows for `model` into its table, `batch_size` rows per
+    statement and transaction. Rows are tuples of the `fields` values;
+    every other concrete field gets its default.
+    """
+
+    def __init__(self, model, fields, batch_size=5000, use_copy=None):
+        self.model = model
+        self.batch_size = batch_size
+        self.use_copy = (
+            connection.vendor == "postgresql" if use_copy is None else use_copy
+        )
+        provided = [model._meta.get_field(name) for name in fields]
+        defaults = [
+            f
+            for f in model._meta.concrete_fields
+            if f not in provided and not isinstance(f, models.AutoField)
+        ]
+        self.fields = provided + defaults
+        self.defaults = self._adapt(tuple(f.get_default() for f in defaults), defaults)
+        # Drivers take datetimes as they are, except SQLite's (see _adapt)
+        self.datetime_columns = {
+            n for n, f in enumerate(provided) if isinstance(f, models.DateTimeField)
+        }
+        self.written = 0
+
+    def _adapt(self, row, fields):
+        if self.use_copy:
+            return row
+        adapt = connection.ops.adapt_datetimefield_value
+        return tuple(
+            adapt(value) if isinstance(f, models.DateTimeField) else value
+            for f, value in zip(fields, row)
+        )
+
+    def write(self, rows):
+        """Writes an iterable of rows; returns how many were written."""
+        adapt = connection.ops.adapt_datetimefield_value
+        columns = self.datetime_columns if not self.use_copy else ()
+        count = 0
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                break
+            if columns:
+                batch = [
+                    tuple(
+                        adapt(value) if n in columns else value
+                        for n, value in enumerate(row)
+                    )
+                    for row in batch
+                ]
+            batch = [row + self.defaults for row in batch]
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    if self.use_copy:
+                        self._copy(cursor, batch)
+                    else:
+                        self._insert(cursor, batch)
+            count += len(batch)
+        self.written += count
+        return count
+
+    @property
+    def _columns(self):
+        qn = connection.ops.quote_name
+        return ", ".join(qn(f.column) for f in self.fields)
+
+    def _insert(self, cursor, batch):
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        placeholders = ", ".join(["%s"] * len(self.fields))
+        cursor.executemany(
+            f"INSERT INTO {table} ({self._columns}) VALUES ({placeholders})", batch
+        )
+
+    def _copy(self, cursor, batch):
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        sql = f"COPY {table} ({self._columns}) FROM STDIN"
+        data = "".join(
+            "\t".join(_copy_value(value) for value in row) + "\n" for row in batch
+        )
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(sql, io.StringIO(data))
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(data)
+
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value):
+    """`value` in COPY's text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+# Per-session settings that trade durability for write speed, and the
+# statement reading each one's current value: synthetic data can simply be
+# generated again after a crash
+_UNSAFE_WRITES = {
+    "sqlite": [("PRAGMA synchronous", "PRAGMA synchronous = {}", "OFF")],
+    "postgresql": [("SHOW synchronous_commit", "SET synchronous_commit = {}", "off")],
+}
+
+
+@contextmanager
+def _unsafe_writes():
+    settings = _UNSAFE_WRITES.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        previous = []
+        for show, assign, value in settings:
+            cursor.execute(show)
+            previous.append(cursor.fetchone()[0])
+            cursor.execute(assign.format(value))
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for (_, assign, _), value in zip(settings, previous):
+                cursor.execute(assign.format(value))
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+
+
+def _reset_sequences(model_list):
+    statements = connection.ops.sequence_reset_sql(no_style(), model_list)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+class LoadDataGenerator:
+    """
+    Generates the data described by a LoadProfile. generate() writes it
+    and returns the rows written per model; `progress(model name, rows)`
+    is called after every table.
+    """
+
+    def __init__(self, profile, batch_size=5000, use_copy=None, progress=None):
+        self.profile = profile
+        self.rng = random.Random(profile.seed)
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.progress = progress or (lambda name, rows: None)
+        end = profile.end or datetime.combine(
+            datetime.now(dt_timezone.utc).date(), time(), dt_timezone.utc
+        )
+        self.end = end
+        self.start = end - timedelta(days=profile.days)
+        self.tenants = []
+        # Parallel arrays, one entry per quiz
+        self.quiz_ids = []
+        self.quiz_tenants = []
+        self.quiz_sizes = []
+        self.quiz_created = []
+        self._cum_weights = None
+
+    def generate(self):
+        written = {}
+        with _unsafe_writes():
+            for model, rows in self._tables():
+                writer = TableWriter(
+                    model, rows.fields, self.batch_size, use_copy=self.use_copy
+                )
+                writer.write(rows)
+                written[model.__name__] = writer.written
+                self.progress(model.__name__, writer.written)
+        _reset_sequences(
+            [Account, AccountMembership, Group, Question, UserResult, QuizEvent]
+        )
+        return written
+
+    def _tables(self):
+        # Lazily, in dependency order: each table's rows are drawn only
+        # after the previous table has been written
+        yield User, _Rows(["id", "email", "username", "password"], self._users())
+        yield Account, _Rows(
+            ["id", "name", "owner", "subscription_plan", "created_at"],
+            self._accounts(),
+        )
+        yield AccountMembership, _Rows(
+            ["account", "user", "role", "invited_at", "joined_at"],
+            self._memberships(),
+        )
+        yield Group, _Rows(
+            ["id", "account", "name", "order", "created_at"], self._groups()
+        )
+        yield Quiz, _Rows(
+            [
+                "id",
+                "account",
+                "group",
+                "order",
+                "title",
+                "topic",
+                "question_count",
+                "is_published",
+                "created_at",
+            ],
+            self._quizzes(),
+        )
+        yield Question, _Rows(
+            [
+                "quiz",
+                "question_text",
+                "option_a",
+                "option_b",
+                "option_c",
+                "option_d",
+                "correct_answer",
+            ],
+            self._questions(),
+        )
+        yield UserResult, _Rows(
+            ["quiz", "user", "nickname", "anonymous_id", "score", "completed_at"],
+            self._results(),
+        )
+        yield QuizEvent, _Rows(
+            [
+                "quiz",
+                "participant_email",
+                "event_type",
+                "event_detail",
+                "tokens",
+                "timestamp",
+            ],
+            self._events(),
+        )
+
+    # Distributions
+
+    def _uid(self, prefix):
+        return f"{prefix}{self.rng.getrandbits(128):032x}"
+
+    def _moment(self, since=None):
+        """A time in [since, end), denser towards `end` as growth rises."""
+        since = since or self.start
+        span = (self.end - since).total_seconds()
+        fraction = self.rng.random() ** (1 / (1 + self.profile.growth))
+        return since + timedelta(seconds=span * fraction)
+
+    def _popular_quizzes(self, count):
+        """Indexes of the quizzes of `count` rows, by Zipf-distributed rank."""
+        if self._cum_weights is None:
+            ranks = list(range(len(self.quiz_ids)))
+            self.rng.shuffle(ranks)
+            skew = self.profile.popularity_skew
+            self._cum_weights = list(
+                itertools.accumulate(1 / (rank + 1) ** skew for rank in ranks)
+            )
+        quizzes = range(len(self.quiz_ids))
+        while count > 0:
+            chunk = min(count, self.batch_size)
+            yield from self.rng.choices(quizzes, cum_weights=self._cum_weights, k=chunk)
+            count -= chunk
+
+    # Rows
+
+    def _users(self):
+        profile = self.profile
+        password = make_password(BENCHMARK_PASSWORD)
+        account_pk = _next_pk(Account)
+        for a in range(profile.accounts):
+            tenant = _Tenant(account_pk + a)
+            self.tenants.append(tenant)
+            for m in range(profile.members_per_account):
+                user_id = self._uid("u")
+                tenant.member_ids.append(user_id)
+                email = f"{profile.label}-a{tenant.account_id}-m{m}@load.local"
+                yield user_id, email, email, password
+
+    def _accounts(self):
+        for tenant in self.tenants:
+            yield (
+                tenant.account_id,
+                f"{self.profile.label} account {tenant.account_id}",
+                tenant.member_ids[0],
+                self.rng.choice(PLANS),
+                self.start,
+            )
+
+    def _memberships(self):
+        for tenant in self.tenants:
+            for m, user_id in enumerate(tenant.member_ids):
+                role = "owner" if m == 0 else "member"
+                joined = self._moment()
+                yield tenant.account_id, user_id, role, joined, joined
+
+    def _groups(self):
+        self.group_ids = {}
+        pk = _next_pk(Group)
+        for tenant in self.tenants:
+            ids = self.group_ids[tenant.account_id] = []
+            for g in range(self.profile.groups_per_account):
+                ids.append(pk)
+                yield pk, tenant.account_id, f"Group {g}", g, self.start
+                pk += 1
+
+    def _quizzes(self):
+        profile = self.profile
+        low, high = profile.questions_per_quiz
+        for t, tenant in enumerate(self.tenants):
+            groups = self.group_ids[tenant.account_id]
+            for n in range(profile.quizzes_per_account):
+                quiz_id = self._uid("q")
+                # One quiz in ten is left ungrouped
+                group = self.rng.choice(groups) if groups and n % 10 else None
+                topic = self.rng.choice(TOPICS)
+                size = self.rng.randint(low, high)
+                created = self._moment()
+                self.quiz_ids.append(quiz_id)
+                self.quiz_tenants.append(t)
+                self.quiz_sizes.append(size)
+                self.quiz_created.append(created)
+                yield (
+                    quiz_id,
+                    tenant.account_id,
+                    group,
+                    n,
+                    f"{topic.title()} quiz {n}",
+                    topic,
+                    size,
+                    self.rng.random() < 0.8,
+                    created,
+                )
+
+    def _questions(self):
+        letters = "ABCD"
+        for quiz_id, size in zip(self.quiz_ids, self.quiz_sizes):
+            for n in range(size):
+                yield (
+                    quiz_id,
+                    f"Question {n + 1}?",
+                    "Option A",
+                    "Option B",
+                    "Option C",
+                    "Option D",
+                    self.rng.choice(letters),
+                )
+
+    def _results(self):
+        profile = self.profile
+        rng = self.rng
+        for quiz in self._popular_quizzes(profile.results):
+            size = self.quiz_sizes[quiz]
+            score = round(rng.gauss(profile.score_mean, profile.score_stddev) * size)
+            score = min(max(score, 0), size)
+            completed = self._moment(self.quiz_created[quiz])
+            if rng.random() < profile.anonymous_share:
+                anonymous_id = f"anon{rng.getrandbits(64):016x}"
+                yield (
+                    self.quiz_ids[quiz],
+                    None,
+                    f"Guest {anonymous_id[-4:]}",
+                    anonymous_id,
+                    score,
+                    completed,
+                )
+            else:
+                members = self.tenants[self.quiz_tenants[quiz]].member_ids
+                user_id = rng.choice(members)
+                yield self.quiz_ids[quiz], user_id, None, None, score, completed
+
+    def _events(self):
+        rng = self.rng
+        types = [event_type for event_type, _ in EVENT_TYPES]
+        cum_weights = list(itertools.accumulate(share for _, share in EVENT_TYPES))
+        label = self.profile.label
+        for quiz in self._popular_quizzes(self.profile.events):
+            event_type = rng.choices(types, cum_weights=cum_weights)[0]
+            timestamp = self._moment(self.quiz_created[quiz])
+            if event_type == QuizEvent.AI_GENERATION:
+                prompt, completion = rng.randint(80, 200), rng.randint(300, 1500)
+                detail = json.dumps(
+                    {
+                        "model": "gpt-3.5-turbo",
+                        "prompt_tokens": prompt,
+                        "completion_tokens": completion,
+                    }
+                )
+                tokens = prompt + completion
+                yield self.quiz_ids[quiz], None, event_type, detail, tokens, timestamp
+            else:
+                email = f"{label}-p{rng.randrange(1_000_000)}@load.local"
+                yield self.quiz_ids[quiz], email, event_type, None, 0, timestamp
+
+
+class _Rows:
+    """A lazy row iterable with the names of the fields its tuples hold."""
+
+    def __init__(self, fields, rows):
+        self.fields = fields
+        self.rows = rows
+
+    def __iter__(self):
+        return iter(self.rows)
@@ -0,0 +1,429 @@
+# backend/api/benchmarks/query_budgets.py
+
+"""
+Query budgets for every API endpoint.
+
+Each URL name under api/ has a Scenario: one request, issued against
+tenants seeded at every size in DATASETS. An endpoint passes when its
+query count is the same at every size (no per-row queries) and within its
+budget, if it has one. The SELECTs it ran against the largest tenant are
+EXPLAINed, and full scans of LARGE_TABLES are reported.
+
+Every request runs in a transaction that is rolled back, so writes do not
+change the data the next scenario sees (on_commit hooks never run).
+"""
+
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.test import APIClient
+
+from ..models.question import Question
+from ..models.quiz import Quiz
+from ..models.quiz_event import QuizEvent
+from ..models.user import User, UserResult
+from ..serializers.user_serializer import MyTokenObtainPairSerializer
+from ..utils import generate_prefixed_uuid
+from .datasets import BENCHMARK_PASSWORD, seed_tenant
+from .harness import auth_headers
+
+DATASETS = {
+    "small": dict(groups=2, quizzes_per_group=3, questions_per_quiz=3, members=3),
+    "large": dict(groups=8, quizzes_per_group=25, questions_per_quiz=10, members=20),
+}
+RESULTS_PER_QUIZ = {"small": 2, "large": 10}
+
+# Tables that grow with usage: a full scan of one is flagged
+LARGE_TABLES = {
+    model._meta.db_table for model in (Quiz, Question, UserResult, QuizEvent)
+}
+
+FAKE_AI_BACKENDS = {
+    "default": {"BACKEND": "api.services.ai_backends.FakeBackend"},
+}
+METRICS_TOKEN = "query-budgets"
+
+QUIZ_PAYLOAD = {
+    "title": "Budget quiz",
+    "topic": "Budgets",
+    "difficulty": "easy",
+    "question_count": 3,
+    "quiz_type": "multiple-choice",
+    "option_count": 4,
+}
+QUESTION_PAYLOAD = {
+    "question_text": "Which budget?",
+    "option_a": "Query",
+    "option_b": "Memory",
+    "correct_answer": "A",
+}
+
+
+class Scenario(
+    namedtuple(
+        "Scenario",
+        "url_name method kwargs data query budget headers staff",
+        defaults=(None, None, None, None, None, False),
+    )
+):
+    """
+    One request to `url_name`. kwargs, data and query are dicts, or
+    callables taking the tenant (see seed_budget_tenant) and returning one.
+    budget is the most queries the request may run (None: no limit, but
+    the count must still not grow with the data). headers replace the
+    tenant's (JWT) request headers; staff requests as a staff user, who is
+    not a member of the tenant.
+    """
+
+    def resolve(self, tenant):
+        def value(spec):
+            return spec(tenant) if callable(spec) else spec
+
+        path = reverse(self.url_name, kwargs=value(self.kwargs))
+        return path, value(self.data), value(self.query)
+
+    @property
+    def label(self):
+        return f"{self.method} {self.url_name}"
+
+
+def _quiz(tenant):
+    return tenant["quizzes"][0]
+
+
+def _quiz_id(tenant):
+    return {"quiz_id": _quiz(tenant).id}
+
+
+def _account_id(tenant):
+    return {"account_id": tenant["account"].id}
+
+
+def _invite_quiz_id(tenant):
+    return {"quiz_id": tenant["invite_quiz"].id}
+
+
+def _group_id(tenant):
+    return {"group_id": tenant["groups"][0].id}
+
+
+def _emails(tenant, count=3):
+    return [f"{tenant['label']}-guest{n}@bench.local" for n in range(count)]
+
+
+SCENARIOS = [
+    # Accounts
+    Scenario("create_account", "POST", data={"name": "Budget account"}),
+    Scenario(
+        "transfer_ownership",
+        "POST",
+        _account_id,
+        lambda t: {"new_owner_email": t["users"][1].email},
+    ),
+    Scenario("list_account_members", "GET", _account_id, budget=6),
+    Scenario(
+        "invite_member",
+        "POST",
+        _account_id,
+        lambda t: {"email": _emails(t)[0], "role": "member"},
+    ),
+    Scenario("get_account", "GET", _account_id, budget=6),
+    Scenario("account_usage", "GET", _account_id, budget=8),
+    Scenario("account_ai_usage", "GET", _account_id, budget=6),
+    Scenario(
+        "set_password",
+        "POST",
+        data=lambda t: {"email": t["users"][1].email, "password": "budget-pass-2"},
+    ),
+    Scenario(
+        "create_user",
+        "POST",
+        _account_id,
+        lambda t: {"email": _emails(t)[1], "password": "budget-pass-2"},
+    ),
+    Scenario(
+        "bulk_create_users",
+        "POST",
+        _account_id,
+        lambda t: {
+            "users": [{"email": email} for email in _emails(t, 5)],
+            "send_invitation": False,
+        },
+    ),
+    Scenario(
+        "manage_user",
+        "PATCH",
+        lambda t: {"account_id": t["account"].id, "user_id": t["users"][1].id},
+        {"role": "admin"},
+    ),
+    # Async views
+    Scenario("create_quiz_async", "POST", data=QUIZ_PAYLOAD),
+    Scenario(
+        "invite_users_to_quiz_async",
+        "POST",
+        _invite_quiz_id,
+        lambda t: {"emails": _emails(t)},
+    ),
+    Scenario(
+        "submit_quiz_results_async",
+        "POST",
+        data=lambda t: {"quiz_id": _quiz(t).id, "score": 3},
+    ),
+    # Groups
+    Scenario("group_list", "GET", budget=6),
+    Scenario("group_list", "POST", data={"name": "Budget group"}),
+    Scenario("group_detail", "GET", _group_id, budget=6),
+    Scenario(
+        "update_group_order",
+        "PUT",
+        data=lambda t: {
+            "group_orders": [
+                {"id": group.id, "order": n} for n, group in enumerate(t["groups"][:2])
+            ]
+        },
+    ),
+    Scenario("rename_group", "PUT", _group_id, {"name": "Renamed"}),
+    Scenario("delete_group", "DELETE", _group_id),
+    # Ops
+    Scenario("ai_backend_stats", "GET", staff=True),
+    Scenario(
+        "metrics", "GET", headers={"HTTP_AUTHORIZATION": f"Bearer {METRICS_TOKEN}"}
+    ),
+    Scenario("slow_queries", "GET", staff=True),
+    Scenario("replica_status", "GET", staff=True),
+    # Questions
+    Scenario(
+        "question_detail",
+        "GET",
+        lambda t: {"question_id": t["question"].id},
+        budget=6,
+    ),
+    Scenario("create_question", "POST", _quiz_id, QUESTION_PAYLOAD),
+    # Quizzes
+    Scenario("list_quizzes", "GET", budget=6),
+    Scenario("create_quiz", "POST", data=QUIZ_PAYLOAD),
+    Scenario("search_quizzes", "GET", query={"q": "quiz"}, budget=6),
+    Scenario("autocomplete_topics", "GET", query={"q": "m"}, budget=6),
+    Scenario("quiz_detail", "GET", _quiz_id, budget=6),
+    Scenario("quiz_detail", "PUT", _quiz_id, {"title": "Renamed quiz"}),
+    Scenario("duplicate_quiz", "POST", _quiz_id),
+    Scenario("share_quiz", "POST", _quiz_id),
+    Scenario(
+        "move_quiz_to_group",
+        "PUT",
+        _quiz_id,
+        lambda t: {"group_id": t["groups"][-1].id},
+    ),
+    Scenario(
+        "update_quiz_order",
+        "PUT",
+        data=lambda t: {
+            "quiz_orders": [
+                {"id": quiz.id, "order": n} for n, quiz in enumerate(t["quizzes"][:2])
+            ]
+        },
+    ),
+    Scenario(
+        "invite_users_to_quiz",
+        "POST",
+        _invite_quiz_id,
+        lambda t: {"emails": _emails(t)},
+    ),
+    Scenario(
+        "bulk_invite_users_to_quiz",
+        "POST",
+        _invite_quiz_id,
+        lambda t: {"emails": _emails(t, 5)},
+    ),
+    # Users
+    Scenario(
+        "submit_quiz_results",
+        "POST",
+        data=lambda t: {"quiz_id": _quiz(t).id, "score": 3},
+    ),
+    Scenario(
+        "get_quiz_result",
+        "GET",
+        lambda t: {"result_id": t["result"].id},
+        budget=6,
+    ),
+    Scenario(
+        "register_user",
+        "POST",
+        data=lambda t: {"email": _emails(t)[2], "password": "budget-pass-2"},
+    ),
+    Scenario(
+        "token_obtain_pair",
+        "POST",
+        data=lambda t: {"email": t["owner"].email, "password": BENCHMARK_PASSWORD},
+    ),
+    Scenario("token_refresh", "POST", data=lambda t: {"refresh": t["refresh"]}),
+    Scenario("user-profile", "GET", budget=6),
+    Scenario("user-profile-update", "PUT", data={"first_name": "Budget"}),
+    Scenario(
+        "change-password",
+        "PUT",
+        data={
+            "old_password": BENCHMARK_PASSWORD,
+            "new_password": "budget-pass-2",
+            "confirm_new_password": "budget-pass-2",
+        },
+    ),
+]
+
+
+def api_url_names():
+    """Names of every URL pattern served under /api/."""
+    names = set()
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            route = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, route)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                if route.startswith("api/"):
+                    names.add(pattern.name)
+
+    walk(get_resolver().url_patterns, "")
+    return names
+
+
+def seed_budget_tenant(size, label=None):
+    """Seeds a tenant of `size` (a DATASETS key) with what scenarios need."""
+    label = label or f"budget-{size}"
+    tenant = seed_tenant(
+        label, results_per_quiz=RESULTS_PER_QUIZ[size], **DATASETS[size]
+    )
+    quiz = tenant["quizzes"][0]
+    tenant["label"] = label
+    tenant["invite_quiz"] = tenant["quizzes"][1]
+    Quiz.objects.filter(pk=tenant["invite_quiz"].pk).update(
+        access_control="invitation"
+    )
+    tenant["question"] = Question.objects.filter(quiz=quiz).first()
+    tenant["result"] = UserResult.objects.filter(quiz=quiz).first()
+    tenant["headers"] = auth_headers(tenant["owner"], tenant["account"])
+    staff = User.objects.create(
+        id=generate_prefixed_uuid("u"),
+        email=f"{label}-staff@bench.local",
+        username=f"{label}-staff@bench.local",
+        is_staff=True,
+    )
+    tenant["staff_headers"] = auth_headers(staff)
+    tenant["refresh"] = str(MyTokenObtainPairSerializer.get_token(tenant["owner"]))
+    return tenant
+
+
+@contextmanager
+def _recording_queries():
+    queries = []
+
+    def record(execute, sql, params, many, context):
+        queries.append((sql, params, many))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        yield queries
+
+
+_SCAN_RE = re.compile(r"\b(?:Seq Scan on|SCAN) (\w+)")
+
+
+def _full_scans(sql, params):
+    """
+    Full scans of LARGE_TABLES in the plan of `sql`: "Seq Scan on" in
+    PostgreSQL, "SCAN" in SQLite (a walk of a whole index included).
+    """
+    prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Rule out seq scans the planner picks only because the test data
+            # is small: any left have no usable index
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"{prefix} {sql}", params)
+        plan = [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+    return [
+        line.strip()
+        for line in plan
+        if any(table in LARGE_TABLES for table in _SCAN_RE.findall(line))
+    ]
+
+
+def run_scenario(scenario, tenant, explain=False):
+    """
+    Issues the scenario's request for `tenant` and rolls it back. Returns
+    (status code, queries run, {select: full scans} when explaining).
+    """
+    path, data, query = scenario.resolve(tenant)
+    if query:
+        path = f"{path}?{'&'.join(f'{k}={v}' for k, v in query.items())}"
+    client = APIClient()
+    scans = {}
+    if scenario.headers is not None:
+        headers = scenario.headers
+    else:
+        headers = tenant["staff_headers" if scenario.staff else "headers"]
+    overrides = override_settings(
+        AI_BACKENDS=FAKE_AI_BACKENDS,
+        METRICS={**getattr(settings, "METRICS", {}), "TOKEN": METRICS_TOKEN},
+    )
+    with overrides, transaction.atomic():
+        with _recording_queries() as queries:
+            response = getattr(client, scenario.method.lower())(
+                path, data=data, format="json", **headers
+            )
+        if explain:
+            for sql, params, many in queries:
+                if many or not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                if sql not in scans:
+                    found = _full_scans(sql, params)
+                    if found:
+                        scans[sql] = found
+        transaction.set_rollback(True)
+    return response.status_code, len(queries), scans
+
+
+def check_budgets(tenants, scenarios=SCENARIOS, explain=True):
+    """
+    Runs every scenario against every tenant ({size: tenant}, smallest
+    first). Returns one dict per scenario: label, statuses and query counts
+    per size, budget, scans (from the largest size) and problems.
+    """
+    sizes = list(tenants)
+    report = []
+    for scenario in scenarios:
+        statuses, counts, scans = {}, {}, {}
+        for size in sizes:
+            status, count, found = run_scenario(
+                scenario, tenants[size], explain=explain and size == sizes[-1]
+            )
+            statuses[size], counts[size] = status, count
+            scans.update(found)
+        problems = []
+        if len(set(counts.values())) > 1:
+            problems.append("query count grows with the data")
+        if scenario.budget is not None and max(counts.values()) > scenario.budget:
+            problems.append(f"over budget ({scenario.budget})")
+        if any(status >= 500 for status in statuses.values()):
+            problems.append("server error")
+        elif any(status >= 400 for status in statuses.values()):
+            # A refused request measures nothing of the endpoint
+            problems.append("request refused")
+        report.append(
+            {
+                "label": scenario.label,
+                "statuses": statuses,
+                "counts": counts,
+                "budget": scenario.budget,
+                "scans": scans,
+                "problems": problems,
+            }
+        )
+    return report
@@ -0,0 +1,213 @@
+# backend/api/db_routing.py
+
+"""
+Read-replica routing.
+
+Reads go to a replica only while a view decorated with @replica_reads
+handles a GET/HEAD/OPTIONS request (ReplicaRoutingMiddleware decides, per
+request). All writes, reads outside such views (middleware, management
+commands, background threads) and reads inside a transaction on the
+primary go to "default".
+
+Read-your-writes: once a request writes (an INSERT, UPDATE or DELETE
+runs on the primary: db_for_write() is also consulted for relation
+assignments that write nothing), its later reads go to the primary, and
+the middleware pins the client to the primary for
+REPLICA_ROUTING["PIN_SECONDS"]: by the user id of its access token, in the
+cache (shared by the worker processes when REDIS_URL is set), and with a
+cookie for clients without a token.
+
+Replicas whose lag exceeds MAX_LAG_SECONDS, or that cannot be reached,
+are skipped; lag is measured at most every CHECK_INTERVAL seconds per
+process, by the request that finds the last measurement stale.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL: 0 on a primary or a replica that has replayed everything it
+# received, else the age of the last replayed transaction
+_POSTGRES_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(
+        EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+    )
+END
+"""
+
+_WRITE_RE = re.compile(r"\s*(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+_state = ContextVar("replica_routing", default=None)
+
+
+def _config(name, default):
+    return getattr(settings, "REPLICA_ROUTING", {}).get(name, default)
+
+
+def replica_reads(view):
+    """Marks `view` as safe to serve its GET requests from a replica."""
+    view.replica_reads = True
+    return view
+
+
+class RoutingState:
+    """
+    Routing decisions of one request (see ReplicaRoutingMiddleware), or of
+    a block of code (api.sharding.account_routing / on_shard).
+    """
+
+    __slots__ = ("use_replica", "replica", "wrote", "account_id", "shard")
+
+    def __init__(self):
+        self.use_replica = False
+        self.replica = None  # chosen on the first replica read
+        self.wrote = False
+        self.account_id = None  # whose shard tenant data is on (api.sharding)
+        self.shard = None  # or a fixed shard, for jobs over a whole shard
+
+
+def current_state():
+    """The RoutingState of the request being handled, or None."""
+    return _state.get()
+
+
+@contextmanager
+def request_routing():
+    """Routes the block's queries as one request's; yields its RoutingState."""
+    state = RoutingState()
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def _note_writes(execute, sql, params, many, context):
+    state = _state.get()
+    if state is not None and not state.wrote and _WRITE_RE.match(sql):
+        state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def install_write_watcher():
+    """
+    Installs the execute wrapper that notices a request's writes on the
+    primary, once per connection (per thread or context).
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    # At the bottom of the stack: execute_wrapper() blocks pop whatever
+    # wrapper is last on exit
+    if _note_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _note_writes)
+
+
+class ReplicaHealth:
+    """
+    Cached replication lag of each replica in REPLICA_ROUTING["REPLICAS"].
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checks = {}  # alias -> (checked_at, lag seconds or None)
+
+    def replicas(self):
+        return [alias for alias in _config("REPLICAS", []) if alias in connections]
+
+    def lag(self, alias):
+        """Seconds behind the primary; None when unreachable."""
+        interval = _config("CHECK_INTERVAL", 10)
+        checked_at, lag = self._checks.get(alias, (None, None))
+        now = time.monotonic()
+        if checked_at is not None and now - checked_at < interval:
+            return lag
+        # One request per process re-measures; the others use the last value
+        if not self._lock.acquire(blocking=False):
+            return lag if checked_at is not None else None
+        try:
+            lag = self._measure(alias)
+            self._checks[alias] = (time.monotonic(), lag)
+        finally:
+            self._lock.release()
+        return lag
+
+    def healthy(self, alias):
+        lag = self.lag(alias)
+        return lag is not None and lag <= _config("MAX_LAG_SECONDS", 5)
+
+    def choose(self):
+        """A random healthy replica, or None."""
+        healthy = [alias for alias in self.replicas() if self.healthy(alias)]
+        return random.choice(healthy) if healthy else None
+
+    def status(self):
+        return [
+            {
+                "alias": alias,
+                "lag_seconds": self.lag(alias),
+                "healthy": self.healthy(alias),
+            }
+            for alias in self.replicas()
+        ]
+
+    def _measure(self, alias):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == "postgresql":
+                    cursor.execute(_POSTGRES_LAG_SQL)
+                else:
+                    cursor.execute("SELECT 0")  # no lag to measure; a ping
+                return float(cursor.fetchone()[0])
+        except Exception:
+            logger.warning("Replica %s is unreachable.", alias, exc_info=True)
+            connection.close()
+            return None
+
+
+replica_health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    """
+    Database router: see the module docstring. Replicas hold the same data
+    as the primary, so relations are always allowed and they are never
+    migrated (the databases tests use as replicas are).
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None
+            or not state.use_replica
+            or state.wrote
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        # Related objects come from where the instance was loaded
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if state.replica is None:
+            state.replica = replica_health.choose() or DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in _config("REPLICAS", []) else None
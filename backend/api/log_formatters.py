@@ -0,0 +1,29 @@
+# backend/api/log_formatters.py
+
+import json
+import logging
+
+# Structured `extra` attributes our loggers attach to their records
+STRUCTURED_FIELDS = ("timing", "slow_query")
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger and message, plus the
+    structured data the record carries (e.g. "timing" from api.timing), so
+    log pipelines can index the fields instead of parsing the message.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
@@ -0,0 +1,114 @@
+# backend/api/management/commands/bench_asgi.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+
+from ...benchmarks import auth_headers, benchmark_database, seed_tenant
+from ...services.ai_backends import get_ai_backend
+
+
+def _payload(n):
+    # Distinct topics: identical requests would share one AI call (single-flight)
+    return {"title": "Benchmark quiz", "topic": f"Latency {n}", "question_count": 5}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares concurrent quiz generation through the sync view (WSGI, one "
+        "thread per in-flight request) and the async view (ASGI, one event "
+        "loop) with the fake AI backend set to a fixed latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--latency", type=float, default=1.0, help="Fake AI latency (seconds)."
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="WSGI worker threads (the in-flight limit of a threaded worker).",
+        )
+
+    def handle(self, *args, **options):
+        fake = {
+            "default": {
+                "BACKEND": "api.services.ai_backends.FakeBackend",
+                "OPTIONS": {"LATENCY": options["latency"]},
+            }
+        }
+        with benchmark_database(), override_settings(AI_BACKENDS=fake):
+            tenant = seed_tenant("asgi", groups=1, quizzes_per_group=1)
+            headers = auth_headers(tenant["owner"], tenant["account"])
+            self._report("wsgi", options["requests"], *self._run_wsgi(headers, options))
+            self._report("asgi", options["requests"], *self._run_asgi(headers, options))
+
+    def _run_wsgi(self, headers, options):
+        # SQLite's shared in-memory test database rejects concurrent access
+        # from several threads ("table is locked"), so there each request
+        # holds a lock for its queries and drops it only while waiting on
+        # the AI, which is the part this benchmark measures
+        db_lock = threading.Lock() if connection.vendor == "sqlite" else None
+        if db_lock is not None:
+            backend = get_ai_backend()
+            complete = backend._complete
+
+            def complete_unlocked(*args, **params):
+                db_lock.release()
+                try:
+                    return complete(*args, **params)
+                finally:
+                    db_lock.acquire()
+
+            backend._complete = complete_unlocked
+
+        def post(n):
+            with db_lock or nullcontext():
+                return Client().post(
+                    "/api/create-quiz/",
+                    _payload(n),
+                    content_type="application/json",
+                    **headers,
+                ).status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            statuses = list(pool.map(post, range(options["requests"])))
+        return time.perf_counter() - started, statuses
+
+    def _run_asgi(self, headers, options):
+        asgi_headers = {"Authorization": headers["HTTP_AUTHORIZATION"]}
+
+        async def run():
+            client = AsyncClient()
+            responses = await asyncio.gather(
+                *(
+                    client.post(
+                        "/api/async/create-quiz/",
+                        _payload(n),
+                        content_type="application/json",
+                        headers=asgi_headers,
+                    )
+                    for n in range(options["requests"])
+                )
+            )
+            return [response.status_code for response in responses]
+
+        started = time.perf_counter()
+        statuses = asyncio.run(run())
+        return time.perf_counter() - started, statuses
+
+    def _report(self, label, total, elapsed, statuses):
+        ok = sum(code == 201 for code in statuses)
+        self.stdout.write(
+            f"{label}: {total} requests in {elapsed:.2f}s "
+            f"({total / elapsed:.1f} req/s), {ok} created, {total - ok} failed"
+        )
@@ -0,0 +1,119 @@
+# backend/api/management/commands/bench_autocomplete.py
+
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from rest_framework.test import APIClient
+
+from ...benchmarks import auth_headers, benchmark_database, seed_tenant
+from ...models.quiz import Quiz
+from ...services.topic_autocomplete import account_tries
+from ...utils import generate_prefixed_uuid
+
+WORDS = (
+    "algebra ancient applied basic biology cell chemistry civil climate "
+    "computer data earth economics english french geometry global history "
+    "human intro linear literature marine modern molecular music organic "
+    "physics political programming quantum renaissance science statistics "
+    "theory world writing"
+).split()
+PREFIXES = ["", "b", "bio", "mol", "quantum ph", "zzz"]
+
+
+def _p95(timings):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds one account with many quiz topics and compares topic "
+        "autocomplete through the prefix trie with a LIKE 'prefix%' query."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quizzes", type=int, default=50_000)
+        parser.add_argument("--topics", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            tenant = seed_tenant(
+                "topics", groups=1, quizzes_per_group=0, questions_per_quiz=0
+            )
+            account = tenant["account"]
+            self._seed_quizzes(account, options["quizzes"], options["topics"])
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            trie = account_tries.get(account.id)
+            build_ms = (time.perf_counter() - started) * 1000
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write(
+                f"trie: {len(trie)} topics, built in {build_ms:.0f} ms, "
+                f"peak {peak / 1024 / 1024:.1f} MB"
+            )
+
+            client = APIClient()
+            headers = auth_headers(tenant["owner"], account)
+            self.stdout.write(
+                f"{'prefix':<14}{'hits':>6}{'trie ms':>9}"
+                f"{'endpoint p50':>14}{'p95':>8}{'LIKE p50':>10}"
+            )
+            for prefix in PREFIXES:
+                trie_timings, endpoint_timings, like_timings = [], [], []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    suggestions = trie.suggest(prefix)
+                    trie_timings.append((time.perf_counter() - started) * 1000)
+
+                    started = time.perf_counter()
+                    client.get(
+                        "/api/quizzes/topics/autocomplete/", {"q": prefix}, **headers
+                    )
+                    endpoint_timings.append((time.perf_counter() - started) * 1000)
+
+                    started = time.perf_counter()
+                    list(
+                        Quiz.objects.filter(
+                            account=account, topic__istartswith=prefix
+                        )
+                        .values("topic")
+                        .annotate(quizzes=Count("id"))
+                        .order_by("-quizzes")[:10]
+                    )
+                    like_timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f"{prefix!r:<14}{len(suggestions):>6}"
+                    f"{statistics.median(trie_timings):>9.3f}"
+                    f"{statistics.median(endpoint_timings):>14.2f}"
+                    f"{_p95(endpoint_timings):>8.2f}"
+                    f"{statistics.median(like_timings):>10.2f}"
+                )
+
+    def _seed_quizzes(self, account, count, topic_count, batch_size=5000):
+        rng = random.Random(0)
+        topics = [
+            " ".join(rng.sample(WORDS, rng.randint(1, 3))).capitalize()
+            for _ in range(topic_count)
+        ]
+        # Zipf-like popularity: a few topics are used by many quizzes
+        weights = [1 / (rank + 1) for rank in range(topic_count)]
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            Quiz.objects.bulk_create(
+                [
+                    Quiz(
+                        id=generate_prefixed_uuid("q"),
+                        account=account,
+                        title=f"Quiz {start + n}",
+                        topic=topic,
+                    )
+                    for n, topic in enumerate(rng.choices(topics, weights, k=size))
+                ]
+            )
@@ -0,0 +1,155 @@
+# backend/api/management/commands/bench_db_connections.py
+
+import logging
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from rest_framework.test import APIClient
+
+from ...benchmarks import benchmark_database
+from ...benchmarks.endpoints import ENDPOINTS, percentiles, seed_benchmark_tenant
+
+MODES = ("fresh", "persistent", "pooled")
+
+
+def _pooling_available():
+    if connection.vendor != "postgresql":
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return is_psycopg3
+
+
+def _configure(mode):
+    """Switches the default connection to `mode` (from its next connect)."""
+    connection.close()
+    if connection.vendor == "postgresql":
+        connection.close_pool()
+    options = dict(connection.settings_dict["OPTIONS"])
+    options.pop("pool", None)
+    if mode == "pooled":
+        options["pool"] = {
+            **getattr(settings, "DB_POOL_OPTIONS", {}),
+            "min_size": 1,
+        }
+    connection.settings_dict["OPTIONS"] = options
+    connection.settings_dict["CONN_MAX_AGE"] = 600 if mode == "persistent" else 0
+    connection.settings_dict["CONN_HEALTH_CHECKS"] = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the per-request latency of opening a database connection "
+        "for every request (fresh), keeping it open (persistent, "
+        "CONN_MAX_AGE) and borrowing it from a pool (pooled, DB_POOL), "
+        "replaying Django's request_started / request_finished connection "
+        "handling around each request. Run it against the real database "
+        "host: the difference is mostly the TLS and authentication round "
+        "trips of a new connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument(
+            "--endpoint",
+            default="quiz_detail",
+            choices=[s.url_name for s in ENDPOINTS if s.method == "GET"],
+        )
+        parser.add_argument(
+            "--mode",
+            action="append",
+            choices=MODES,
+            default=[],
+            help="Mode to run (repeatable). Default: every available one.",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 2:
+            raise CommandError("--repeat must be at least 2.")
+        scenario = next(s for s in ENDPOINTS if s.url_name == options["endpoint"])
+        # Per-request timing records would drown the report
+        logging.getLogger("api.timing").setLevel(logging.ERROR)
+
+        with benchmark_database():
+            original = {
+                key: connection.settings_dict[key]
+                for key in ("OPTIONS", "CONN_MAX_AGE", "CONN_HEALTH_CHECKS")
+            }
+            modes = options["mode"] or [
+                mode for mode in MODES if mode != "pooled" or _pooling_available()
+            ]
+            if "pooled" in modes and not _pooling_available():
+                raise CommandError("Pooling needs PostgreSQL with psycopg[pool] 3.")
+            if connection.vendor == "sqlite" and connection.is_in_memory_db():
+                self.stderr.write(
+                    "In-memory SQLite test databases are never closed: "
+                    "every mode keeps its connection."
+                )
+            tenant = seed_benchmark_tenant("small")
+            try:
+                results = [
+                    self._run(mode, scenario, tenant, options["repeat"])
+                    for mode in modes
+                ]
+            finally:
+                _configure(None)
+                connection.settings_dict.update(original)
+
+        fresh = next((r for r in results if r["mode"] == "fresh"), None)
+        self.stdout.write(
+            f"{'mode':<12}{'opened':>9}{'mean':>9}{'p50':>9}{'p95':>9}"
+            f"{'p99':>9}{'saved/req':>11}"
+        )
+        for result in results:
+            saved = f"{fresh['mean_ms'] - result['mean_ms']:.2f}" if fresh else "-"
+            self.stdout.write(
+                f"{result['mode']:<12}{result['opened']:>9}"
+                f"{result['mean_ms']:>9.2f}{result['p50_ms']:>9.2f}"
+                f"{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}{saved:>11}"
+            )
+
+    def _run(self, mode, scenario, tenant, repeat):
+        _configure(mode)
+        path, _, query = scenario.resolve(tenant)
+        client = APIClient()
+        connects = []
+
+        def count(sender, connection, **kwargs):
+            connects.append(connection.alias)
+
+        samples = []
+        connection_created.connect(count)
+        try:
+            for i in range(repeat + 1):
+                started = time.perf_counter()
+                close_old_connections()  # request_started
+                response = client.get(path, query, **tenant["headers"])
+                close_old_connections()  # request_finished
+                elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    raise CommandError(f"{path}: HTTP {response.status_code}")
+                if i:  # the first request opens the pool or the connection
+                    samples.append(elapsed * 1000)
+        finally:
+            connection_created.disconnect(count)
+        opened = len(connects)
+        if mode == "pooled":
+            # connection_created is also sent for every checkout
+            opened = connection.pool.get_stats().get("connections_num", 0)
+        return {
+            "mode": mode,
+            "opened": opened,
+            "mean_ms": statistics.fmean(samples),
+            **{
+                f"{name}_ms": value
+                for name, value in percentiles(samples).items()
+            },
+        }
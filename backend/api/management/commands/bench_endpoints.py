@@ -0,0 +1,147 @@
+# backend/api/management/commands/bench_endpoints.py
+
+import json
+import logging
+import platform
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from ...benchmarks import benchmark_database
+from ...benchmarks.endpoints import ENDPOINTS, TENANT_SIZES, compare, run_suite
+
+
+def _git_revision():
+    """Current commit (with a -dirty suffix for local changes), or None."""
+    try:
+        described = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return described.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the main endpoints against small, medium and large seeded "
+        "tenants: throughput, p50/p95/p99 latency, queries and peak memory "
+        "per request. --output saves the run as JSON; --compare prints the "
+        "change against an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            action="append",
+            choices=list(TENANT_SIZES),
+            default=[],
+            help="Tenant size to run (repeatable). Default: all.",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            default=[],
+            help="URL name to run (repeatable). Default: all.",
+        )
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--max-seconds",
+            type=float,
+            default=10.0,
+            help="Stop sampling an endpoint after this much request time.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the run to this JSON file.")
+        parser.add_argument("--compare", help="Earlier run (JSON) to compare with.")
+
+    def handle(self, *args, **options):
+        endpoints = [
+            scenario
+            for scenario in ENDPOINTS
+            if not options["endpoint"] or scenario.url_name in options["endpoint"]
+        ]
+        if not endpoints:
+            raise CommandError(
+                "No such endpoint; choose from "
+                + ", ".join(scenario.url_name for scenario in ENDPOINTS)
+            )
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)
+
+        # Per-request timing records would drown the report
+        logging.getLogger("api.timing").setLevel(logging.ERROR)
+
+        with benchmark_database():
+            vendor = connection.vendor
+            results = run_suite(
+                sizes=options["size"] or None,
+                endpoints=endpoints,
+                seed=options["seed"],
+                repeat=options["repeat"],
+                warmup=options["warmup"],
+                max_seconds=options["max_seconds"],
+            )
+
+        run = {
+            "revision": _git_revision(),
+            "created": timezone.now().isoformat(),
+            "database": vendor,
+            "python": platform.python_version(),
+            "seed": options["seed"],
+            "repeat": options["repeat"],
+            "results": results,
+        }
+        self._print(results)
+        if baseline is not None:
+            self._print_comparison(baseline, results)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(run, fh, indent=2)
+            self.stdout.write(f"Saved to {options['output']}")
+
+    def _print(self, results):
+        self.stdout.write(
+            f"{'size':<8}{'endpoint':<28}{'status':>8}{'n':>5}{'req/s':>9}"
+            f"{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'peak KiB':>10}"
+        )
+        for entry in results:
+            statuses = "/".join(str(status) for status in entry["statuses"])
+            self.stdout.write(
+                f"{entry['size']:<8}{entry['endpoint'][:27]:<28}{statuses:>8}"
+                f"{entry['samples']:>5}{entry['throughput_rps']:>9.1f}"
+                f"{entry['p50_ms']:>9.2f}{entry['p95_ms']:>9.2f}"
+                f"{entry['p99_ms']:>9.2f}{entry['queries']:>9}"
+                f"{entry['peak_kib']:>10.1f}"
+            )
+
+    def _print_comparison(self, baseline, results):
+        self.stdout.write(
+            f"\nChange since {baseline.get('revision') or 'baseline'} "
+            f"({baseline.get('database')}):"
+        )
+        self.stdout.write(
+            f"{'size':<8}{'endpoint':<28}{'p50 before':>12}{'p50 after':>12}"
+            f"{'change':>9}{'p95 change':>12}"
+        )
+        p95 = {
+            (size, endpoint): change
+            for size, endpoint, _, _, change in compare(
+                baseline["results"], results, key="p95_ms"
+            )
+        }
+        for size, endpoint, before, after, change in compare(
+            baseline["results"], results
+        ):
+            self.stdout.write(
+                f"{size:<8}{endpoint[:27]:<28}{before:>12.2f}{after:>12.2f}"
+                f"{change:>+8.1f}%{p95.get((size, endpoint), 0):>+11.1f}%"
+            )
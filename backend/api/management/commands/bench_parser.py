@@ -0,0 +1,79 @@
+# backend/api/management/commands/bench_parser.py
+
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from ...utils import salvage_quiz_questions
+from ...utils.parse_quiz_text import _to_question
+
+
+def _response(count, option_count):
+    questions = [
+        {
+            "question": f"Benchmark question number {n} about parsing?",
+            "options": {chr(65 + o): f"Answer {o} to {n}" for o in range(option_count)},
+            "correct_answer": "A",
+        }
+        for n in range(count)
+    ]
+    return json.dumps({"questions": questions}, indent=2)
+
+
+def _strict(text, option_count):
+    """The previous parser: one json.loads of the whole response."""
+    try:
+        items = json.loads(text)["questions"]
+    except (json.JSONDecodeError, KeyError):
+        return None
+    return [_to_question(item, option_count) for item in items]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the tolerant AI response parser against a strict "
+        "json.loads on large clean, fenced and truncated responses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=5000)
+        parser.add_argument("--options", type=int, default=4)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        option_count = options["options"]
+        clean = _response(options["questions"], option_count)
+        cases = [
+            ("clean", clean),
+            ("fenced", f"Here you go:\n```json\n{clean}\n```\nGood luck!"),
+            ("truncated", clean[: len(clean) * 9 // 10]),
+        ]
+        self.stdout.write(
+            f"{len(clean) / 1e6:.1f} MB response, {options['questions']} questions\n"
+            f"{'case':<11}{'parser':<9}{'questions':>10}{'ms':>9}{'peak MB':>9}"
+        )
+        for label, text in cases:
+            for name, parse in (("strict", _strict), ("tolerant", salvage_quiz_questions)):
+                parsed, seconds, peak = self._measure(
+                    parse, text, option_count, options["repeat"]
+                )
+                found = "failed" if parsed is None else len(parsed)
+                self.stdout.write(
+                    f"{label:<11}{name:<9}{found:>10}{seconds * 1000:>9.1f}"
+                    f"{peak / 1e6:>9.2f}"
+                )
+
+    def _measure(self, parse, text, option_count, repeat):
+        """Best wall time of `repeat` runs, and the peak memory of one."""
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            parse(text, option_count)
+            best = min(best, time.perf_counter() - started)
+        tracemalloc.start()
+        parsed = parse(text, option_count)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return parsed, best, peak
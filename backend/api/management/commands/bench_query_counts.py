@@ -0,0 +1,61 @@
+# backend/api/management/commands/bench_query_counts.py
+
+from django.core.management.base import BaseCommand
+
+from ...benchmarks import auth_headers, benchmark_database, run_counted, seed_tenant
+
+MEMBERSHIP_TABLE = '"api_accountmembership"'
+USER_TABLE = 'FROM "api_user"'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throwaway database and prints the number of SQL queries "
+        "(and how many of them load the user or resolve account membership) "
+        "per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--accounts",
+            type=int,
+            default=2,
+            help="Accounts the benchmark user belongs to (multi-account users).",
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self._run(options["accounts"])
+
+    def _run(self, account_count):
+        tenant = seed_tenant("bench", groups=3, quizzes_per_group=4)
+        owner = tenant["owner"]
+        account = tenant["account"]
+        quiz = tenant["quizzes"][0]
+
+        # Extra memberships make the old `accounts.first()` lookup ambiguous
+        for n in range(1, account_count):
+            other = seed_tenant(f"bench{n}", groups=1, quizzes_per_group=1)
+            other["account"].members.add(owner, through_defaults={"role": "member"})
+
+        headers = auth_headers(owner, account)
+        endpoints = [
+            ("GET", "/api/quizzes/"),
+            ("GET", f"/api/quizzes/{quiz.id}/"),
+            ("GET", "/api/groups/"),
+            ("GET", f"/api/accounts/{account.id}/"),
+            ("GET", f"/api/accounts/{account.id}/members/"),
+            ("GET", "/api/user/profile/"),
+        ]
+
+        self.stdout.write(
+            f"{'endpoint':<45}{'status':>8}{'queries':>9}{'user':>6}{'account':>9}"
+        )
+        for method, path in endpoints:
+            response, queries = run_counted(method, path, headers)
+            user_queries = sum(USER_TABLE in q["sql"] for q in queries)
+            account_queries = sum(MEMBERSHIP_TABLE in q["sql"] for q in queries)
+            self.stdout.write(
+                f"{method + ' ' + path[:38]:<45}{response.status_code:>8}"
+                f"{len(queries):>9}{user_queries:>6}{account_queries:>9}"
+            )
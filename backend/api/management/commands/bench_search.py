@@ -0,0 +1,74 @@
+# backend/api/management/commands/bench_search.py
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...benchmarks import benchmark_database, seed_tenant
+from ...models.question import Question
+from ...services.quiz_search import search_quizzes
+
+VOCABULARY = (
+    "cell energy atom planet river empire war treaty equation graph protein "
+    "enzyme orbit gravity climate ocean volcano fraction vector matrix poem "
+    "novel grammar verb painting sculpture melody rhythm market trade bank "
+    "virus bacteria fossil mineral circuit voltage magnet photosynthesis"
+).split()
+QUERIES = ["energy", "photosynthesis", "planet orbit", "volt", "nonexistentword"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds one account with many questions and reports full-text search "
+        "latency (median and p95 over repeated queries)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=100_000)
+        parser.add_argument("--quizzes", type=int, default=2_000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            tenant = seed_tenant(
+                "search",
+                groups=1,
+                quizzes_per_group=options["quizzes"],
+                questions_per_quiz=0,
+            )
+            self._seed_questions(tenant["quizzes"], options["questions"])
+            account_id = tenant["account"].id
+
+            self.stdout.write(f"{'query':<18}{'results':>8}{'p50 ms':>9}{'p95 ms':>9}")
+            for query in QUERIES:
+                timings = []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    results = search_quizzes(account_id, query)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                self.stdout.write(
+                    f"{query:<18}{len(results):>8}"
+                    f"{statistics.median(timings):>9.2f}{p95:>9.2f}"
+                )
+
+    def _seed_questions(self, quizzes, count, batch_size=5000):
+        rng = random.Random(0)
+        for start in range(0, count, batch_size):
+            Question.objects.bulk_create(
+                [
+                    Question(
+                        quiz=quizzes[n % len(quizzes)],
+                        question_text=" ".join(rng.choices(VOCABULARY, k=8)) + "?",
+                        option_a=rng.choice(VOCABULARY),
+                        option_b=rng.choice(VOCABULARY),
+                        option_c=rng.choice(VOCABULARY),
+                        option_d=rng.choice(VOCABULARY),
+                        correct_answer="A",
+                    )
+                    for n in range(start, min(start + batch_size, count))
+                ]
+            )
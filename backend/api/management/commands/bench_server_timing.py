@@ -0,0 +1,82 @@
+# backend/api/management/commands/bench_server_timing.py
+
+import logging
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from ...benchmarks import auth_headers, benchmark_database, seed_tenant
+
+TIMING_MIDDLEWARE = "api.middleware.ServerTimingMiddleware"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the latency overhead of ServerTimingMiddleware (and its SQL, "
+        "serializer and logging hooks) per endpoint, and prints the "
+        "Server-Timing header each endpoint returns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        # Keep the per-request log records, but off the console
+        timing_logger = logging.getLogger("api.timing")
+        handlers, timing_logger.handlers = timing_logger.handlers, [
+            logging.NullHandler()
+        ]
+        try:
+            with benchmark_database():
+                self._run(options["repeat"])
+        finally:
+            timing_logger.handlers = handlers
+
+    def _run(self, repeat):
+        tenant = seed_tenant("timing", groups=3, quizzes_per_group=5)
+        account = tenant["account"]
+        headers = auth_headers(tenant["owner"], account)
+        quiz = tenant["quizzes"][0]
+        endpoints = [
+            "/api/quizzes/",
+            f"/api/quizzes/{quiz.id}/",
+            "/api/groups/",
+            f"/api/accounts/{account.id}/",
+        ]
+
+        timed_client = APIClient()
+        with override_settings(
+            MIDDLEWARE=[m for m in settings.MIDDLEWARE if m != TIMING_MIDDLEWARE]
+        ):
+            plain_client = APIClient()
+            plain_client.get(endpoints[0], **headers)  # loads its middleware
+        timed_client.get(endpoints[0], **headers)
+
+        self.stdout.write(
+            f"{'endpoint':<40}{'plain p50':>10}{'timed p50':>10}{'overhead':>10}"
+        )
+        overheads = []
+        for path in endpoints:
+            plain, timed = [], []
+            # Interleaved, so drift (caches, CPU frequency) hits both alike
+            for _ in range(repeat):
+                for client, timings in ((plain_client, plain), (timed_client, timed)):
+                    started = time.perf_counter()
+                    client.get(path, **headers)
+                    timings.append((time.perf_counter() - started) * 1000)
+            plain_ms, timed_ms = statistics.median(plain), statistics.median(timed)
+            overhead = (timed_ms - plain_ms) / plain_ms * 100
+            overheads.append(overhead)
+            self.stdout.write(
+                f"{path[:38]:<40}{plain_ms:>10.2f}{timed_ms:>10.2f}"
+                f"{overhead:>9.1f}%"
+            )
+        self.stdout.write(f"median overhead: {statistics.median(overheads):.1f}%")
+
+        for path in endpoints:
+            response = timed_client.get(path, **headers)
+            self.stdout.write(f"{path}\n  Server-Timing: {response['Server-Timing']}")
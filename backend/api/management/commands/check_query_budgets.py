@@ -0,0 +1,106 @@
+# backend/api/management/commands/check_query_budgets.py
+
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ...benchmarks import benchmark_database
+from ...benchmarks.query_budgets import (
+    DATASETS,
+    SCENARIOS,
+    api_url_names,
+    check_budgets,
+    seed_budget_tenant,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests every API endpoint against small and large seeded tenants, "
+        "fails when an endpoint's query count grows with the data or exceeds "
+        "its budget, and reports full scans of large tables in the query "
+        "plans. Runs on the configured database (SQLite or PostgreSQL); "
+        "`manage.py test api.tests.test_query_budgets` runs the same check on "
+        "local SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=[],
+            help="URL name to check (repeatable). Default: all.",
+        )
+        parser.add_argument("--no-explain", action="store_true")
+        parser.add_argument(
+            "--fail-on-scan",
+            action="store_true",
+            help="Also fail when a query plan fully scans a large table.",
+        )
+        parser.add_argument("--json", help="Also write the report to this file.")
+
+    def handle(self, *args, **options):
+        scenarios = [
+            scenario
+            for scenario in SCENARIOS
+            if not options["only"] or scenario.url_name in options["only"]
+        ]
+        uncovered = set()
+        if not options["only"]:
+            uncovered = api_url_names() - {scenario.url_name for scenario in SCENARIOS}
+
+        # Per-request timing records and 4xx warnings would drown the report
+        for name in ("api.timing", "django.request"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+        with benchmark_database():
+            self.stdout.write(f"database: {connection.vendor}")
+            tenants = {size: seed_budget_tenant(size) for size in DATASETS}
+            report = check_budgets(
+                tenants, scenarios, explain=not options["no_explain"]
+            )
+
+        self._print(report)
+        if options["json"]:
+            with open(options["json"], "w") as fh:
+                json.dump(
+                    {"database": connection.vendor, "endpoints": report}, fh, indent=2
+                )
+
+        failures = [entry["label"] for entry in report if entry["problems"]]
+        if options["fail_on_scan"]:
+            failures += [entry["label"] for entry in report if entry["scans"]]
+        failures += [f"{name} (no scenario)" for name in sorted(uncovered)]
+        if failures:
+            raise CommandError(
+                "Query budget check failed: " + ", ".join(dict.fromkeys(failures))
+            )
+        self.stdout.write(self.style.SUCCESS("All endpoints within budget."))
+
+    def _print(self, report):
+        sizes = list(DATASETS)
+        self.stdout.write(
+            f"{'endpoint':<38}{'status':>8}"
+            + "".join(f"{size:>8}" for size in sizes)
+            + f"{'budget':>8}  problems"
+        )
+        for entry in report:
+            statuses = "/".join(sorted({str(s) for s in entry["statuses"].values()}))
+            self.stdout.write(
+                f"{entry['label'][:37]:<38}{statuses:>8}"
+                + "".join(f"{entry['counts'][size]:>8}" for size in sizes)
+                + f"{entry['budget'] if entry['budget'] is not None else '-':>8}  "
+                + "; ".join(entry["problems"])
+            )
+
+        scanning = [entry for entry in report if entry["scans"]]
+        if scanning:
+            self.stdout.write(f"\nFull scans of large tables ({sizes[-1]} dataset):")
+        for entry in scanning:
+            self.stdout.write(f"  {entry['label']}")
+            for sql, plan in entry["scans"].items():
+                self.stdout.write(f"    {sql[:120]}")
+                for line in plan:
+                    self.stdout.write(f"      -> {line}")
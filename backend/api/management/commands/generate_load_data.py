@@ -0,0 +1,150 @@
+# backend/api/management/commands/generate_load_data.py
+
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ...benchmarks.load_data import LoadDataGenerator, LoadProfile
+from ...services.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes deterministic, production-scale synthetic data (accounts, "
+        "members, groups, quizzes, questions, results and quiz events with "
+        "skewed quiz popularity) into the configured database, for load "
+        "testing. The same --seed and options produce the same rows."
+    )
+
+    def add_arguments(self, parser):
+        defaults = LoadProfile()
+        parser.add_argument("--label", default=defaults.label)
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument("--accounts", type=int, default=defaults.accounts)
+        parser.add_argument(
+            "--members-per-account", type=int, default=defaults.members_per_account
+        )
+        parser.add_argument(
+            "--groups-per-account", type=int, default=defaults.groups_per_account
+        )
+        parser.add_argument(
+            "--quizzes-per-account", type=int, default=defaults.quizzes_per_account
+        )
+        parser.add_argument(
+            "--questions-per-quiz",
+            type=int,
+            nargs=2,
+            metavar=("MIN", "MAX"),
+            default=defaults.questions_per_quiz,
+        )
+        parser.add_argument("--results", type=int, default=defaults.results)
+        parser.add_argument("--events", type=int, default=defaults.events)
+        parser.add_argument(
+            "--popularity-skew",
+            type=float,
+            default=defaults.popularity_skew,
+            help="Zipf exponent of quiz popularity (0: uniform).",
+        )
+        parser.add_argument(
+            "--growth",
+            type=float,
+            default=defaults.growth,
+            help="How strongly activity favours recent days (0: uniform).",
+        )
+        parser.add_argument("--days", type=int, default=defaults.days)
+        parser.add_argument(
+            "--end",
+            type=lambda value: datetime.strptime(value, "%Y-%m-%d").replace(
+                tzinfo=dt_timezone.utc
+            ),
+            help="Last day of the time window (YYYY-MM-DD). Default: today.",
+        )
+        parser.add_argument(
+            "--anonymous-share", type=float, default=defaults.anonymous_share
+        )
+        parser.add_argument("--score-mean", type=float, default=defaults.score_mean)
+        parser.add_argument("--score-stddev", type=float, default=defaults.score_stddev)
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument(
+            "--method",
+            choices=["auto", "insert", "copy"],
+            default="auto",
+            help="auto: COPY on PostgreSQL, batched INSERTs elsewhere.",
+        )
+        parser.add_argument(
+            "--skip-counters",
+            action="store_true",
+            help="Do not recount the generated accounts' counters afterwards.",
+        )
+        parser.add_argument("--noinput", "--no-input", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["method"] == "copy" and connection.vendor != "postgresql":
+            raise CommandError("COPY is only available on PostgreSQL.")
+        low, high = options["questions_per_quiz"]
+        if not 0 <= low <= high:
+            raise CommandError("--questions-per-quiz needs 0 <= MIN <= MAX.")
+
+        profile = LoadProfile(
+            label=options["label"],
+            accounts=options["accounts"],
+            members_per_account=max(options["members_per_account"], 1),
+            groups_per_account=options["groups_per_account"],
+            quizzes_per_account=options["quizzes_per_account"],
+            questions_per_quiz=(low, high),
+            results=options["results"],
+            events=options["events"],
+            popularity_skew=options["popularity_skew"],
+            growth=options["growth"],
+            days=options["days"],
+            end=options["end"],
+            anonymous_share=options["anonymous_share"],
+            score_mean=options["score_mean"],
+            score_stddev=options["score_stddev"],
+            seed=options["seed"],
+        )
+        if not options["noinput"]:
+            database = connection.settings_dict["NAME"]
+            answer = input(
+                f"This writes {profile.results:,} results and {profile.events:,} "
+                f"events into '{database}' ({connection.vendor}). Type 'yes' to "
+                "continue: "
+            )
+            if answer != "yes":
+                raise CommandError("Cancelled.")
+
+        started = time.monotonic()
+        last = [started]
+
+        def progress(name, rows):
+            now = time.monotonic()
+            seconds = now - last[0]
+            last[0] = now
+            rate = rows / seconds if seconds else 0
+            self.stdout.write(
+                f"{name:<20}{rows:>12,} rows{seconds:>9.1f}s{rate:>12,.0f} rows/s"
+            )
+
+        use_copy = {"auto": None, "insert": False, "copy": True}[options["method"]]
+        generator = LoadDataGenerator(
+            profile,
+            batch_size=options["batch_size"],
+            use_copy=use_copy,
+            progress=progress,
+        )
+        written = generator.generate()
+        seconds = time.monotonic() - started
+        total = sum(written.values())
+        self.stdout.write(
+            f"{total:,} rows in {seconds:.1f}s ({total / seconds:,.0f} rows/s)"
+        )
+
+        if not options["skip_counters"]:
+            recount_started = time.monotonic()
+            for tenant in generator.tenants:
+                reconcile_counters(account_id=tenant.account_id)
+            self.stdout.write(
+                f"Counters recounted in {time.monotonic() - recount_started:.1f}s"
+            )
@@ -0,0 +1,51 @@
+# backend/api/management/commands/move_account.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.account_moves import CHUNK_SIZE, AccountMove, MoveError
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves an account's groups, quizzes, results and usage to another "
+        "shard while it stays online: copies them in chunks, freezes its "
+        "writes for a final pass, verifies every chunk on both sides, switches "
+        "its placement and deletes the old copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("account_id", type=int)
+        parser.add_argument("target", help="Database alias of the shard.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            "--wait",
+            type=float,
+            default=None,
+            help=(
+                "Seconds to wait after freezing and after the cutover "
+                '(default: TENANT_SHARDS["CACHE_SECONDS"]).'
+            ),
+        )
+        parser.add_argument(
+            "--keep-source",
+            action="store_true",
+            help="Leave the rows on the old shard (delete them later by hand).",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        move = AccountMove(
+            options["account_id"],
+            options["target"],
+            chunk_size=options["chunk_size"],
+            wait=options["wait"],
+            progress=self.stdout.write,
+        )
+        try:
+            report = move.run(keep_source=options["keep_source"])
+        except MoveError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(
+            " ".join(f"{name}={count}" for name, count in report.items())
+        )
@@ -0,0 +1,33 @@
+# backend/api/management/commands/reconcile_counters.py
+
+from django.core.management.base import BaseCommand
+
+from ...services.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts the question, result, participant and quiz counters of "
+        "quizzes, groups and accounts, and repairs any that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--account", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows have drifted.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = reconcile_counters(
+            account_id=options["account"],
+            dry_run=options["dry_run"],
+            batch_size=options["batch_size"],
+        )
+        verb = "drifted" if options["dry_run"] else "repaired"
+        self.stdout.write(
+            " ".join(f"{model}={count}" for model, count in drifted.items())
+            + f" ({verb})"
+        )
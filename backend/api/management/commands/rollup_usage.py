@@ -0,0 +1,47 @@
+# backend/api/management/commands/rollup_usage.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ... import sharding
+from ...services.usage_rollups import rolled_up_until, run_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds quizzes, AI generations and results since the watermark to the "
+        "daily usage rollups (once, or continuously with --loop), on every "
+        "shard. The first run backfills the whole history, one window per "
+        "transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-windows",
+            type=int,
+            default=None,
+            help="Stop after this many windows (to spread a long backfill).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep rolling up, sleeping --interval seconds between runs.",
+        )
+        parser.add_argument("--interval", type=float, default=300.0)
+
+    def handle(self, *args, **options):
+        while True:
+            for alias in sharding.shards():
+                with sharding.on_shard(alias):
+                    windows = run_rollups(max_windows=options["max_windows"])
+                    if windows:
+                        self.stdout.write(
+                            f"database={alias} windows={windows} "
+                            f"rolled_up_until={rolled_up_until()}"
+                        )
+            if not options["loop"]:
+                return
+            close_old_connections()
+            time.sleep(options["interval"])
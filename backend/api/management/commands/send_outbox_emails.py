@@ -0,0 +1,45 @@
+# backend/api/management/commands/send_outbox_emails.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ...services.email_outbox import deliver_outbox
+
+
+class Command(BaseCommand):
+    help = "Delivers queued outbox emails in batches (once, or continuously with --loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep draining the outbox, sleeping --interval seconds when idle.",
+        )
+        parser.add_argument("--interval", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            counts = self._drain(options["batch_size"])
+            if any(counts.values()):
+                self.stdout.write(
+                    f"sent={counts['sent']} retried={counts['retried']} dead={counts['dead']}"
+                )
+            if not options["loop"]:
+                return
+            close_old_connections()
+            time.sleep(options["interval"])
+
+    def _drain(self, batch_size):
+        """
+        Sends batches until nothing is due; returns the summed counts.
+        """
+        totals = {"sent": 0, "retried": 0, "dead": 0}
+        while True:
+            counts = deliver_outbox(batch_size=batch_size)
+            for key, value in counts.items():
+                totals[key] += value
+            if not any(counts.values()):
+                return totals
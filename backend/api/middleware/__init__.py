@@ -0,0 +1,17 @@
+# backend/api/middleware/__init__.py
+
+from .active_account import (
+    ActiveAccountMiddleware,
+    account_role_in,
+    get_active_membership,
+)
+from .replica_routing import ReplicaRoutingMiddleware
+from .server_timing import ServerTimingMiddleware
+
+__all__ = [
+    "ActiveAccountMiddleware",
+    "ReplicaRoutingMiddleware",
+    "ServerTimingMiddleware",
+    "account_role_in",
+    "get_active_membership",
+]
@@ -0,0 +1,179 @@
+# backend/api/middleware/active_account.py
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import router
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.models import TokenUser
+
+from ..authentication import (
+    ACCOUNT_ID_CLAIM,
+    ACCOUNT_ROLE_CLAIM,
+    MEMBERSHIP_VERSION_CLAIM,
+)
+from ..models.group import Group
+from ..models.question import Question
+from ..models.user import Account, AccountMembership, UserResult
+from ..sharding import route_to_account, route_to_quiz, route_to_row
+
+ACCOUNT_HEADER = "HTTP_X_ACCOUNT_ID"
+
+# URL kwargs naming tenant rows: (model, path from it to its account)
+TENANT_ROW_KWARGS = {
+    "group_id": (Group, "account_id"),
+    "question_id": (Question, "quiz__account_id"),
+    "result_id": (UserResult, "quiz__account_id"),
+}
+
+
+def _requested_account_id(request):
+    """
+    Returns the account explicitly selected by the client, if any.
+    Precedence: `account_id` URL kwarg, then the X-Account-ID header,
+    then the `account_id` claim of the JWT.
+    """
+    account_id = getattr(request, "_requested_account_id", None)
+    if account_id is None:
+        account_id = request.META.get(ACCOUNT_HEADER) or None
+    if account_id is None:
+        token = getattr(request, "auth", None)
+        if token is not None and hasattr(token, "get"):
+            account_id = token.get(ACCOUNT_ID_CLAIM)
+    if account_id is None:
+        return None
+    try:
+        return int(account_id)
+    except (TypeError, ValueError):
+        return 0  # Never matches a membership, so the request gets no account
+
+
+def _membership_from_claims(user, token):
+    """
+    Builds an unsaved membership from signed token claims, without a query.
+    The account only has its id loaded; other fields load on first access.
+    """
+    account = Account.from_db(
+        router.db_for_read(Account), ["id"], [token[ACCOUNT_ID_CLAIM]]
+    )
+    return AccountMembership(
+        account=account,
+        user_id=user.pk,
+        role=token.get(ACCOUNT_ROLE_CLAIM),
+        version=token.get(MEMBERSHIP_VERSION_CLAIM),
+    )
+
+
+def _resolve_membership(request):
+    """
+    Looks up the membership of the authenticated user in the requested
+    account (or their earliest membership when none was requested).
+    At most one query; returns None for anonymous users and non-members.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+
+    account_id = _requested_account_id(request)
+
+    # ClaimsJWTAuthentication already checked the token against the database
+    verified = getattr(request, "_verified_membership", None)
+    if verified is not None and account_id == verified.account_id:
+        return verified
+
+    # Stateless (read-only) authentication: trust the signed claims
+    token = getattr(request, "auth", None)
+    if (
+        isinstance(user, TokenUser)
+        and ACCOUNT_ID_CLAIM in token
+        and account_id == token[ACCOUNT_ID_CLAIM]
+    ):
+        return _membership_from_claims(user, token)
+
+    memberships = AccountMembership.objects.select_related("account").filter(
+        user_id=user.pk
+    )
+    if account_id is not None:
+        memberships = memberships.filter(account_id=account_id)
+    return memberships.order_by("id").first()
+
+
+def get_active_membership(request):
+    """
+    Resolves the active membership once and caches it on the request.
+    """
+    if not hasattr(request, "_active_membership"):
+        request._active_membership = _resolve_membership(request)
+        if request._active_membership is not None:
+            route_to_account(request._active_membership.account_id)
+    return request._active_membership
+
+
+def account_role_in(request, account_id):
+    """
+    Returns the user's role in `account_id`, or None when not a member.
+    Reuses the active membership when it is for that account; otherwise
+    one query, so the client need not select the account of the row first.
+    """
+    membership = get_active_membership(request)
+    if membership is not None and membership.account_id == account_id:
+        return membership.role
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    return (
+        AccountMembership.objects.filter(user_id=user.pk, account_id=account_id)
+        .values_list("role", flat=True)
+        .first()
+    )
+
+
+class ActiveAccountMiddleware:
+    """
+    Attaches `request.account` and `request.account_role`.
+
+    Both are lazy: DRF authenticates inside the view, so the membership is
+    looked up on first access (after the JWT user is known) and reused for
+    the rest of the request. Either evaluates falsy when the user has no
+    membership in the requested account.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self._attach(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # Async views must resolve the membership with sync_to_async
+        # (see api.views.async_views); the lazy attributes query on access
+        self._attach(request)
+        return await self.get_response(request)
+
+    def _attach(self, request):
+        request.account = SimpleLazyObject(
+            lambda: getattr(get_active_membership(request), "account", None)
+        )
+        request.account_role = SimpleLazyObject(
+            lambda: getattr(get_active_membership(request), "role", None)
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if "account_id" in view_kwargs:
+            request._requested_account_id = view_kwargs["account_id"]
+        # Tenant queries go to the shard of the row, else of the account,
+        # the request is about (see api.sharding)
+        route_to_quiz(view_kwargs.get("quiz_id"))
+        for kwarg, (model, account_field) in TENANT_ROW_KWARGS.items():
+            if kwarg in view_kwargs:
+                route_to_row(model, view_kwargs[kwarg], account_field)
+        route_to_account(
+            view_kwargs.get("account_id") or request.META.get(ACCOUNT_HEADER)
+        )
+        return None
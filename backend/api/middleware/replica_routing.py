@@ -0,0 +1,119 @@
+# backend/api/middleware/replica_routing.py
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from ..db_routing import current_state, install_write_watcher, request_routing
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _config(name, default):
+    return getattr(settings, "REPLICA_ROUTING", {}).get(name, default)
+
+
+_jwt = JWTAuthentication()
+
+
+def _token_user_id(request):
+    """
+    Id of the user the request's access token was issued to, or None. The
+    token is only checked (signature, expiry), not its user; this runs
+    before DRF authenticates the request.
+    """
+    if not hasattr(request, "_pin_user_id"):
+        user_id = None
+        header = _jwt.get_header(request)
+        try:
+            raw_token = _jwt.get_raw_token(header) if header else None
+            if raw_token is not None:
+                token = _jwt.get_validated_token(raw_token)
+                user_id = token.get(api_settings.USER_ID_CLAIM)
+        except AuthenticationFailed:
+            pass
+        request._pin_user_id = user_id
+    return request._pin_user_id
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets api.db_routing.ReplicaRouter send the reads of @replica_reads
+    views to a replica, unless the client is pinned to the primary, and
+    pins clients that write: REPLICA_ROUTING["PIN_SECONDS"] is how long.
+
+    The pin's expiry is kept in the REPLICA_ROUTING["CACHE"] cache under the
+    user id of the request's access token (the SPA calls the API from
+    another origin without cookies), and in the REPLICA_ROUTING["COOKIE"]
+    cookie for clients that send cookies.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = _config("PIN_SECONDS", 5)
+        self.cookie = _config("COOKIE", "primary_pin")
+        self.cache = caches[_config("CACHE", "default")]
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        install_write_watcher()
+        with request_routing() as state:
+            response = self.get_response(request)
+        return self._pin(request, response, state)
+
+    async def __acall__(self, request):
+        install_write_watcher()
+        with request_routing() as state:
+            response = await self.get_response(request)
+        return self._pin(request, response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = current_state()
+        if state is not None:
+            state.use_replica = (
+                request.method in SAFE_METHODS
+                and getattr(view_func, "replica_reads", False)
+                and not self._pinned(request)
+            )
+
+    def _cache_key(self, user_id):
+        return f"{self.cookie}:{user_id}"
+
+    def _pinned(self, request):
+        try:
+            if float(request.COOKIES.get(self.cookie, 0)) > time.time():
+                return True
+        except ValueError:
+            pass
+        user_id = _token_user_id(request)
+        if user_id is None:
+            return False
+        return self.cache.get(self._cache_key(user_id), 0) > time.time()
+
+    def _pin(self, request, response, state):
+        if self.pin_seconds and (state.wrote or request.method not in SAFE_METHODS):
+            expiry = time.time() + self.pin_seconds
+            response.set_cookie(
+                self.cookie,
+                f"{expiry:.3f}",
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+            user_id = _token_user_id(request)
+            if user_id is not None:
+                self.cache.set(
+                    self._cache_key(user_id), expiry, timeout=self.pin_seconds
+                )
+        return response
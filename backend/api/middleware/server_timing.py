@@ -0,0 +1,192 @@
+# backend/api/middleware/server_timing.py
+
+"""
+Per-request performance breakdown: query count and SQL time (a database
+execute wrapper), serialization time (TimedSerializerMixin) and AI call
+time (BaseAIBackend.complete / acomplete), reported as a Server-Timing
+response header, one structured log record per request and the request
+metrics (see api.services.metrics; the middleware also exports the
+connection pool metrics, api.services.db_pool).
+
+Timings live in a context variable, so they follow the request into
+sync_to_async threads and tasks it starts. Code running outside a request
+(management commands, the shell) is not timed. The phases can overlap:
+queries triggered while serializing (e.g. unprefetched relations) count in
+both db and serialize.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from ..services import db_pool, metrics
+from ..services.slow_queries import slow_query_log
+
+logger = logging.getLogger("api.timing")
+
+_current = ContextVar("request_timings", default=None)
+
+
+def _config(name, default):
+    return getattr(settings, "SERVER_TIMING", {}).get(name, default)
+
+
+class RequestTimings:
+    """Seconds spent per phase (db, serialize, ai) and call counts."""
+
+    __slots__ = ("request", "started", "seconds", "calls", "serializing", "_active")
+
+    def __init__(self, request=None):
+        self.request = request
+        self.started = time.perf_counter()
+        self.seconds = {"db": 0.0, "serialize": 0.0, "ai": 0.0}
+        self.calls = {"db": 0, "serialize": 0, "ai": 0}
+        self.serializing = False  # see TimedSerializerMixin
+        self._active = set()
+
+    def add(self, phase, seconds):
+        self.seconds[phase] += seconds
+        self.calls[phase] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def header(self, total):
+        """The Server-Timing header value, durations in milliseconds."""
+        ms = {phase: seconds * 1000 for phase, seconds in self.seconds.items()}
+        entries = [
+            f'db;dur={ms["db"]:.1f};desc="{self.calls["db"]} queries"',
+            f'serialize;dur={ms["serialize"]:.1f}',
+        ]
+        if self.calls["ai"]:
+            entries.append(f'ai;dur={ms["ai"]:.1f};desc="{self.calls["ai"]} calls"')
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def current_timings():
+    """The RequestTimings of the request being handled, or None."""
+    return _current.get()
+
+
+@contextmanager
+def timed(phase):
+    """
+    Adds the block's duration to `phase` of the current request. Nested
+    blocks of the same phase (e.g. nested serializers) count once.
+    """
+    timings = _current.get()
+    if timings is None or phase in timings._active:
+        yield
+        return
+    timings._active.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._active.discard(phase)
+        timings.add(phase, time.perf_counter() - started)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add("db", time.perf_counter() - started)
+
+
+def _install_query_timer():
+    # Wrappers belong to the connection objects, which outlive requests;
+    # install once per connection (per thread or context) rather than
+    # entering execute_wrapper() on every request. At the bottom of the
+    # stack: execute_wrapper() blocks pop whatever wrapper is last on exit
+    for connection in connections.all():
+        if _time_query not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, _time_query)
+        slow_query_log.install(connection)
+
+
+class ServerTimingMiddleware:
+    """
+    Times each request (see the module docstring). SERVER_TIMING["HEADER"]
+    adds the Server-Timing header; SERVER_TIMING["LOG_THRESHOLD_MS"] logs
+    requests at least that slow to the "api.timing" logger (None: never).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = _config("HEADER", True)
+        self.log_threshold = _config("LOG_THRESHOLD_MS", 500)
+        metrics.registry.start()
+        db_pool.install()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        _install_query_timer()
+        timings = RequestTimings(request)
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, timings)
+
+    async def __acall__(self, request):
+        _install_query_timer()
+        timings = RequestTimings(request)
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, timings)
+
+    def _report(self, request, response, timings):
+        total = timings.elapsed()
+        match = getattr(request, "resolver_match", None)
+        # Never label by path: unmatched paths are unbounded
+        view = match.view_name if match else "unmatched"
+        metrics.http_requests.inc(
+            view=view, method=request.method, status=response.status_code
+        )
+        metrics.http_request_duration.observe(total, view=view, method=request.method)
+        metrics.http_request_queries.observe(timings.calls["db"], view=view)
+
+        if self.header:
+            response["Server-Timing"] = timings.header(total)
+        if self.log_threshold is not None and total * 1000 >= self.log_threshold:
+            record = {
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status": response.status_code,
+                "total_ms": round(total * 1000, 2),
+                "db_queries": timings.calls["db"],
+                "db_ms": round(timings.seconds["db"] * 1000, 2),
+                "serialize_ms": round(timings.seconds["serialize"] * 1000, 2),
+                "ai_calls": timings.calls["ai"],
+                "ai_ms": round(timings.seconds["ai"] * 1000, 2),
+            }
+            logger.info(
+                "%(method)s %(path)s %(status)s %(total_ms)sms "
+                "db=%(db_queries)s/%(db_ms)sms serialize=%(serialize_ms)sms "
+                "ai=%(ai_calls)s/%(ai_ms)sms",
+                record,
+                extra={"timing": record},
+            )
+        return response
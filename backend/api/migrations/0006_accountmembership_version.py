@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-19 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_alter_quiz_id_alter_sharedquiz_id_alter_user_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountmembership',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.2 on 2026-10-19 18:18
+
+from django.db import migrations, models
+
+
+def remove_duplicate_invites(apps, schema_editor):
+    """
+    Lower-cases the addresses (as invitations are stored now) and keeps the
+    earliest invitation per (quiz, email) so the constraint applies. The
+    kept one counts as responded if any of its duplicates did.
+    """
+    InvitedUser = apps.get_model("api", "InvitedUser")
+    kept = {}
+    duplicates = []
+    renamed = {}
+    responded = set()
+    for invite in InvitedUser.objects.order_by("invited_at", "id").only(
+        "id", "quiz_id", "email", "has_responded"
+    ).iterator():
+        email = invite.email.strip().lower()
+        key = (invite.quiz_id, email)
+        if key in kept:
+            duplicates.append(invite.id)
+            if invite.has_responded:
+                responded.add(kept[key])
+            continue
+        kept[key] = invite.id
+        if invite.email != email:
+            renamed[invite.id] = email
+    for start in range(0, len(duplicates), 1000):
+        InvitedUser.objects.filter(id__in=duplicates[start : start + 1000]).delete()
+    for invite_id, email in renamed.items():
+        InvitedUser.objects.filter(id=invite_id).update(email=email)
+    responded = list(responded)
+    for start in range(0, len(responded), 1000):
+        InvitedUser.objects.filter(id__in=responded[start : start + 1000]).update(
+            has_responded=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_invites, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inviteduser',
+            constraint=models.UniqueConstraint(fields=('quiz', 'email'), name='unique_invited_user_per_quiz'),
+        ),
+    ]
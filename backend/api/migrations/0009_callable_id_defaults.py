@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-19 18:20
+
+import api.models.quiz
+import api.models.user
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_invited_user_unique_quiz_email'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quiz',
+            name='id',
+            field=models.CharField(default=api.models.quiz.generate_quiz_id, editable=False, max_length=36, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='sharedquiz',
+            name='id',
+            field=models.CharField(default=api.models.quiz.generate_shared_quiz_id, editable=False, max_length=36, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.CharField(default=api.models.user.generate_user_id, editable=False, max_length=36, primary_key=True, serialize=False),
+        ),
+    ]
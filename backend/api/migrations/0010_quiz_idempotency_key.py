@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-19 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_callable_id_defaults'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='quiz',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', False)), fields=('account', 'idempotency_key'), name='unique_quiz_idempotency_key_per_account'),
+        ),
+    ]
@@ -0,0 +1,195 @@
+# Full-text search index over quizzes and questions (see api.services.quiz_search).
+#
+# PostgreSQL: a tsvector column on api_quiz and api_question, kept current by
+# BEFORE INSERT/UPDATE triggers and indexed with GIN.
+# SQLite: FTS5 tables kept current by triggers (SQLITE_TRIGGERS, restored by
+# the migrations that rebuild api_quiz or api_question and so drop them).
+# The columns and tables are not part of the Django models, so regular
+# queries never load them; every write path (ORM, bulk_create, raw SQL)
+# updates the index through the triggers.
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE api_quiz ADD COLUMN search_vector tsvector",
+    "ALTER TABLE api_question ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION api_quiz_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.topic, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION api_question_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.question_text, '')), 'A') ||
+            setweight(to_tsvector('english', concat_ws(' ',
+                NEW.option_a, NEW.option_b, NEW.option_c, NEW.option_d, NEW.option_e
+            )), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_quiz_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, topic ON api_quiz
+    FOR EACH ROW EXECUTE FUNCTION api_quiz_search_vector()
+    """,
+    """
+    CREATE TRIGGER api_question_search_vector_update
+    BEFORE INSERT OR UPDATE OF question_text, option_a, option_b, option_c,
+        option_d, option_e ON api_question
+    FOR EACH ROW EXECUTE FUNCTION api_question_search_vector()
+    """,
+    # Backfill through the triggers
+    "UPDATE api_quiz SET title = title",
+    "UPDATE api_question SET question_text = question_text",
+    "CREATE INDEX api_quiz_search_vector_idx ON api_quiz USING GIN (search_vector)",
+    "CREATE INDEX api_question_search_vector_idx ON api_question USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS api_quiz_search_vector_update ON api_quiz",
+    "DROP TRIGGER IF EXISTS api_question_search_vector_update ON api_question",
+    "DROP FUNCTION IF EXISTS api_quiz_search_vector()",
+    "DROP FUNCTION IF EXISTS api_question_search_vector()",
+    "ALTER TABLE api_quiz DROP COLUMN IF EXISTS search_vector",
+    "ALTER TABLE api_question DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite drops a table's triggers whenever a migration rebuilds it (most
+# column changes do), so such migrations end with restore_sqlite_triggers.
+# Frozen here: api.services.quiz_search has the copy the app relies on
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS api_quiz_fts_insert AFTER INSERT ON api_quiz BEGIN
+        INSERT INTO api_quiz_fts (quiz_id, account_id, title, topic)
+        VALUES (new.id, new.account_id, new.title, new.topic);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_quiz_fts_update
+    AFTER UPDATE OF title, topic, account_id ON api_quiz BEGIN
+        UPDATE api_quiz_fts
+        SET account_id = new.account_id, title = new.title, topic = new.topic
+        WHERE quiz_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_quiz_fts_delete AFTER DELETE ON api_quiz BEGIN
+        DELETE FROM api_quiz_fts WHERE quiz_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_question_fts_insert
+    AFTER INSERT ON api_question BEGIN
+        INSERT INTO api_question_fts (
+            rowid, question_text, option_a, option_b, option_c, option_d, option_e
+        ) VALUES (
+            new.id, new.question_text, new.option_a, new.option_b, new.option_c,
+            new.option_d, new.option_e
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_question_fts_delete
+    AFTER DELETE ON api_question BEGIN
+        INSERT INTO api_question_fts (
+            api_question_fts, rowid, question_text, option_a, option_b, option_c,
+            option_d, option_e
+        ) VALUES (
+            'delete', old.id, old.question_text, old.option_a, old.option_b,
+            old.option_c, old.option_d, old.option_e
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_question_fts_update
+    AFTER UPDATE ON api_question BEGIN
+        INSERT INTO api_question_fts (
+            api_question_fts, rowid, question_text, option_a, option_b, option_c,
+            option_d, option_e
+        ) VALUES (
+            'delete', old.id, old.question_text, old.option_a, old.option_b,
+            old.option_c, old.option_d, old.option_e
+        );
+        INSERT INTO api_question_fts (
+            rowid, question_text, option_a, option_b, option_c, option_d, option_e
+        ) VALUES (
+            new.id, new.question_text, new.option_a, new.option_b, new.option_c,
+            new.option_d, new.option_e
+        );
+    END
+    """,
+]
+
+SQLITE_FORWARD = [
+    # api_quiz has a text primary key, so its FTS table keeps its own copy
+    """
+    CREATE VIRTUAL TABLE api_quiz_fts USING fts5(
+        quiz_id UNINDEXED, account_id UNINDEXED, title, topic
+    )
+    """,
+    # External content table: indexes api_question rows by their integer id
+    """
+    CREATE VIRTUAL TABLE api_question_fts USING fts5(
+        question_text, option_a, option_b, option_c, option_d, option_e,
+        content='api_question', content_rowid='id'
+    )
+    """,
+    *SQLITE_TRIGGERS,
+    # Backfill
+    """
+    INSERT INTO api_quiz_fts (quiz_id, account_id, title, topic)
+    SELECT id, account_id, title, topic FROM api_quiz
+    """,
+    "INSERT INTO api_question_fts (api_question_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS api_quiz_fts_insert",
+    "DROP TRIGGER IF EXISTS api_quiz_fts_update",
+    "DROP TRIGGER IF EXISTS api_quiz_fts_delete",
+    "DROP TRIGGER IF EXISTS api_question_fts_insert",
+    "DROP TRIGGER IF EXISTS api_question_fts_delete",
+    "DROP TRIGGER IF EXISTS api_question_fts_update",
+    "DROP TABLE IF EXISTS api_quiz_fts",
+    "DROP TABLE IF EXISTS api_question_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+def restore_sqlite_triggers(apps, schema_editor):
+    """
+    RunPython operation (re)creating the missing SQLite triggers; the ones
+    that exist are left alone. Does nothing on other databases.
+    """
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_quiz_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
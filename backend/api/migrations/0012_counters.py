@@ -0,0 +1,107 @@
+# Generated by Django 5.1.2 on 2026-10-19 18:45
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# Frozen with the trigger DDL it runs
+restore_sqlite_triggers = import_module(
+    "api.migrations.0011_quiz_search_index"
+).restore_sqlite_triggers
+
+
+def _count(queryset, expression=None):
+    subquery = (
+        queryset.order_by()
+        .annotate(_group=Value(1))
+        .values("_group")
+        .annotate(n=expression or Count("pk"))
+        .values("n")
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    Account = apps.get_model("api", "Account")
+    Group = apps.get_model("api", "Group")
+    Quiz = apps.get_model("api", "Quiz")
+    Question = apps.get_model("api", "Question")
+    UserResult = apps.get_model("api", "UserResult")
+
+    quiz_results = UserResult.objects.filter(quiz=OuterRef("pk"))
+    Quiz.objects.update(
+        num_questions=_count(Question.objects.filter(quiz=OuterRef("pk"))),
+        num_results=_count(quiz_results),
+        num_participants=_count(
+            quiz_results,
+            Count("user", distinct=True)
+            + Count("anonymous_id", distinct=True, filter=Q(user__isnull=True))
+            + Count("pk", filter=Q(user__isnull=True, anonymous_id__isnull=True)),
+        ),
+    )
+    Group.objects.update(
+        num_quizzes=_count(Quiz.objects.filter(group=OuterRef("pk"))),
+        num_results=_count(UserResult.objects.filter(quiz__group=OuterRef("pk"))),
+    )
+    Account.objects.update(
+        num_quizzes=_count(Quiz.objects.filter(account=OuterRef("pk"))),
+        num_results=_count(UserResult.objects.filter(quiz__account=OuterRef("pk"))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_quiz_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='num_quizzes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='num_results',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='num_quizzes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='num_results',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='num_participants',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='num_questions',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='num_results',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='userresult',
+            index=models.Index(fields=['quiz', 'user'], name='userresult_quiz_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userresult',
+            index=models.Index(fields=['quiz', 'anonymous_id'], name='userresult_quiz_anon_idx'),
+        ),
+        # SQLite rebuilt api_quiz to add the columns, dropping its triggers
+        migrations.RunPython(restore_sqlite_triggers, migrations.RunPython.noop),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.1.2 on 2026-10-19 18:49
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quizzes_created', models.PositiveIntegerField(default=0)),
+                ('ai_generations', models.PositiveIntegerField(default=0)),
+                ('ai_tokens', models.PositiveBigIntegerField(default=0)),
+                ('results', models.PositiveIntegerField(default=0)),
+                ('participants', models.PositiveIntegerField(default=0)),
+                ('score_total', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GroupDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('results', models.PositiveIntegerField(default=0)),
+                ('participants', models.PositiveIntegerField(default=0)),
+                ('score_total', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuizEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participant_email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('event_type', models.CharField(max_length=50)),
+                ('event_detail', models.TextField(blank=True, null=True)),
+                ('tokens', models.PositiveIntegerField(default=0)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('position', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['created_at'], name='api_quiz_created_58d5f7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userresult',
+            index=models.Index(fields=['completed_at'], name='api_userres_complet_e8108e_idx'),
+        ),
+        migrations.AddField(
+            model_name='accountdailyusage',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='api.account'),
+        ),
+        migrations.AddField(
+            model_name='groupdailyusage',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_daily_usage', to='api.account'),
+        ),
+        migrations.AddField(
+            model_name='groupdailyusage',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_usage', to='api.group'),
+        ),
+        migrations.AddField(
+            model_name='quizevent',
+            name='quiz',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.quiz'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountdailyusage',
+            constraint=models.UniqueConstraint(fields=('account', 'day'), name='unique_account_daily_usage'),
+        ),
+        migrations.AddIndex(
+            model_name='groupdailyusage',
+            index=models.Index(fields=['account', 'day'], name='api_groupda_account_fa4002_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizevent',
+            index=models.Index(fields=['timestamp'], name='api_quizeve_timesta_07b3e3_idx'),
+        ),
+    ]
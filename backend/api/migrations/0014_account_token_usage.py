@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-19 18:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_usage_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountTokenUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveBigIntegerField(default=0)),
+                ('completion_tokens', models.PositiveBigIntegerField(default=0)),
+                ('cost_micros', models.PositiveBigIntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='token_usage', to='api.account')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'period'), name='unique_account_token_usage')],
+            },
+        ),
+    ]
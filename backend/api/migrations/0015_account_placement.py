@@ -0,0 +1,69 @@
+# Generated by Django 5.1.2 on 2026-10-19 19:32
+
+from importlib import import_module
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen with the trigger DDL it runs
+restore_sqlite_triggers = import_module(
+    "api.migrations.0011_quiz_search_index"
+).restore_sqlite_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_account_token_usage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountPlacement',
+            fields=[
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='placement', serialize=False, to='api.account')),
+                ('database', models.CharField(max_length=100)),
+                ('state', models.CharField(choices=[('active', 'Active'), ('frozen', 'Frozen')], default='active', max_length=10)),
+                ('moving_to', models.CharField(blank=True, max_length=100, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='accountdailyusage',
+            name='account',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='api.account'),
+        ),
+        migrations.AlterField(
+            model_name='accounttokenusage',
+            name='account',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='token_usage', to='api.account'),
+        ),
+        migrations.AlterField(
+            model_name='group',
+            name='account',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='groups', to='api.account'),
+        ),
+        migrations.AlterField(
+            model_name='groupdailyusage',
+            name='account',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='group_daily_usage', to='api.account'),
+        ),
+        migrations.AlterField(
+            model_name='quiz',
+            name='account',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='quizzes', to='api.account'),
+        ),
+        migrations.AlterField(
+            model_name='userquizhistory',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='userresult',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        # SQLite rebuilt api_quiz to drop the account constraint, and its triggers
+        migrations.RunPython(restore_sqlite_triggers, migrations.RunPython.noop),
+    ]
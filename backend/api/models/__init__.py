@@ -1,6 +1,15 @@
 from .group import Group
 from .quiz import Quiz, SharedQuiz
 from .question import Question
+from .outbox import OutboxEmail
+from .placement import AccountPlacement
+from .quiz_event import QuizEvent
+from .usage import (
+    AccountDailyUsage,
+    AccountTokenUsage,
+    GroupDailyUsage,
+    RollupWatermark,
+)
 from .user import UserQuizHistory, UserResult
 
 __all__ = [
@@ -8,6 +17,13 @@ __all__ = [
     "Quiz",
     "SharedQuiz",
     "Question",
+    "OutboxEmail",
+    "AccountPlacement",
+    "QuizEvent",
+    "AccountDailyUsage",
+    "AccountTokenUsage",
+    "GroupDailyUsage",
+    "RollupWatermark",
     "UserQuizHistory",
     "UserResult",
 ]
@@ -0,0 +1,35 @@
+from django.db import models
+
+
+def counter_field():
+    """
+    A denormalized count kept current by api.services.counters with F()
+    updates, and repaired by the reconcile_counters command.
+    """
+    return models.PositiveIntegerField(default=0, editable=False)
+
+
+class CounterFieldsMixin:
+    """
+    Leaves `counter_fields` out of full saves of loaded instances, so saving
+    an instance read earlier cannot write back stale counts over increments
+    made since. Pass update_fields explicitly to save a counter.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
@@ -1,16 +1,23 @@
 from django.db import models
+from .counters import CounterFieldsMixin, counter_field
 from .user import Account
 
 
-class Group(models.Model):
+class Group(CounterFieldsMixin, models.Model):
 
     account = models.ForeignKey(
-        Account, related_name="groups", on_delete=models.CASCADE
+        Account,
+        related_name="groups",
+        on_delete=models.CASCADE,
+        db_constraint=False,  # Accounts stay on "default" (see api.sharding)
     )
     name = models.CharField(max_length=100)
     color = models.CharField(max_length=7, default="#FFFFFF")  # Optional color field
     order = models.PositiveIntegerField(default=0)  # Field for managing group order
     created_at = models.DateTimeField(auto_now_add=True)  # New created_at field
+    num_quizzes = counter_field()
+    num_results = counter_field()  # of the group's quizzes
+    counter_fields = ("num_quizzes", "num_results")
 
     def __str__(self):
         return self.name
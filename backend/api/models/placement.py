@@ -0,0 +1,27 @@
+from django.db import models
+
+from .user import Account
+
+
+class AccountPlacement(models.Model):
+    """
+    The database (shard) holding an account's data; accounts without a
+    placement live on "default". Kept on "default" and read through the
+    cache of api.sharding.directory.
+    """
+
+    ACTIVE = "active"
+    FROZEN = "frozen"  # Final pass of a move: reads only
+    STATE_CHOICES = [(ACTIVE, "Active"), (FROZEN, "Frozen")]
+
+    account = models.OneToOneField(
+        Account, primary_key=True, related_name="placement", on_delete=models.CASCADE
+    )
+    database = models.CharField(max_length=100)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=ACTIVE)
+    # Where a move in progress copies the account to
+    moving_to = models.CharField(max_length=100, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Account {self.account_id} on {self.database} ({self.state})"
@@ -1,10 +1,19 @@
 from django.db import models
+from .counters import CounterFieldsMixin, counter_field
 from .group import Group
 from .user import Account
 from ..utils import generate_prefixed_uuid
 
 
-class Quiz(models.Model):
+def generate_quiz_id():
+    return generate_prefixed_uuid("q")
+
+
+def generate_shared_quiz_id():
+    return generate_prefixed_uuid("sh")
+
+
+class Quiz(CounterFieldsMixin, models.Model):
     EVALUATION_CHOICES = [
         ("pre", "Pre-Evaluated"),
         ("hybrid", "Hybrid"),
@@ -21,16 +30,22 @@ class Quiz(models.Model):
     id = models.CharField(
         max_length=36,  #
         primary_key=True,
-        default=generate_prefixed_uuid("q"),
+        default=generate_quiz_id,  # Callable: a new id per row
         editable=False,
     )
 
     account = models.ForeignKey(
-        Account, related_name="quizzes", on_delete=models.CASCADE
+        Account,
+        related_name="quizzes",
+        on_delete=models.CASCADE,
+        db_constraint=False,  # Accounts stay on "default" (see api.sharding)
     )
 
     account = models.ForeignKey(
-        Account, related_name="quizzes", on_delete=models.CASCADE
+        Account,
+        related_name="quizzes",
+        on_delete=models.CASCADE,
+        db_constraint=False,  # Accounts stay on "default" (see api.sharding)
     )
     group = models.ForeignKey(
         Group, related_name="quizzes", on_delete=models.SET_NULL, null=True, blank=True
@@ -71,6 +86,27 @@ class Quiz(models.Model):
         default="public",
         help_text="Determines who can access the quiz.",
     )
+    # Actual number of questions (question_count is the number requested),
+    # results and distinct participants
+    num_questions = counter_field()
+    num_results = counter_field()
+    num_participants = counter_field()
+    counter_fields = ("num_questions", "num_results", "num_participants")
+    # Idempotency-Key header of the request that created the quiz; a retry
+    # with the same key returns this quiz instead of generating a new one
+    idempotency_key = models.CharField(
+        max_length=255, null=True, blank=True, editable=False
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "idempotency_key"],
+                condition=models.Q(idempotency_key__isnull=False),
+                name="unique_quiz_idempotency_key_per_account",
+            )
+        ]
+        indexes = [models.Index(fields=["created_at"])]  # usage rollups
 
     def __str__(self):
         return self.title
@@ -80,7 +116,7 @@ class SharedQuiz(models.Model):
     id = models.CharField(
         max_length=36,  #
         primary_key=True,
-        default=generate_prefixed_uuid("sh"),
+        default=generate_shared_quiz_id,
         editable=False,
     )
     quiz = models.ForeignKey(
@@ -5,12 +5,19 @@ from .quiz import Quiz
 
 
 class QuizEvent(models.Model):
+    AI_GENERATION = "ai_generation"  # event_detail: model and token usage (JSON)
+
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
     # Possibly store participant_email or an ephemeral ID
     participant_email = models.EmailField(null=True, blank=True)
     event_type = models.CharField(max_length=50)
     event_detail = models.TextField(null=True, blank=True)
+    # AI tokens spent, for ai_generation events
+    tokens = models.PositiveIntegerField(default=0)
     timestamp = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [models.Index(fields=["timestamp"])]
+
     def __str__(self):
         return f"Event {self.event_type} at {self.timestamp} for quiz {self.quiz_id}"
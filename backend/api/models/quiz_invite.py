@@ -12,5 +12,12 @@ class InvitedUser(models.Model):
     invited_at = models.DateTimeField(auto_now_add=True)
     has_responded = models.BooleanField(default=False)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["quiz", "email"], name="unique_invited_user_per_quiz"
+            )
+        ]
+
     def __str__(self):
         return f"Invite to {self.quiz.title} for {self.email}"
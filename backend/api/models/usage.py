@@ -0,0 +1,107 @@
+from django.db import models
+from .group import Group
+from .user import Account
+
+
+class AccountDailyUsage(models.Model):
+    """
+    One account's activity on one day (UTC), aggregated from Quiz,
+    QuizEvent and UserResult by `manage.py rollup_usage`. Every figure is
+    additive, so any period is the sum of its days.
+    """
+
+    account = models.ForeignKey(
+        Account,
+        related_name="daily_usage",
+        on_delete=models.CASCADE,
+        db_constraint=False,  # Accounts stay on "default" (see api.sharding)
+    )
+    day = models.DateField()
+    quizzes_created = models.PositiveIntegerField(default=0)
+    ai_generations = models.PositiveIntegerField(default=0)
+    ai_tokens = models.PositiveBigIntegerField(default=0)
+    results = models.PositiveIntegerField(default=0)
+    # Results that were a participant's first on their quiz
+    participants = models.PositiveIntegerField(default=0)
+    score_total = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "day"], name="unique_account_daily_usage"
+            )
+        ]
+
+
+class GroupDailyUsage(models.Model):
+    """
+    Results of one group's quizzes on one day; group is None for quizzes
+    outside any group (or in a group deleted since).
+    """
+
+    account = models.ForeignKey(
+        Account,
+        related_name="group_daily_usage",
+        on_delete=models.CASCADE,
+        db_constraint=False,  # Accounts stay on "default" (see api.sharding)
+    )
+    group = models.ForeignKey(
+        Group,
+        related_name="daily_usage",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    day = models.DateField()
+    results = models.PositiveIntegerField(default=0)
+    participants = models.PositiveIntegerField(default=0)
+    score_total = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=["account", "day"])]
+
+
+class RollupWatermark(models.Model):
+    """
+    How far an incremental aggregation job has processed its sources: rows
+    timestamped before `position` are included in its rollups.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} up to {self.position}"
+
+
+class AccountTokenUsage(models.Model):
+    """
+    AI tokens an account spent in one calendar month (UTC; `period` is its
+    first day), written behind by api.services.token_usage and checked
+    against the account's plan quota.
+    """
+
+    account = models.ForeignKey(
+        Account,
+        related_name="token_usage",
+        on_delete=models.CASCADE,
+        db_constraint=False,  # Accounts stay on "default" (see api.sharding)
+    )
+    period = models.DateField()
+    calls = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    # Estimated from AI_TOKEN_QUOTAS["PRICES"], in millionths of a dollar
+    cost_micros = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "period"], name="unique_account_token_usage"
+            )
+        ]
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from ..utils import generate_prefixed_uuid
+from .counters import CounterFieldsMixin, counter_field
 
 # from .quiz import Quiz
 from django.conf import settings
@@ -9,7 +10,11 @@ from django.utils.crypto import get_random_string
 
 
 class UserQuizHistory(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_constraint=False,  # Users stay on "default" (see api.sharding)
+    )
     quiz = models.ForeignKey("Quiz", on_delete=models.CASCADE)  # Use string reference
     score = models.IntegerField()
     xp_earned = models.IntegerField()
@@ -22,19 +27,33 @@ class UserQuizHistory(models.Model):
 class UserResult(models.Model):
     quiz = models.ForeignKey("Quiz", on_delete=models.CASCADE, related_name="results")
     user = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,  # Users stay on "default" (see api.sharding)
     )
     nickname = models.CharField(max_length=255, null=True, blank=True)
     score = models.IntegerField()
     completed_at = models.DateTimeField(auto_now_add=True)
     anonymous_id = models.CharField(max_length=255, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Whether a participant already has a result for the quiz
+            models.Index(fields=["quiz", "user"], name="userresult_quiz_user_idx"),
+            models.Index(
+                fields=["quiz", "anonymous_id"], name="userresult_quiz_anon_idx"
+            ),
+            models.Index(fields=["completed_at"]),  # usage rollups
+        ]
+
     def __str__(self):
         user_name = self.user.username if self.user else self.nickname or "Anonymous"
         return f"Result for {user_name} in quiz {self.quiz.title}"
 
 
-class Account(models.Model):
+class Account(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     subscription_plan = models.CharField(max_length=100, default="Free Plan")
@@ -50,11 +69,26 @@ class Account(models.Model):
     members = models.ManyToManyField(
         settings.AUTH_USER_MODEL, through="AccountMembership", related_name="accounts"
     )
+    num_quizzes = counter_field()
+    num_results = counter_field()  # of the account's quizzes
+    counter_fields = ("num_quizzes", "num_results")
 
     def transfer_ownership(self, new_owner):
+        previous_owner_id = self.owner_id
         self.owner = new_owner
         self.save()
 
+        # Keep membership roles in sync: permissions are checked against
+        # AccountMembership.role rather than Account.owner
+        AccountMembership.objects.filter(account=self, user_id=previous_owner_id).update(
+            role="admin", version=models.F("version") + 1
+        )
+        updated = AccountMembership.objects.filter(account=self, user=new_owner).update(
+            role="owner", version=models.F("version") + 1
+        )
+        if not updated:
+            AccountMembership.objects.create(account=self, user=new_owner, role="owner")
+
 
 class AccountMembership(models.Model):
     account = models.ForeignKey(Account, on_delete=models.CASCADE)
@@ -67,6 +101,8 @@ class AccountMembership(models.Model):
     invited_at = models.DateTimeField(auto_now_add=True)
     joined_at = models.DateTimeField(null=True, blank=True)
     last_connected = models.DateTimeField(null=True, blank=True)
+    # Bumped on every role change; JWTs embed it so stale tokens are rejected
+    version = models.PositiveIntegerField(default=1)
 
 
 class UserManager(BaseUserManager):
@@ -91,11 +127,15 @@ class UserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
+def generate_user_id():
+    return generate_prefixed_uuid("u")
+
+
 class User(AbstractUser):
     id = models.CharField(
         max_length=36,  #
         primary_key=True,
-        default=generate_prefixed_uuid("u"),
+        default=generate_user_id,  # Callable: a new id per row
         editable=False,
     )
     email = models.EmailField(unique=True)  # Email serves as the unique identifier
@@ -2,9 +2,10 @@ from rest_framework import serializers
 
 from ..serializers.user_serializer import UserSerializer
 from ..models.user import Account, AccountMembership, User
+from .timing import TimedSerializerMixin
 
 
-class AccountSerializer(serializers.ModelSerializer):
+class AccountSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     owner_email = serializers.EmailField(source="owner.email", read_only=True)
 
     class Meta:
@@ -12,10 +13,17 @@ class AccountSerializer(serializers.ModelSerializer):
         # Note that ID is different from user_id thats why we pass it as another field
         # This allows control from the request on the endpoint to select the correct user_id
         # connected to an account
-        fields = ["id", "name", "owner_email", "created_at"]
+        fields = [
+            "id",
+            "name",
+            "owner_email",
+            "created_at",
+            "num_quizzes",
+            "num_results",
+        ]
 
 
-class AccountMembershipSerializer(serializers.ModelSerializer):
+class AccountMembershipSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     account = serializers.PrimaryKeyRelatedField(read_only=True)
     user = UserSerializer(read_only=True)
     user_email = serializers.EmailField(source="user.email")
@@ -1,11 +1,22 @@
 from rest_framework import serializers
 from ..models.group import Group
 from .quiz_serializer import QuizSerializer
+from .timing import TimedSerializerMixin
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     quizzes = QuizSerializer(many=True, read_only=True)
 
     class Meta:
         model = Group
-        fields = ["id", "name", "account", "color", "order", "created_at", "quizzes"]
+        fields = [
+            "id",
+            "name",
+            "account",
+            "color",
+            "order",
+            "created_at",
+            "num_quizzes",
+            "num_results",
+            "quizzes",
+        ]
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from ..models.question import Question
+from .timing import TimedSerializerMixin
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = "__all__"
@@ -4,9 +4,10 @@ from ..models.quiz_invite import InvitedUser
 
 # from ..models.question import Question
 from .question_serializer import QuestionSerializer
+from .timing import TimedSerializerMixin
 
 
-class QuizSerializer(serializers.ModelSerializer):
+class QuizSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
 
     evaluation_type = serializers.CharField()
@@ -25,6 +26,9 @@ class QuizSerializer(serializers.ModelSerializer):
             "topic",
             "difficulty",
             "question_count",
+            "num_questions",
+            "num_results",
+            "num_participants",
             "display_results",
             "require_password",
             "password",
@@ -60,13 +64,13 @@ class QuizSerializer(serializers.ModelSerializer):
         return data
 
 
-class SharedQuizSerializer(serializers.ModelSerializer):
+class SharedQuizSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = SharedQuiz
         fields = ["id", "quiz", "share_link", "requires_authentication", "shared_at"]
 
 
-class InvitedUserSerializer(serializers.ModelSerializer):
+class InvitedUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = InvitedUser
         fields = ["id", "quiz", "email", "invited_at", "has_responded"]
@@ -0,0 +1,23 @@
+import time
+
+from ..middleware.server_timing import current_timings
+
+
+class TimedSerializerMixin:
+    """
+    Counts to_representation() towards the request's serialize time
+    (Server-Timing). Nested timed serializers are counted once, by the
+    outermost; they run once per item, so they take the cheapest path.
+    """
+
+    def to_representation(self, instance):
+        timings = current_timings()
+        if timings is None or timings.serializing:
+            return super().to_representation(instance)
+        timings.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serializing = False
+            timings.add("serialize", time.perf_counter() - started)
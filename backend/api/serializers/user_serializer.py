@@ -1,9 +1,23 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..authentication import (
+    ACCOUNT_ID_CLAIM,
+    MembershipRefreshToken,
+    apply_membership_claims,
+    default_membership,
+)
 from ..models.user import UserQuizHistory, UserResult, Account, AccountMembership
+from ..services.activity_tracker import activity_tracker
+from .timing import TimedSerializerMixin
 
 User = get_user_model()
 
@@ -25,6 +39,12 @@ class RegisterSerializer(serializers.ModelSerializer):
         ]
 
     def get_account_id(self, user):
+        # Reuse the account resolved by ActiveAccountMiddleware when available
+        request = self.context.get("request")
+        if request is not None and request.user == user:
+            account = getattr(request, "account", None)
+            if account:
+                return account.id
         owner_account = Account.objects.filter(owner=user).first()
         if owner_account:
             return owner_account.id
@@ -68,21 +88,54 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
+def _record_activity(access):
+    """
+    Buffers last-seen timestamps for the token's user and account; the
+    activity tracker writes them later in batches.
+    """
+    token = AccessToken(access, verify=False)
+    activity_tracker.touch(
+        token[api_settings.USER_ID_CLAIM], account_id=token.get(ACCOUNT_ID_CLAIM)
+    )
+
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = MembershipRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        _record_activity(data["access"])
+        return data
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
         token["email"] = user.email
+        # Account id, role and membership version let read-only endpoints
+        # authorize from the token alone (see ClaimsJWTAuthentication)
+        membership = default_membership(user.pk)
+        apply_membership_claims(token, membership)
+        token.membership = membership
         return token
 
 
-class UserQuizHistorySerializer(serializers.ModelSerializer):
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    # Re-reads the membership so refreshed tokens carry the current role
+    token_class = MembershipRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        _record_activity(data["access"])
+        return data
+
+
+class UserQuizHistorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = UserQuizHistory
         fields = ["id", "user", "quiz", "score", "xp_earned", "timestamp"]
 
 
-class UserResultSerializer(serializers.ModelSerializer):
+class UserResultSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = UserResult
         fields = [
@@ -96,7 +149,7 @@ class UserResultSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
 
     class Meta:
@@ -0,0 +1,333 @@
+# backend/api/services/account_moves.py
+
+"""
+Online moves of an account's data between shards (see api.sharding).
+
+AccountMove.run() copies the account's rows to the target shard while the
+account keeps being served from the source, then freezes it (its writes
+get 503s from then on), copies what changed meanwhile, verifies that both
+copies match, switches its placement to the target and finally deletes
+the source rows. The account is only unavailable for writes during the
+second, short, pass; reads never stop.
+
+Rows are compared and copied in chunks: ranges of CHUNK_SIZE primary keys
+of the source, each in its own short transaction on the target. A chunk is
+only rewritten when its rows differ (stale rows first, children before
+parents, through the ORM so target-side cascades apply; then changed rows,
+parents before children, with one DELETE and one INSERT so that timestamps
+and other pre_save values are kept). A chunk whose new rows reference a
+parent copied after its pass fails its foreign keys and is left for the
+next pass. Verification compares a digest of every chunk on both sides.
+
+A failed verification unfreezes the account on the source and removes the
+partial copy. Deleting an account or user is not propagated to the shards
+their rows were moved to; reconcile_counters only repairs counters.
+"""
+
+import hashlib
+import logging
+import time
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+
+from .. import sharding
+from ..models.group import Group
+from ..models.placement import AccountPlacement
+from ..models.question import Question
+from ..models.quiz import Quiz, SharedQuiz
+from ..models.quiz_event import QuizEvent
+from ..models.quiz_invite import InvitedUser
+from ..models.usage import (
+    AccountDailyUsage,
+    AccountTokenUsage,
+    GroupDailyUsage,
+    RollupWatermark,
+)
+from ..models.user import Account, UserQuizHistory, UserResult
+from .usage_rollups import WATERMARK
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+
+# Every model of sharding.TENANT_MODELS, parents first, with the path from
+# it to its account
+MOVED_MODELS = [
+    (Group, "account_id"),
+    (Quiz, "account_id"),
+    (SharedQuiz, "quiz__account_id"),
+    (Question, "quiz__account_id"),
+    (InvitedUser, "quiz__account_id"),
+    (QuizEvent, "quiz__account_id"),
+    (UserResult, "quiz__account_id"),
+    (UserQuizHistory, "quiz__account_id"),
+    (AccountDailyUsage, "account_id"),
+    (GroupDailyUsage, "account_id"),
+    (AccountTokenUsage, "account_id"),
+]
+
+
+class MoveError(Exception):
+    pass
+
+
+def _fields(model):
+    """Concrete fields, primary key first (rows are keyed on it)."""
+    pk = model._meta.pk
+    return [pk] + [f for f in model._meta.concrete_fields if f is not pk]
+
+
+def _ranges(queryset, chunk_size):
+    """
+    (after, upto) primary key ranges of `chunk_size` rows of `queryset`;
+    the first and last are open-ended, so together they cover every key.
+    """
+    after = None
+    while True:
+        page = queryset if after is None else queryset.filter(pk__gt=after)
+        keys = list(page.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+        if len(keys) < chunk_size:
+            yield after, None
+            return
+        yield after, keys[-1]
+        after = keys[-1]
+
+
+def _rows(queryset, fields, after, upto):
+    """{pk: row} of `queryset` in the (after, upto] range."""
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    if upto is not None:
+        queryset = queryset.filter(pk__lte=upto)
+    return {
+        row[0]: row for row in queryset.values_list(*(f.attname for f in fields))
+    }
+
+
+def _digest(rows):
+    content = repr([rows[pk] for pk in sorted(rows)])
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _rewrite(alias, model, fields, rows):
+    """Replaces `rows` (by primary key) in `model`'s table on `alias`."""
+    connection = connections[alias]
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    pk = fields[0]
+    keys = [pk.get_db_prep_value(row[0], connection) for row in rows]
+    values = [
+        tuple(f.get_db_prep_save(value, connection) for f, value in zip(fields, row))
+        for row in rows
+    ]
+    columns = ", ".join(qn(f.column) for f in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE {qn(pk.column)} IN "
+            f"({', '.join(['%s'] * len(keys))})",
+            keys,
+        )
+        cursor.executemany(
+            f"INSERT INTO {table} ({columns}) "
+            f"VALUES ({', '.join(['%s'] * len(fields))})",
+            values,
+        )
+
+
+class AccountMove:
+    """
+    Moves `account_id`'s rows to shard `target`. `wait` (seconds, default
+    TENANT_SHARDS["CACHE_SECONDS"]) is how long every process may keep
+    serving a placement it cached; `progress` receives one line per step.
+    """
+
+    def __init__(
+        self, account_id, target, chunk_size=CHUNK_SIZE, wait=None, progress=None
+    ):
+        self.account_id = account_id
+        self.target = target
+        self.chunk_size = chunk_size
+        self.wait = sharding._config("CACHE_SECONDS", 30) if wait is None else wait
+        self.progress = progress or logger.info
+        self.source = None
+
+    def run(self, keep_source=False):
+        """Moves the account; returns {"copied", "deleted", "purged"} row counts."""
+        self._validate()
+        self._align_watermarks()
+        report = {"copied": 0, "deleted": 0, "purged": 0}
+        with sharding.preserve_id_range(self.target):
+            self._step("copying", report, self._sync(strict=False))
+
+            self._set_placement(
+                self.source, AccountPlacement.FROZEN, moving_to=self.target
+            )
+            self._wait("frozen")
+            try:
+                self._step("copying changes", report, self._sync(strict=True))
+                mismatched = self._verify()
+            except Exception:
+                self._abort()
+                raise
+            if mismatched:
+                self._abort()
+                chunks = ", ".join(
+                    f"{name} ({after}, {upto}]" for name, after, upto in mismatched
+                )
+                raise MoveError(f"Copies differ after the final pass: {chunks}.")
+        self._set_placement(self.target, AccountPlacement.ACTIVE)
+        self.progress(f"account {self.account_id} is now on {self.target}")
+
+        if not keep_source:
+            self._wait("moved")
+            report["purged"] = self._purge(self.source)
+            self.progress(f"deleted {report['purged']} rows from {self.source}")
+        return report
+
+    def _validate(self):
+        if self.target not in sharding.shards():
+            raise MoveError(
+                f"{self.target!r} is not a shard: {', '.join(sharding.shards())}."
+            )
+        if not Account.objects.using(DEFAULT_DB_ALIAS).filter(
+            pk=self.account_id
+        ).exists():
+            raise MoveError(f"Account {self.account_id} does not exist.")
+        placement = (
+            AccountPlacement.objects.using(DEFAULT_DB_ALIAS)
+            .filter(account_id=self.account_id)
+            .first()
+        )
+        if placement is not None and placement.state != AccountPlacement.ACTIVE:
+            raise MoveError(
+                f"Account {self.account_id} is already being moved to "
+                f"{placement.moving_to}."
+            )
+        self.source = placement.database if placement else DEFAULT_DB_ALIAS
+        if self.source == self.target:
+            raise MoveError(f"Account {self.account_id} is on {self.target} already.")
+
+    def _align_watermarks(self):
+        """
+        Rolled up rows move with the account: a target that never rolled up
+        starts from the source's watermark, rather than rolling the moved
+        history up again. Otherwise, the account's rows between the two
+        watermarks are counted twice or never (usually a few minutes).
+        """
+        source, target = (
+            RollupWatermark.objects.using(alias)
+            .filter(name=WATERMARK)
+            .values_list("position", flat=True)
+            .first()
+            for alias in (self.source, self.target)
+        )
+        if target is None and source is not None:
+            RollupWatermark.objects.using(self.target).update_or_create(
+                name=WATERMARK, defaults={"position": source}
+            )
+        elif source != target:
+            self.progress(
+                f"warning: daily usage is rolled up until {source} on "
+                f"{self.source} but {target} on {self.target}"
+            )
+
+    def _step(self, name, report, counts):
+        copied, deleted, deferred = counts
+        report["copied"] += copied
+        report["deleted"] += deleted
+        self.progress(
+            f"{name}: {copied} rows copied, {deleted} deleted, "
+            f"{deferred} chunks left for the next pass"
+        )
+
+    def _wait(self, state):
+        self.progress(f"{state}; waiting {self.wait}s for cached placements")
+        time.sleep(self.wait)
+
+    def _set_placement(self, database, state, moving_to=None):
+        AccountPlacement.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+            account_id=self.account_id,
+            defaults={"database": database, "state": state, "moving_to": moving_to},
+        )
+        sharding.directory.forget(self.account_id)
+
+    def _abort(self):
+        self._set_placement(self.source, AccountPlacement.ACTIVE)
+        self._purge(self.target)
+        self.progress(f"move aborted; account {self.account_id} stays on {self.source}")
+
+    def _scope(self, model, account_field, alias):
+        return model.objects.using(alias).filter(**{account_field: self.account_id})
+
+    def _sync(self, strict):
+        """
+        Makes the target's rows equal the source's, as of when each chunk is
+        read. Returns (rows copied, rows deleted, chunks deferred).
+        """
+        copied = deleted = deferred = 0
+        # Stale rows first, children before parents
+        for model, account_field in reversed(MOVED_MODELS):
+            source = self._scope(model, account_field, self.source)
+            target = self._scope(model, account_field, self.target)
+            for after, upto in _ranges(target, self.chunk_size):
+                ours = _rows(target, [model._meta.pk], after, upto)
+                if not ours:
+                    continue
+                kept = set(source.filter(pk__in=ours).values_list("pk", flat=True))
+                stale = [pk for pk in ours if pk not in kept]
+                if stale:
+                    with transaction.atomic(using=self.target):
+                        model.objects.using(self.target).filter(pk__in=stale).delete()
+                    deleted += len(stale)
+
+        for model, account_field in MOVED_MODELS:
+            fields = _fields(model)
+            source = self._scope(model, account_field, self.source)
+            target = self._scope(model, account_field, self.target)
+            for after, upto in _ranges(source, self.chunk_size):
+                theirs = _rows(source, fields, after, upto)
+                ours = _rows(target, fields, after, upto)
+                changed = [row for pk, row in theirs.items() if ours.get(pk) != row]
+                if not changed:
+                    continue
+                try:
+                    with transaction.atomic(using=self.target):
+                        _rewrite(self.target, model, fields, changed)
+                except IntegrityError:
+                    if strict:
+                        raise
+                    deferred += 1
+                    continue
+                copied += len(changed)
+        return copied, deleted, deferred
+
+    def _verify(self):
+        """[(model name, after, upto)] of the chunks whose digests differ."""
+        mismatched = []
+        for model, account_field in MOVED_MODELS:
+            fields = _fields(model)
+            source = self._scope(model, account_field, self.source)
+            target = self._scope(model, account_field, self.target)
+            for after, upto in _ranges(source, self.chunk_size):
+                theirs = _digest(_rows(source, fields, after, upto))
+                ours = _digest(_rows(target, fields, after, upto))
+                if theirs != ours:
+                    mismatched.append((model.__name__, after, upto))
+        self.progress(f"verified: {len(mismatched)} chunks differ")
+        return mismatched
+
+    def _purge(self, alias):
+        """Deletes the account's rows from `alias`, children first."""
+        purged = 0
+        for model, account_field in reversed(MOVED_MODELS):
+            rows = self._scope(model, account_field, alias)
+            while True:
+                keys = list(
+                    rows.order_by("pk").values_list("pk", flat=True)[: self.chunk_size]
+                )
+                if not keys:
+                    break
+                with transaction.atomic(using=alias):
+                    model.objects.using(alias).filter(pk__in=keys).delete()
+                purged += len(keys)
+        return purged
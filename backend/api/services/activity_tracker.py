@@ -0,0 +1,142 @@
+# backend/api/services/activity_tracker.py
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from ..models.user import AccountMembership, User
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTracker:
+    """
+    Write-behind buffer for `last_connected` timestamps.
+
+    `touch()` only records the latest timestamp per user and per
+    (account, user) membership in memory. A daemon thread flushes the
+    buffer every FLUSH_INTERVAL seconds (or as soon as MAX_PENDING entries
+    are waiting), writing each table with a single coalesced bulk_update,
+    so logins and token refreshes never rewrite rows synchronously.
+    """
+
+    def __init__(self, flush_interval=None, max_pending=None, batch_size=500):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._users = {}  # user_id -> datetime
+        self._memberships = {}  # (account_id, user_id) -> datetime
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def touch(self, user_id, account_id=None, at=None):
+        """
+        Records that `user_id` (and its membership in `account_id`) was seen.
+        """
+        at = at or now()
+        with self._lock:
+            self._users[user_id] = at
+            if account_id is not None:
+                self._memberships[(account_id, user_id)] = at
+            pending = len(self._users) + len(self._memberships)
+
+        self._ensure_worker()
+        if pending >= self._max_pending():
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Writes everything buffered so far. Safe to call from any thread.
+        """
+        with self._lock:
+            users, self._users = self._users, {}
+            memberships, self._memberships = self._memberships, {}
+        if not users and not memberships:
+            return
+
+        try:
+            with transaction.atomic():
+                self._write_users(users)
+                self._write_memberships(memberships)
+        except Exception:
+            logger.exception("Failed to flush activity timestamps; will retry.")
+            self._requeue(users, memberships)
+
+    def _write_users(self, users):
+        if not users:
+            return
+        User.objects.bulk_update(
+            [User(id=user_id, last_connected=at) for user_id, at in users.items()],
+            ["last_connected"],
+            batch_size=self.batch_size,
+        )
+
+    def _write_memberships(self, memberships):
+        if not memberships:
+            return
+        pairs = list(memberships)
+        for start in range(0, len(pairs), self.batch_size):
+            chunk = pairs[start : start + self.batch_size]
+            condition = Q()
+            for account_id, user_id in chunk:
+                condition |= Q(account_id=account_id, user_id=user_id)
+
+            rows = AccountMembership.objects.filter(condition).only(
+                "id", "account_id", "user_id"
+            )
+            for membership in rows:
+                membership.last_connected = memberships[
+                    (membership.account_id, membership.user_id)
+                ]
+            AccountMembership.objects.bulk_update(
+                rows, ["last_connected"], batch_size=self.batch_size
+            )
+
+    def _requeue(self, users, memberships):
+        # Keep whichever timestamp is newer if the key was touched meanwhile
+        with self._lock:
+            for key, at in users.items():
+                if self._users.get(key, at) <= at:
+                    self._users[key] = at
+            for key, at in memberships.items():
+                if self._memberships.get(key, at) <= at:
+                    self._memberships[key] = at
+
+    def _flush_interval(self):
+        if self.flush_interval is None:
+            return getattr(settings, "ACTIVITY_FLUSH_INTERVAL", 30)
+        return self.flush_interval
+
+    def _max_pending(self):
+        if self.max_pending is None:
+            return getattr(settings, "ACTIVITY_MAX_PENDING", 1000)
+        return self.max_pending
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="activity-tracker", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self._flush_interval())
+            self._wakeup.clear()
+            self.flush()
+            # This thread owns its own DB connection; don't let it go stale
+            close_old_connections()
+
+
+activity_tracker = ActivityTracker()
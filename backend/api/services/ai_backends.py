@@ -0,0 +1,502 @@
+# backend/api/services/ai_backends.py
+
+"""
+Pluggable AI completion backends, configured like Django's CACHES:
+
+    AI_BACKENDS = {
+        "default": {
+            "BACKEND": "api.services.ai_backends.OpenAIBackend",
+            "OPTIONS": {"MODEL": "gpt-3.5-turbo"},
+        },
+    }
+
+Backends are built on first use (never at import) and cached per alias.
+The OpenAI backend shares one pooled, keep-alive HTTP client per process
+(sized by AI_HTTP_POOL). Every backend records call latency and errors,
+see ai_backend_metrics(). Completions are strings that also carry their
+token usage (Completion).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from pathlib import Path
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from ..middleware.server_timing import timed
+from .metrics import ai_request_duration, ai_requests, ai_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AI_BACKEND_ALIAS = "default"
+
+
+class AIBackendError(Exception):
+    """
+    Raised when a backend cannot produce a completion (network, rate limit,
+    provider error, missing replay recording, ...).
+    """
+
+    pass
+
+
+class Completion(str):
+    """
+    The text of a completion, with the tokens it used. Backends that cannot
+    report usage get an estimate (see estimate_tokens).
+    """
+
+    def __new__(cls, text, prompt_tokens=0, completion_tokens=0, model=None):
+        completion = super().__new__(cls, text)
+        completion.prompt_tokens = prompt_tokens
+        completion.completion_tokens = completion_tokens
+        completion.model = model
+        return completion
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def usage(self):
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+def estimate_tokens(text):
+    """Rough token count of English text (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _prompt_text(messages):
+    return "\n".join(message.get("content", "") for message in messages)
+
+
+class BackendMetrics:
+    """
+    Thread-safe call, error and latency statistics for one backend.
+    Percentiles are computed over the most recent `window` calls.
+    """
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += error
+            self.total_seconds += seconds
+            self._latencies.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            calls, errors, total = self.calls, self.errors, self.total_seconds
+
+        def percentile(p):
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(len(latencies) * p))
+            return round(latencies[index] * 1000, 2)
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "error_rate": round(errors / calls, 4) if calls else 0.0,
+            "mean_ms": round(total / calls * 1000, 2) if calls else None,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+        }
+
+
+class BaseAIBackend:
+    """
+    A chat completion provider. Subclasses implement _complete (and
+    _acomplete when they have a native async path); callers use complete /
+    acomplete, which time the call and normalize failures to AIBackendError.
+    """
+
+    def __init__(self, alias, options):
+        self.alias = alias
+        self.options = options
+        self.model = options.get("MODEL", "gpt-3.5-turbo")
+        self.metrics = BackendMetrics()
+
+    def complete(self, messages, **params):
+        """
+        Returns the Completion for `messages` (OpenAI chat format).
+        """
+        started = time.perf_counter()
+        try:
+            with timed("ai"):
+                text = self._complete(messages, **params)
+        except Exception as exc:
+            self._record(time.perf_counter() - started)
+            if isinstance(exc, AIBackendError):
+                raise
+            raise AIBackendError(str(exc)) from exc
+        completion = self._completion(messages, text)
+        self._record(time.perf_counter() - started, completion)
+        return completion
+
+    async def acomplete(self, messages, **params):
+        started = time.perf_counter()
+        try:
+            with timed("ai"):
+                text = await self._acomplete(messages, **params)
+        except Exception as exc:
+            self._record(time.perf_counter() - started)
+            if isinstance(exc, AIBackendError):
+                raise
+            raise AIBackendError(str(exc)) from exc
+        completion = self._completion(messages, text)
+        self._record(time.perf_counter() - started, completion)
+        return completion
+
+    def _record(self, seconds, completion=None):
+        """Records a call in self.metrics and the process metrics (failed: None)."""
+        self.metrics.record(seconds, error=completion is None)
+        outcome = "error" if completion is None else "ok"
+        ai_requests.inc(backend=self.alias, outcome=outcome)
+        ai_request_duration.observe(seconds, backend=self.alias)
+        if completion is not None:
+            ai_tokens.inc(completion.prompt_tokens, backend=self.alias, kind="prompt")
+            ai_tokens.inc(
+                completion.completion_tokens, backend=self.alias, kind="completion"
+            )
+
+    def _completion(self, messages, text):
+        if isinstance(text, Completion):
+            return text
+        return Completion(
+            text,
+            prompt_tokens=estimate_tokens(_prompt_text(messages)),
+            completion_tokens=estimate_tokens(text),
+            model=self.model,
+        )
+
+    def _complete(self, messages, **params):
+        raise NotImplementedError
+
+    async def _acomplete(self, messages, **params):
+        return await sync_to_async(self._complete, thread_sensitive=False)(
+            messages, **params
+        )
+
+    def close(self):
+        pass
+
+
+# Shared HTTP connection pool -------------------------------------------------
+
+_http_client = None
+_http_client_lock = threading.Lock()
+# httpx async clients are bound to the event loop they were first used on
+_async_http_clients = weakref.WeakKeyDictionary()
+
+
+def _pool_options():
+    pool = getattr(settings, "AI_HTTP_POOL", {})
+    limits = httpx.Limits(
+        max_connections=pool.get("MAX_CONNECTIONS", 100),
+        max_keepalive_connections=pool.get("MAX_KEEPALIVE_CONNECTIONS", 20),
+        keepalive_expiry=pool.get("KEEPALIVE_EXPIRY", 30.0),
+    )
+    timeout = httpx.Timeout(
+        pool.get("TIMEOUT", 60.0), connect=pool.get("CONNECT_TIMEOUT", 5.0)
+    )
+    return {"limits": limits, "timeout": timeout}
+
+
+def shared_http_client():
+    """
+    The process-wide keep-alive HTTP client used by HTTP-based backends.
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                from openai import DefaultHttpxClient
+
+                _http_client = DefaultHttpxClient(**_pool_options())
+    return _http_client
+
+
+def shared_async_http_client():
+    """
+    The keep-alive async HTTP client for the running event loop.
+    """
+    from openai import DefaultAsyncHttpxClient
+
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        client = DefaultAsyncHttpxClient(**_pool_options())
+        _async_http_clients[loop] = client
+    return client
+
+
+# Backends --------------------------------------------------------------------
+
+
+class OpenAIBackend(BaseAIBackend):
+    """
+    OpenAI chat completions. OPTIONS: MODEL, API_KEY (defaults to the
+    OPENAI_API_KEY environment variable), MAX_RETRIES.
+    """
+
+    def __init__(self, alias, options):
+        super().__init__(alias, options)
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _client_options(self):
+        return {
+            "api_key": self.options.get("API_KEY") or os.getenv("OPENAI_API_KEY"),
+            "max_retries": self.options.get("MAX_RETRIES", 2),
+        }
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(
+                http_client=shared_http_client(), **self._client_options()
+            )
+        return self._client
+
+    @property
+    def async_client(self):
+        from openai import AsyncOpenAI
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = AsyncOpenAI(
+                http_client=shared_async_http_client(), **self._client_options()
+            )
+        return client
+
+    def _completion_of(self, response):
+        text = response.choices[0].message.content.strip()
+        if response.usage is None:
+            return text  # Estimated by complete()
+        return Completion(
+            text,
+            prompt_tokens=response.usage.prompt_tokens,
+            completion_tokens=response.usage.completion_tokens,
+            model=response.model or self.model,
+        )
+
+    def _complete(self, messages, **params):
+        response = self.client.chat.completions.create(
+            model=self.model, messages=messages, **params
+        )
+        return self._completion_of(response)
+
+    async def _acomplete(self, messages, **params):
+        response = await self.async_client.chat.completions.create(
+            model=self.model, messages=messages, **params
+        )
+        return self._completion_of(response)
+
+
+class FakeBackend(BaseAIBackend):
+    """
+    Deterministic local stand-in for development and load tests: answers
+    question prompts with questions derived from a hash of the prompt, after
+    an optional fixed LATENCY (seconds). No network access.
+    """
+
+    COUNT_RE = re.compile(r"generate (\d+)\b", re.IGNORECASE)
+    OPTIONS_RE = re.compile(r"with (\d+) options", re.IGNORECASE)
+    TOPIC_RE = re.compile(r"about '([^']*)'")
+
+    def __init__(self, alias, options):
+        super().__init__(alias, options)
+        self.latency = options.get("LATENCY", 0.0)
+
+    def _respond(self, messages):
+        prompt = _prompt_text(messages)
+        count = self.COUNT_RE.search(prompt)
+        option_count = self.OPTIONS_RE.search(prompt)
+        topic = self.TOPIC_RE.search(prompt)
+        count = int(count.group(1)) if count else 5
+        option_count = min(int(option_count.group(1)) if option_count else 4, 5)
+        topic = topic.group(1) if topic else "general knowledge"
+
+        rng = random.Random(hashlib.sha256(prompt.encode()).hexdigest())
+        questions = []
+        for n in range(1, count + 1):
+            letters = [chr(65 + i) for i in range(option_count)]
+            questions.append(
+                {
+                    "question": f"Question {n} about {topic}?",
+                    "options": {
+                        letter: f"{topic} answer {letter}{rng.randint(1, 99)}"
+                        for letter in letters
+                    },
+                    "correct_answer": rng.choice(letters),
+                }
+            )
+        return json.dumps({"questions": questions})
+
+    def _complete(self, messages, **params):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _acomplete(self, messages, **params):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+
+class RecordReplayBackend(BaseAIBackend):
+    """
+    Records completions of another backend to disk and replays them.
+    OPTIONS: PATH (directory of recordings), MODE ("replay", "record" or
+    "auto": replay when recorded, else record) and TARGET (alias of the
+    backend to record from). Requests are keyed by a hash of the model,
+    messages and parameters.
+    """
+
+    def __init__(self, alias, options):
+        super().__init__(alias, options)
+        if "PATH" not in options:
+            raise ImproperlyConfigured(f"AI backend '{alias}' needs OPTIONS['PATH'].")
+        self.path = Path(options["PATH"])
+        self.mode = options.get("MODE", "replay")
+        if self.mode not in ("replay", "record", "auto"):
+            raise ImproperlyConfigured(
+                f"AI backend '{alias}': MODE must be replay, record or auto."
+            )
+        self.target = options.get("TARGET", DEFAULT_AI_BACKEND_ALIAS)
+        if self.mode != "replay" and self.target == alias:
+            raise ImproperlyConfigured(f"AI backend '{alias}' cannot record itself.")
+
+    def _recording(self, messages, params):
+        request = {"model": self.model, "messages": messages, "params": params}
+        key = hashlib.sha256(
+            json.dumps(request, sort_keys=True).encode()
+        ).hexdigest()
+        return self.path / f"{key}.json", request
+
+    def _replay(self, recording):
+        if self.mode != "record" and recording.exists():
+            data = json.loads(recording.read_text())
+            if "usage" not in data:
+                return data["response"]  # Recorded without usage: estimated
+            return Completion(data["response"], model=self.model, **data["usage"])
+        if self.mode == "replay":
+            raise AIBackendError(f"No recorded completion at {recording}.")
+        return None
+
+    def _save_recording(self, recording, request, completion):
+        self.path.mkdir(parents=True, exist_ok=True)
+        partial = recording.with_suffix(".tmp")
+        partial.write_text(
+            json.dumps(
+                {
+                    "request": request,
+                    "response": str(completion),
+                    "usage": completion.usage,
+                }
+            )
+        )
+        partial.replace(recording)  # Atomic: replays never see half a file
+
+    def _complete(self, messages, **params):
+        recording, request = self._recording(messages, params)
+        text = self._replay(recording)
+        if text is None:
+            text = get_ai_backend(self.target).complete(messages, **params)
+            self._save_recording(recording, request, text)
+        return text
+
+    async def _acomplete(self, messages, **params):
+        recording, request = self._recording(messages, params)
+        text = self._replay(recording)
+        if text is None:
+            text = await get_ai_backend(self.target).acomplete(messages, **params)
+            self._save_recording(recording, request, text)
+        return text
+
+
+# Registry --------------------------------------------------------------------
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_ai_backend(alias=DEFAULT_AI_BACKEND_ALIAS):
+    """
+    Returns the backend configured under `alias` in AI_BACKENDS, building it
+    on first use.
+    """
+    backend = _backends.get(alias)
+    if backend is not None:
+        return backend
+    with _backends_lock:
+        if alias not in _backends:
+            config = getattr(settings, "AI_BACKENDS", {}).get(alias)
+            if config is None:
+                raise ImproperlyConfigured(f"AI backend '{alias}' is not configured.")
+            backend_class = import_string(config["BACKEND"])
+            _backends[alias] = backend_class(alias, config.get("OPTIONS", {}))
+        return _backends[alias]
+
+
+def ai_backend_metrics():
+    """
+    Latency and error statistics of the backends used by this process.
+    """
+    return {
+        alias: backend.metrics.snapshot() for alias, backend in list(_backends.items())
+    }
+
+
+def reset_ai_backends():
+    """
+    Drops cached backends (and the shared HTTP pool); the next call rebuilds
+    them from settings.
+    """
+    global _http_client
+    with _backends_lock:
+        for backend in _backends.values():
+            backend.close()
+        _backends.clear()
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = None
+    _async_http_clients.clear()
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    if setting in ("AI_BACKENDS", "AI_HTTP_POOL"):
+        reset_ai_backends()
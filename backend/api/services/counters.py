@@ -0,0 +1,254 @@
+# backend/api/services/counters.py
+
+"""
+Denormalized counters on Quiz, Group and Account (see api.models.counters),
+so listings show question, result and participant counts without COUNT(*)
+queries.
+
+Every write path adjusts them with F() updates in the same transaction as
+the write itself, so concurrent writers never lose increments. Paths that
+bypass this module (raw SQL, the Django admin, cascades from deleting an
+account or user) can leave them drifted; reconcile_counters repairs that.
+
+A participant is a distinct user, else a distinct anonymous_id; a result
+with neither counts as its own participant.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .. import sharding
+
+from ..models.group import Group
+from ..models.question import Question
+from ..models.quiz import Quiz
+from ..models.user import Account, UserResult
+
+
+def _adjust(queryset, **deltas):
+    deltas = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if deltas:
+        queryset.update(**deltas)
+
+
+def _adjust_owners(quiz, group_id=None, sign=1, **deltas):
+    """Applies `deltas` to the quiz's account and (if any) its group."""
+    deltas = {field: sign * delta for field, delta in deltas.items()}
+    _adjust(Account.objects.filter(pk=quiz.account_id), **deltas)
+    group_id = quiz.group_id if group_id is None else group_id
+    if group_id:
+        _adjust(Group.objects.filter(pk=group_id), **deltas)
+
+
+def quiz_created(quiz):
+    """Counts a new quiz (with any results it was created with)."""
+    _adjust_owners(quiz, num_quizzes=1, num_results=quiz.num_results)
+
+
+def quiz_deleted(quiz):
+    """Uncounts a deleted quiz and its results."""
+    _adjust_owners(quiz, sign=-1, num_quizzes=1, num_results=quiz.num_results)
+
+
+def quiz_moved(quiz, old_group_id):
+    """Moves the quiz's counts from `old_group_id` to its current group."""
+    if old_group_id == quiz.group_id:
+        return
+    results = Quiz.objects.filter(pk=quiz.pk).values_list("num_results", flat=True)
+    num_results = results.first() or 0
+    if old_group_id:
+        _adjust(
+            Group.objects.filter(pk=old_group_id),
+            num_quizzes=-1,
+            num_results=-num_results,
+        )
+    if quiz.group_id:
+        _adjust(
+            Group.objects.filter(pk=quiz.group_id),
+            num_quizzes=1,
+            num_results=num_results,
+        )
+
+
+def questions_added(quiz_id, count=1):
+    """Counts `count` questions added to the quiz (negative when removed)."""
+    _adjust(Quiz.objects.filter(pk=quiz_id), num_questions=count)
+
+
+def _is_new_participant(result):
+    if result.user_id:
+        same = Q(user_id=result.user_id)
+    elif result.anonymous_id:
+        same = Q(user__isnull=True, anonymous_id=result.anonymous_id)
+    else:
+        return True
+    others = UserResult.objects.filter(same, quiz_id=result.quiz_id)
+    return not others.exclude(pk=result.pk).exists()
+
+
+@sharding.atomic
+def record_result(quiz, **fields):
+    """Creates a UserResult for the quiz and counts it."""
+    result = UserResult.objects.create(quiz=quiz, **fields)
+    _adjust(
+        Quiz.objects.filter(pk=quiz.pk),
+        num_results=1,
+        num_participants=int(_is_new_participant(result)),
+    )
+    _adjust_owners(quiz, num_results=1)
+    return result
+
+
+# Reconciliation
+
+
+def _count(queryset, expression=None):
+    """COUNT subquery over `queryset` (filtered on OuterRef) as an integer."""
+    expression = expression or Count("pk")
+    subquery = (
+        queryset.order_by()
+        .annotate(_group=Value(1))
+        .values("_group")
+        .annotate(n=expression)
+        .values("n")
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+
+def expected_counts():
+    """{model: {counter field: expression of its true value}}"""
+    quiz_results = UserResult.objects.filter(quiz=OuterRef("pk"))
+    return {
+        Quiz: {
+            "num_questions": _count(Question.objects.filter(quiz=OuterRef("pk"))),
+            "num_results": _count(quiz_results),
+            "num_participants": _count(
+                quiz_results,
+                Count("user", distinct=True)
+                + Count("anonymous_id", distinct=True, filter=Q(user__isnull=True))
+                + Count("pk", filter=Q(user__isnull=True, anonymous_id__isnull=True)),
+            ),
+        },
+        Group: {
+            "num_quizzes": _count(Quiz.objects.filter(group=OuterRef("pk"))),
+            "num_results": _count(UserResult.objects.filter(quiz__group=OuterRef("pk"))),
+        },
+        Account: {
+            "num_quizzes": _count(Quiz.objects.filter(account=OuterRef("pk"))),
+            "num_results": _count(
+                UserResult.objects.filter(quiz__account=OuterRef("pk"))
+            ),
+        },
+    }
+
+
+def _reconcile(queryset, expected, dry_run, batch_size):
+    """Corrects the drifted counters of `queryset`; returns how many rows."""
+    drifted = 0
+    last_pk = None
+    while True:
+        batch = queryset.order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        rows = list(
+            batch.values("pk", *expected).annotate(
+                **{f"expected_{field}": value for field, value in expected.items()}
+            )[:batch_size]
+        )
+        if not rows:
+            return drifted
+        last_pk = rows[-1]["pk"]
+        with sharding.atomic():
+            for row in rows:
+                deltas = {
+                    field: row[f"expected_{field}"] - row[field] for field in expected
+                }
+                if any(deltas.values()):
+                    drifted += 1
+                    if not dry_run:
+                        _adjust(queryset.model.objects.filter(pk=row["pk"]), **deltas)
+
+
+def _reconcile_placed_accounts(alias, filters, dry_run, batch_size):
+    """
+    Account counters of the accounts placed on shard `alias`: counted there
+    (one grouped query per batch), corrected on "default".
+    """
+    drifted = 0
+    accounts = Account.objects.filter(placement__database=alias, **filters)
+    last_pk = None
+    while True:
+        batch = accounts.order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        rows = list(batch.values("pk", "num_quizzes", "num_results")[:batch_size])
+        if not rows:
+            return drifted
+        last_pk = rows[-1]["pk"]
+        ids = [row["pk"] for row in rows]
+        with sharding.on_shard(alias):
+            quizzes = dict(
+                Quiz.objects.filter(account_id__in=ids)
+                .order_by()
+                .values_list("account_id")
+                .annotate(n=Count("pk"))
+            )
+            results = dict(
+                UserResult.objects.filter(quiz__account_id__in=ids)
+                .order_by()
+                .values_list("quiz__account_id")
+                .annotate(n=Count("pk"))
+            )
+        with transaction.atomic():
+            for row in rows:
+                deltas = {
+                    "num_quizzes": quizzes.get(row["pk"], 0) - row["num_quizzes"],
+                    "num_results": results.get(row["pk"], 0) - row["num_results"],
+                }
+                if any(deltas.values()):
+                    drifted += 1
+                    if not dry_run:
+                        _adjust(Account.objects.filter(pk=row["pk"]), **deltas)
+
+
+def reconcile_counters(account_id=None, dry_run=False, batch_size=500):
+    """
+    Recomputes every counter (of one account, or all) in primary key order,
+    `batch_size` rows at a time, and corrects the drifted ones; quizzes and
+    groups shard by shard (see api.sharding).
+
+    Corrections are applied as F() deltas computed from the same snapshot
+    as the true values, so writes landing meanwhile are not overwritten.
+    Returns {model name: rows corrected (or that would be, on a dry run)}.
+    """
+    expected = expected_counts()
+    drifted = {model.__name__: 0 for model in expected}
+    tenant_filters = {} if account_id is None else {"account_id": account_id}
+    account_filters = {} if account_id is None else {"pk": account_id}
+    if account_id is None:
+        databases = sharding.shards()
+    else:
+        databases = [sharding.directory.database_for(account_id)]
+
+    for alias in databases:
+        with sharding.on_shard(alias):
+            for model in (Quiz, Group):
+                drifted[model.__name__] += _reconcile(
+                    model.objects.filter(**tenant_filters),
+                    expected[model],
+                    dry_run,
+                    batch_size,
+                )
+
+    # Accounts whose quizzes are on "default" too, then those placed elsewhere
+    others = sharding.shards()[1:]
+    accounts = Account.objects.filter(**account_filters)
+    if others:
+        accounts = accounts.exclude(placement__database__in=others)
+    drifted["Account"] += _reconcile(accounts, expected[Account], dry_run, batch_size)
+    for alias in others:
+        drifted["Account"] += _reconcile_placed_accounts(
+            alias, account_filters, dry_run, batch_size
+        )
+    return drifted
@@ -0,0 +1,93 @@
+# backend/api/services/db_pool.py
+
+"""
+Instrumentation of the database connection pools.
+
+Databases whose OPTIONS hold "pool" (see DB_POOL in the settings) get a
+psycopg_pool.ConnectionPool per process from Django's PostgreSQL backend,
+opened by the first query. install() registers a metrics collector that,
+before each metrics snapshot, exports every open pool's gauges (connections
+in use and idle, requests waiting) and adds what its counters recorded
+since the previous snapshot (checkouts, wait time, timeouts, connections
+opened and closed) to the db_pool_* metrics.
+
+A forked worker must not share its parent's pooled sockets: the pools it
+inherits are dropped (not closed, which would end the parent's sessions)
+and it opens its own.
+"""
+
+import os
+import threading
+
+from django.db import connections
+
+from . import metrics
+
+_lock = threading.Lock()
+_sizes = {}  # alias -> pool size at the previous collection
+
+
+def open_pools():
+    """[(alias, pool)] of the pools this process has created."""
+    pools = []
+    for alias in connections:
+        created = getattr(type(connections[alias]), "_connection_pools", {})
+        if alias in created:
+            pools.append((alias, created[alias]))
+    return pools
+
+
+def pool_stats():
+    """{alias: psycopg_pool statistics}, without resetting its counters."""
+    return {alias: pool.get_stats() for alias, pool in open_pools()}
+
+
+def collect():
+    with _lock:
+        for alias, pool in open_pools():
+            # Gauges, and the counters since the previous pop_stats() call
+            stats = pool.pop_stats()
+            size = stats.get("pool_size", 0)
+            idle = stats.get("pool_available", 0)
+            created = stats.get("connections_num", 0)
+            metrics.db_pool_connections.set(size - idle, alias=alias, state="in_use")
+            metrics.db_pool_connections.set(idle, alias=alias, state="idle")
+            metrics.db_pool_requests_waiting.set(
+                stats.get("requests_waiting", 0), alias=alias
+            )
+            metrics.db_pool_checkouts.inc(stats.get("requests_num", 0), alias=alias)
+            metrics.db_pool_wait_seconds.inc(
+                stats.get("requests_wait_ms", 0) / 1000, alias=alias
+            )
+            metrics.db_pool_timeouts.inc(stats.get("requests_errors", 0), alias=alias)
+            metrics.db_pool_connections_created.inc(created, alias=alias)
+            metrics.db_pool_connect_seconds.inc(
+                stats.get("connections_ms", 0) / 1000, alias=alias
+            )
+            metrics.db_pool_connection_errors.inc(
+                stats.get("connections_errors", 0), alias=alias
+            )
+            # The pool does not count the connections it retires (max_lifetime,
+            # max_idle, broken on return, lost): whatever it opened that it no
+            # longer holds was closed
+            closed = created - (size - _sizes.get(alias, 0))
+            _sizes[alias] = size
+            if closed > 0:
+                metrics.db_pool_connections_closed.inc(closed, alias=alias)
+
+
+def _after_fork():
+    global _lock
+    _lock = threading.Lock()
+    _sizes.clear()
+    for alias in connections:
+        getattr(type(connections[alias]), "_connection_pools", {}).pop(alias, None)
+
+
+def install():
+    """Exports pool metrics (see the module docstring); safe to call again."""
+    metrics.registry.add_collector(collect)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
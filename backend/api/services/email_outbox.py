@@ -0,0 +1,139 @@
+# backend/api/services/email_outbox.py
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils.timezone import now
+
+from ..models.outbox import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def queue_email(subject, message, recipient, from_email=None):
+    """
+    Queues one email. Call it inside the transaction that makes the change
+    the email announces, so both commit (or roll back) together.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipient=recipient,
+    )
+
+
+def queue_emails(subject, message, recipients, from_email=None, batch_size=1000):
+    """
+    Queues the same email for many recipients with batched inserts.
+    Returns the number of queued rows.
+    """
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    rows = (
+        OutboxEmail(
+            subject=subject, body=message, from_email=from_email, recipient=recipient
+        )
+        for recipient in recipients
+    )
+    queued = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            queued += len(OutboxEmail.objects.bulk_create(batch))
+            batch = []
+    if batch:
+        queued += len(OutboxEmail.objects.bulk_create(batch))
+    return queued
+
+
+def _retry_delay(attempts):
+    base = _setting("OUTBOX_RETRY_BASE_SECONDS", 30)
+    ceiling = _setting("OUTBOX_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+
+def _claim_batch(batch_size):
+    """
+    Leases up to `batch_size` due emails by pushing their next_attempt_at
+    forward, so concurrent senders skip them while this one is sending.
+    """
+    lease = timedelta(seconds=_setting("OUTBOX_LEASE_SECONDS", 300))
+    current = now()
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=current)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if batch:
+            OutboxEmail.objects.filter(id__in=[e.id for e in batch]).update(
+                next_attempt_at=current + lease
+            )
+    return batch
+
+
+def deliver_outbox(batch_size=None, connection=None):
+    """
+    Sends one batch of due emails over a single (reused) backend connection.
+    Failures are retried with exponential backoff and dead-lettered after
+    OUTBOX_MAX_ATTEMPTS. Returns a dict with sent / retried / dead counts.
+    """
+    batch = _claim_batch(batch_size or _setting("OUTBOX_BATCH_SIZE", 100))
+    counts = {"sent": 0, "retried": 0, "dead": 0}
+    if not batch:
+        return counts
+
+    max_attempts = _setting("OUTBOX_MAX_ATTEMPTS", 5)
+    connection = connection or get_connection(fail_silently=False)
+    delivered, failed = [], []
+    try:
+        for email in batch:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=[email.recipient],
+                connection=connection,
+            )
+            try:
+                connection.open()  # No-op while the connection is alive
+                message.send()
+                delivered.append(email)
+            except Exception as exc:
+                logger.warning("Outbox email %s failed: %s", email.id, exc)
+                email.last_error = str(exc)
+                failed.append(email)
+                # Drop a possibly broken connection; the next send reopens it
+                connection.close()
+    finally:
+        connection.close()
+
+    current = now()
+    for email in delivered:
+        email.status = "sent"
+        email.sent_at = current
+        email.attempts += 1
+        email.last_error = None  # Of an earlier attempt
+    for email in failed:
+        email.attempts += 1
+        if email.attempts >= max_attempts:
+            email.status = "dead"
+            counts["dead"] += 1
+        else:
+            email.next_attempt_at = current + _retry_delay(email.attempts)
+            counts["retried"] += 1
+    counts["sent"] = len(delivered)
+
+    OutboxEmail.objects.bulk_update(
+        delivered + failed,
+        ["status", "sent_at", "attempts", "next_attempt_at", "last_error"],
+    )
+    return counts
@@ -0,0 +1,226 @@
+# backend/api/services/member_provisioning_service.py
+
+import csv
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils.crypto import get_random_string
+
+from ..models.user import AccountMembership, User
+from ..utils.generate_prefixed_uuid import generate_prefixed_uuid
+from .email_outbox import queue_emails
+from .quiz_invitation_service import normalize_email
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_ROLES = ("member", "admin")
+
+
+def iter_csv_roster(uploaded_file):
+    """
+    Streams roster rows (dicts with lower-cased column names) from a CSV
+    upload. Expected columns: email, role, first_name, last_name, password.
+    """
+    reader = csv.DictReader(
+        io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    )
+    for row in reader:
+        yield {(key or "").strip().lower(): value for key, value in row.items()}
+
+
+class MemberProvisioningService:
+    """
+    Creates users and account memberships from a roster, in batches.
+
+    Each batch is one transaction with a few bulk queries: look up existing
+    users, bulk_create the missing ones, look up existing memberships,
+    bulk_create the rest. Passwords given in the roster are hashed in a
+    thread pool (PBKDF2 releases the GIL); rows without one get an unusable
+    password and an invitation to set it.
+
+    Every row gets an outcome. Provisioning is idempotent, so re-submitting
+    the same roster after a failure resumes it: finished rows come back as
+    "already_member" and only the rest are created.
+    """
+
+    def __init__(self, account, batch_size=500, send_invitation=True):
+        self.account = account
+        self.batch_size = batch_size
+        self.send_invitation = send_invitation
+        self.summary = {
+            "created": 0,
+            "added": 0,
+            "already_member": 0,
+            "duplicate": 0,
+            "invalid": 0,
+            "failed": 0,
+        }
+        self.results = []
+
+    def provision(self, rows):
+        """
+        Consumes an iterable of roster dicts; returns {"summary", "results"}.
+        """
+        workers = getattr(settings, "PROVISIONING_HASH_WORKERS", None) or os.cpu_count()
+        seen = set()
+        batch = []
+        with ThreadPoolExecutor(max_workers=workers) as hasher:
+            for number, row in enumerate(rows, start=1):
+                entry = self._clean(number, row, seen)
+                if entry is None:
+                    continue
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    self._run_batch(batch, hasher)
+                    batch = []
+            if batch:
+                self._run_batch(batch, hasher)
+        self.results.sort(key=lambda result: result["row"])
+        return {"summary": self.summary, "results": self.results}
+
+    def _record(self, number, email, outcome, **extra):
+        self.summary[outcome] += 1
+        self.results.append({"row": number, "email": email, "outcome": outcome, **extra})
+
+    def _clean(self, number, row, seen):
+        raw_email = row.get("email") if isinstance(row, dict) else None
+        email = normalize_email(raw_email)
+        if email is None:
+            self._record(number, raw_email, "invalid", error="Invalid email.")
+            return None
+
+        role = (row.get("role") or "member").strip().lower()
+        if role not in ALLOWED_ROLES:
+            self._record(number, email, "invalid", error=f"Invalid role '{role}'.")
+            return None
+
+        if email in seen:
+            self._record(number, email, "duplicate")
+            return None
+        seen.add(email)
+
+        return {
+            "row": number,
+            "email": email,
+            "role": role,
+            "first_name": (row.get("first_name") or "").strip() or None,
+            "last_name": (row.get("last_name") or "").strip() or None,
+            "password": row.get("password") or None,
+        }
+
+    def _run_batch(self, batch, hasher):
+        try:
+            outcomes = self._provision_batch(batch, hasher)
+        except Exception as exc:
+            logger.exception("Provisioning batch failed for account %s", self.account.id)
+            for entry in batch:
+                self._record(entry["row"], entry["email"], "failed", error=str(exc))
+            return
+        for entry, outcome, user_id in outcomes:
+            self._record(entry["row"], entry["email"], outcome, user_id=user_id)
+
+    @staticmethod
+    def _user_ids(emails):
+        """
+        {lower-cased email: user id} of the users with these addresses, in
+        any case (stored addresses keep theirs); the earliest user wins.
+        """
+        user_ids = {}
+        matches = (
+            User.objects.annotate(email_lower=Lower("email"))
+            .filter(email_lower__in=emails)
+            .order_by("date_joined", "id")
+            .values_list("email_lower", "id")
+        )
+        for email, user_id in matches:
+            user_ids.setdefault(email, user_id)
+        return user_ids
+
+    @transaction.atomic
+    def _provision_batch(self, batch, hasher):
+        user_ids = self._user_ids([entry["email"] for entry in batch])
+
+        new_entries = [entry for entry in batch if entry["email"] not in user_ids]
+        hashes = hasher.map(
+            make_password, [entry["password"] for entry in new_entries]
+        )
+        new_users = [
+            User(
+                id=generate_prefixed_uuid("u"),
+                email=entry["email"],
+                # bulk_create skips User.save(), which fills the username
+                username=get_random_string(length=12),
+                first_name=entry["first_name"],
+                last_name=entry["last_name"],
+                password=password_hash,
+            )
+            for entry, password_hash in zip(new_entries, hashes)
+        ]
+        User.objects.bulk_create(new_users, ignore_conflicts=True)
+        created_ids = set()
+        if new_users:
+            # Only the rows this batch inserted carry its ids; a concurrent
+            # request may have inserted some of the same emails first
+            created_ids = set(
+                User.objects.filter(
+                    id__in=[user.id for user in new_users]
+                ).values_list("id", flat=True)
+            )
+            user_ids.update(self._user_ids([entry["email"] for entry in new_entries]))
+
+        existing_members = set(
+            AccountMembership.objects.filter(
+                account=self.account, user_id__in=user_ids.values()
+            ).values_list("user_id", flat=True)
+        )
+
+        memberships = []
+        outcomes = []
+        for entry in batch:
+            user_id = user_ids[entry["email"]]
+            if user_id in existing_members:
+                outcomes.append((entry, "already_member", user_id))
+                continue
+            memberships.append(
+                AccountMembership(account=self.account, user_id=user_id, role=entry["role"])
+            )
+            outcome = "created" if user_id in created_ids else "added"
+            outcomes.append((entry, outcome, user_id))
+        AccountMembership.objects.bulk_create(memberships)
+
+        if self.send_invitation:
+            self._queue_invitations(outcomes)
+        return outcomes
+
+    def _queue_invitations(self, outcomes):
+        must_set_password = []
+        added = []
+        for entry, outcome, _ in outcomes:
+            if outcome == "created" and not entry["password"]:
+                must_set_password.append(entry["email"])
+            elif outcome in ("created", "added"):
+                added.append(entry["email"])
+
+        account_name = self.account.name
+        if must_set_password:
+            queue_emails(
+                "Account Invitation",
+                (
+                    f"Hello,\n\nYou've been invited to join the account '{account_name}'. "
+                    "Please set your password to activate your account.\n\n"
+                    "Visit: <password_reset_link>"
+                ),
+                must_set_password,
+            )
+        if added:
+            queue_emails(
+                "Account Invitation",
+                f"You've been added to the account {account_name}.",
+                added,
+            )
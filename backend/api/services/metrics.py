@@ -0,0 +1,410 @@
+# backend/api/services/metrics.py
+
+"""
+Counters, gauges and histograms in the Prometheus text format, served by
+the ops metrics endpoint (api.views.ops_views.metrics).
+
+Every process records into its own in-memory registry; an update only
+takes its metric's lock for a dict update. With METRICS["DIR"] set, a
+daemon thread writes the registry to a file of its own in that directory
+every METRICS["FLUSH_INTERVAL"] seconds (and at exit), and the endpoint
+sums the files of all processes, so scraping any gunicorn worker reports
+the whole server. Files of exited workers are kept, so counters never go
+backwards when a worker is recycled: empty the directory when the server
+starts (as with prometheus_client's multiprocess mode). Gauges are summed
+too, but only over files written in the last three flush intervals: an
+exited worker holds nothing any more.
+
+Gauges are usually sampled rather than recorded: callbacks registered with
+registry.add_collector() set them before each snapshot.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds: from a cached lookup to a slow AI generation
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _config(name, default):
+    return getattr(settings, "METRICS", {}).get(name, default)
+
+
+class _Metric:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}  # label values -> value
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """[(label values, value)], copied under the lock."""
+        with self._lock:
+            return [(key, self._copy(value)) for key, value in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(total, value):
+        return total + value
+
+    def exposition(self, labels, value):
+        yield self.name, labels, value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @staticmethod
+    def merge(total, value):
+        return total + value
+
+    def exposition(self, labels, value):
+        yield self.name, labels, value
+
+
+class Histogram(_Metric):
+    """
+    Values are [count per bucket..., count above the last bucket, sum]; the
+    buckets are made cumulative only when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(float(bound) for bound in buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    @staticmethod
+    def _copy(value):
+        return list(value)
+
+    @staticmethod
+    def merge(total, value):
+        if len(total) != len(value):
+            return total  # Written with other buckets (an older deploy)
+        return [a + b for a, b in zip(total, value)]
+
+    def exposition(self, labels, value):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), value):
+            cumulative += count
+            le = bound if bound == "+Inf" else _format_value(bound)
+            yield f"{self.name}_bucket", (*labels, ("le", le)), cumulative
+        yield f"{self.name}_sum", labels, value[-1]
+        yield f"{self.name}_count", labels, cumulative
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return f"{value:.1f}"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """The metrics of this process, and their aggregation across processes."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._file_token = uuid.uuid4().hex
+        self._collectors = []
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), **options):
+        return self._register(Histogram, name, documentation, labelnames, **options)
+
+    def add_collector(self, callback):
+        """Calls `callback()` before each snapshot (once per callback)."""
+        with self._lock:
+            if callback not in self._collectors:
+                self._collectors.append(callback)
+
+    def _register(self, cls, name, documentation, labelnames, **options):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(
+                    name, documentation, labelnames, **options
+                )
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(
+                labelnames
+            ):
+                raise ValueError(f"Metric {name} is already registered differently")
+        return metric
+
+    def start(self):
+        """
+        Starts this process's flush thread when METRICS["DIR"] is set (the
+        server timing middleware does, when it is loaded).
+        """
+        if self._thread is not None or not _config("DIR", None):
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="metrics-flush", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _after_fork(self):
+        # A forked worker starts from zero under a file of its own: what the
+        # parent recorded is in the parent's file
+        started = self._thread is not None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._file_token = uuid.uuid4().hex
+        for metric in self._metrics.values():
+            metric._lock = threading.Lock()
+            metric._values = {}
+        if started:
+            self.start()
+
+    def _run(self):
+        interval = _config("FLUSH_INTERVAL", 5)
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+    def snapshot(self):
+        for callback in list(self._collectors):
+            try:
+                callback()
+            except Exception:
+                logger.exception("Metrics collector %r failed", callback)
+        return {
+            name: {
+                "kind": metric.kind,
+                "labelnames": metric.labelnames,
+                "samples": metric.samples(),
+            }
+            for name, metric in list(self._metrics.items())
+        }
+
+    def _path(self):
+        return Path(_config("DIR", None)) / f"{os.getpid()}-{self._file_token}.json"
+
+    def flush(self):
+        """Writes this process's metrics to its file (atomically replaced)."""
+        if not _config("DIR", None):
+            return
+        path = self._path()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(".tmp")
+            partial.write_text(json.dumps(self.snapshot()))
+            os.replace(partial, path)
+        except OSError:
+            logger.exception("Failed to write metrics to %s", path)
+
+    def collect(self):
+        """
+        {metric name: {label values: value}} summed over every process that
+        wrote to METRICS["DIR"] (this one's values are always current).
+        """
+        totals = {name: {} for name in self._metrics}
+        snapshots = [(self.snapshot(), True)]  # (snapshot, current)
+        directory = _config("DIR", None)
+        if directory:
+            own = self._path().name
+            oldest = time.time() - 3 * _config("FLUSH_INTERVAL", 5)
+            for path in Path(directory).glob("*.json"):
+                if path.name == own:
+                    continue
+                try:
+                    current = path.stat().st_mtime >= oldest
+                    snapshots.append((json.loads(path.read_text()), current))
+                except (OSError, ValueError):
+                    continue  # Being replaced, or unreadable: skip this scrape
+
+        for snapshot, current in snapshots:
+            for name, data in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None or tuple(data["labelnames"]) != metric.labelnames:
+                    continue
+                if metric.kind == "gauge" and not current:
+                    continue
+                values = totals[name]
+                for key, value in data["samples"]:
+                    key = tuple(key)
+                    values[key] = (
+                        metric.merge(values[key], value) if key in values else value
+                    )
+        return totals
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for name, values in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(values.items()):
+                labels = tuple(zip(metric.labelnames, key))
+                for sample, sample_labels, sample_value in metric.exposition(
+                    labels, value
+                ):
+                    if sample_labels:
+                        sample += "{%s}" % ",".join(
+                            f'{label}="{_escape(str(label_value))}"'
+                            for label, label_value in sample_labels
+                        )
+                    lines.append(f"{sample} {_format_value(sample_value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Resets this process's metrics (files in METRICS["DIR"] are kept)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total",
+    "Requests handled, by URL name.",
+    ["view", "method", "status"],
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency, by URL name.",
+    ["view", "method"],
+)
+http_request_queries = registry.histogram(
+    "http_request_db_queries",
+    "SQL queries per request, by URL name.",
+    ["view"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+ai_requests = registry.counter(
+    "ai_requests_total",
+    "AI completion calls, by backend and outcome (ok or error).",
+    ["backend", "outcome"],
+)
+ai_request_duration = registry.histogram(
+    "ai_request_duration_seconds",
+    "AI completion latency, by backend.",
+    ["backend"],
+)
+ai_tokens = registry.counter(
+    "ai_tokens_total",
+    "Tokens of AI completions, by backend and kind (prompt or completion).",
+    ["backend", "kind"],
+)
+quiz_parses = registry.counter(
+    "quiz_parse_total",
+    "AI responses parsed into questions, by outcome (complete, salvaged, failed).",
+    ["outcome"],
+)
+empty_ai_quizzes = registry.counter(
+    "ai_empty_quizzes_total",
+    "Quizzes asking for AI questions created without any (AI error or unparseable).",
+)
+
+db_pool_connections = registry.gauge(
+    "db_pool_connections",
+    "Pooled database connections, by alias and state (in_use or idle).",
+    ["alias", "state"],
+)
+db_pool_requests_waiting = registry.gauge(
+    "db_pool_requests_waiting",
+    "Requests waiting for a pooled database connection, by alias.",
+    ["alias"],
+)
+db_pool_checkouts = registry.counter(
+    "db_pool_checkouts_total",
+    "Connections taken from the pool, by alias.",
+    ["alias"],
+)
+db_pool_wait_seconds = registry.counter(
+    "db_pool_wait_seconds_total",
+    "Time spent waiting for a pooled connection (none was idle), by alias.",
+    ["alias"],
+)
+db_pool_timeouts = registry.counter(
+    "db_pool_timeouts_total",
+    "Checkouts that failed (the pool timeout expired), by alias.",
+    ["alias"],
+)
+db_pool_connections_created = registry.counter(
+    "db_pool_connections_created_total",
+    "Connections the pool opened, by alias.",
+    ["alias"],
+)
+db_pool_connect_seconds = registry.counter(
+    "db_pool_connect_seconds_total",
+    "Time spent opening connections for the pool, by alias.",
+    ["alias"],
+)
+db_pool_connections_closed = registry.counter(
+    "db_pool_connections_closed_total",
+    "Connections the pool closed (lifetime, idle, broken or lost), by alias.",
+    ["alias"],
+)
+db_pool_connection_errors = registry.counter(
+    "db_pool_connection_errors_total",
+    "Failed attempts to open a connection for the pool, by alias.",
+    ["alias"],
+)
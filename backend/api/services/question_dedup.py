@@ -0,0 +1,227 @@
+# backend/api/services/question_dedup.py
+
+"""
+Near-duplicate detection for questions with MinHash signatures and LSH.
+
+A question (its text plus options, normalized) is turned into character
+shingles; its MinHash signature estimates the Jaccard similarity between
+shingle sets. Signatures are split into bands and bucketed, so checking a
+question only compares it with questions sharing at least one band bucket
+instead of every question in the account.
+
+Each worker process keeps one index per account, built lazily from the
+database on first use, extended as questions are created, dropped when one
+of its questions is edited or deleted (it is rebuilt on next use), rebuilt
+after QUESTION_DEDUP["INDEX_TTL"] seconds (edits made by other processes),
+and evicted least recently used beyond QUESTION_DEDUP["MAX_ACCOUNTS"].
+"""
+
+import hashlib
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.conf import settings
+
+from ..models.question import Question
+
+NUM_PERM = 64
+BANDS = 16  # x 4 rows: pairs above ~0.5 similarity almost always collide
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+OPTION_FIELDS = ("option_a", "option_b", "option_c", "option_d", "option_e")
+
+
+def _config(name, default):
+    return getattr(settings, "QUESTION_DEDUP", {}).get(name, default)
+
+
+def question_signature(question):
+    """
+    MinHash signature (array of NUM_PERM uint32) of a question dict/instance
+    with question_text and option_a..option_e.
+    """
+    get = question.get if isinstance(question, dict) else question.__dict__.get
+    parts = [get("question_text") or ""]
+    parts.extend(get(field) or "" for field in OPTION_FIELDS)
+    text = _NON_WORD_RE.sub(" ", " | ".join(parts).casefold()).strip()
+    if len(text) < SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {
+            text[i : i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)
+        }
+    # One SHAKE digest per shingle yields all NUM_PERM hash values at once;
+    # the signature is the column-wise minimum
+    rows = (
+        array("I", hashlib.shake_128(shingle.encode()).digest(NUM_PERM * 4))
+        for shingle in shingles
+    )
+    return array("I", map(min, zip(*rows)))
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the two questions."""
+    return sum(a == b for a, b in zip(signature, other)) / NUM_PERM
+
+
+def _band_keys(signature):
+    return [hash(tuple(signature[b * ROWS : (b + 1) * ROWS])) for b in range(BANDS)]
+
+
+class QuestionIndex:
+    """
+    LSH index of question signatures for one account. Entries are
+    (question_id, quiz_id, signature); question_id may be None for
+    questions not saved yet.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.buckets = [{} for _ in range(BANDS)]
+        self.built_at = time.monotonic()
+
+    def add(self, signature, question_id=None, quiz_id=None):
+        position = len(self.entries)
+        self.entries.append((question_id, quiz_id, signature))
+        for band, key in enumerate(_band_keys(signature)):
+            self.buckets[band].setdefault(key, []).append(position)
+
+    def best_match(self, signature, threshold, quiz_id=None):
+        """
+        Returns (question_id, quiz_id, similarity) of the most similar
+        indexed question at or above `threshold`, or None. Matches in
+        `quiz_id` win over more similar ones in other quizzes.
+        """
+        candidates = set()
+        for band, key in enumerate(_band_keys(signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+        best, best_rank = None, None
+        for position in candidates:
+            question_id, match_quiz_id, other = self.entries[position]
+            score = similarity(signature, other)
+            if score < threshold:
+                continue
+            rank = (quiz_id is not None and match_quiz_id == quiz_id, score)
+            if best is None or rank > best_rank:
+                best, best_rank = (question_id, match_quiz_id, score), rank
+        return best
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class _AccountIndexes:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+
+    def get(self, account_id):
+        ttl = _config("INDEX_TTL", 600)
+        with self._lock:
+            index = self._indexes.get(account_id)
+            if index is not None and time.monotonic() - index.built_at < ttl:
+                self._indexes.move_to_end(account_id)
+                return index
+        index = self._build(account_id)
+        with self._lock:
+            self._indexes[account_id] = index
+            self._indexes.move_to_end(account_id)
+            while len(self._indexes) > _config("MAX_ACCOUNTS", 100):
+                self._indexes.popitem(last=False)
+        return index
+
+    def add(self, account_id, questions):
+        """Adds saved questions to the account's index, if it is loaded."""
+        with self._lock:
+            index = self._indexes.get(account_id)
+            if index is None:
+                return  # Built from the database (with them) on next use
+            for question in questions:
+                index.add(question_signature(question), question.id, question.quiz_id)
+
+    def forget(self, account_id):
+        with self._lock:
+            self._indexes.pop(account_id, None)
+
+    def _build(self, account_id):
+        index = QuestionIndex()
+        rows = (
+            Question.objects.filter(quiz__account_id=account_id)
+            .values("id", "quiz_id", "question_text", *OPTION_FIELDS)
+            .iterator(chunk_size=2000)
+        )
+        for row in rows:
+            index.add(question_signature(row), row["id"], row["quiz_id"])
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+account_indexes = _AccountIndexes()
+
+
+def find_duplicates(account_id, questions, quiz_id=None):
+    """
+    Checks question dicts before they are written to a quiz of the account.
+
+    Returns (kept, duplicates). A question is dropped when it nearly
+    duplicates an earlier one in the same batch or a question of the same
+    quiz (`quiz_id`). A near-duplicate of a question in another quiz of the
+    account is dropped when QUESTION_DEDUP["CROSS_QUIZ"] is "drop", kept and
+    reported when it is "flag" (the default). Each duplicate is reported as
+    {"question_text", "duplicate_of", "quiz_id", "similarity", "dropped"}.
+    """
+    if not _config("ENABLED", True) or not questions:
+        return list(questions), []
+
+    threshold = _config("THRESHOLD", 0.7)
+    drop_cross_quiz = _config("CROSS_QUIZ", "flag") == "drop"
+    index = account_indexes.get(account_id)
+    batch = QuestionIndex()
+    kept, duplicates = [], []
+    for question in questions:
+        signature = question_signature(question)
+        match = batch.best_match(signature, threshold)
+        in_batch = match is not None
+        if match is None:
+            match = index.best_match(signature, threshold, quiz_id)
+        if match is None:
+            batch.add(signature, quiz_id=quiz_id)
+            kept.append(question)
+            continue
+
+        duplicate_of, match_quiz_id, score = match
+        dropped = in_batch or match_quiz_id == quiz_id or drop_cross_quiz
+        duplicates.append(
+            {
+                "question_text": question.get("question_text"),
+                "duplicate_of": duplicate_of,
+                "quiz_id": match_quiz_id,
+                "similarity": round(score, 2),
+                "dropped": dropped,
+            }
+        )
+        if not dropped:
+            batch.add(signature, quiz_id=quiz_id)
+            kept.append(question)
+    return kept, duplicates
+
+
+def index_questions(account_id, questions):
+    """Records saved Question instances in the account's index."""
+    account_indexes.add(account_id, questions)
+
+
+def forget_questions(account_id):
+    """
+    Drops the account's index after questions were edited or deleted; it is
+    rebuilt from the database on next use.
+    """
+    account_indexes.forget(account_id)
@@ -1,16 +1,34 @@
 # backend/api/services/quiz_creation_service.py
 
+import hashlib
+import json
 import uuid
 import logging
 
-from django.db import transaction
-from openai import APIError, APIConnectionError, RateLimitError
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from .. import sharding
 from ..models.quiz import Quiz
 from ..models.question import Question
-from ..utils import parse_quiz_text
+from ..utils import salvage_quiz_questions
+from . import counters, metrics
+from .ai_backends import DEFAULT_AI_BACKEND_ALIAS, AIBackendError, get_ai_backend
+from .question_dedup import find_duplicates, index_questions
+from .topic_autocomplete import topic_added
+from .single_flight import SingleFlight
+from .token_usage import token_usage
 
 logger = logging.getLogger(__name__)
 
+COMPLETION_PARAMS = {"max_tokens": 1000, "temperature": 0.7}
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255  # Quiz.idempotency_key
+IDEMPOTENT_REPLAY_HEADER = "Idempotent-Replayed"
+
+# Identical generations in flight in this process share one AI call
+_generations = SingleFlight()
+
 
 class QuizCreationError(Exception):
     """
@@ -26,37 +44,206 @@ class QuizCreationService:
     Handles the creation of a Quiz, including optional AI question generation.
     """
 
-    def __init__(self, openai_client):
+    def __init__(self, ai_backend=DEFAULT_AI_BACKEND_ALIAS):
         """
-        openai_client should be an instance of the OpenAI class
-        (or a mock/stub for testing).
+        ai_backend is an alias from settings.AI_BACKENDS (resolved through
+        the registry) or a backend instance (e.g. a stub for testing).
         """
-        self.openai_client = openai_client
+        if isinstance(ai_backend, str):
+            ai_backend = get_ai_backend(ai_backend)
+        self.ai_backend = ai_backend
+        self.replayed = False
+        self.duplicates = []  # Near-duplicate questions found, see question_dedup
+        # Completions this service requested (not those shared from another
+        # in-flight generation); recorded as ai_generation QuizEvents
+        self.completions = []
 
-    def create_quiz_with_ai(self, account, payload):
+    def create_quiz_with_ai(self, account, payload, idempotency_key=None):
         """
         Main method: parse payload -> optionally call AI -> create DB records -> return (quiz_obj, question_objs).
         If you want, wrap in a transaction so if anything fails, it all rolls back.
+
+        With an idempotency_key, a quiz already created under the same key in
+        the account is returned instead (and self.replayed is set).
         """
+        if idempotency_key:
+            existing = self._find_idempotent(account, idempotency_key)
+            if existing:
+                return existing
+
         # 1) Extract quiz-related fields
         quiz_data = self._parse_quiz_payload(payload)
 
-        # 2) Possibly build AI prompt & call AI
+        # 2) Possibly build AI prompt, call AI & parse (shared with identical
+        # generations already in flight); raises QuotaExceeded first when the
+        # account used up its plan's AI tokens
         question_data = []
         if quiz_data["question_count"] > 0:
-            generated_text = self._generate_ai_questions(quiz_data)
-            # 3) Parse AI text
-            if generated_text:
-                question_data = self._parse_ai_question_data(
-                    generated_text, quiz_data["option_count"]
+            token_usage.check_quota(account)
+            question_data, shared = _generations.do(
+                self._generation_key(quiz_data),
+                lambda: self._generate_question_data(quiz_data),
+            )
+            self._record_token_usage(account)
+            if shared:
+                logger.info(
+                    "Reused in-flight AI generation for '%s'", quiz_data["topic"]
                 )
 
+            if not question_data:
+                metrics.empty_ai_quizzes.inc()
+
+        # 3) Drop near-duplicates within the batch, flag those of other quizzes
+        question_data, self.duplicates = find_duplicates(account.id, question_data)
+
         # 4) Create the quiz + questions inside a transaction
-        quiz_obj, question_objs = self._create_quiz_and_questions(
-            account, quiz_data, question_data
+        try:
+            return self._create_quiz_and_questions(
+                account, quiz_data, question_data, idempotency_key
+            )
+        except IntegrityError:
+            # A concurrent retry with the same key won the race
+            existing = idempotency_key and self._find_idempotent(
+                account, idempotency_key
+            )
+            if not existing:
+                raise
+            return existing
+
+    async def create_quiz_with_ai_async(self, account, payload, idempotency_key=None):
+        """
+        Async variant for ASGI views: awaits the AI call on the event loop, so a
+        worker can hold many generations in flight. The DB writes stay one
+        transaction, which Django only supports synchronously.
+        """
+        if idempotency_key:
+            existing = await sync_to_async(self._find_idempotent)(
+                account, idempotency_key
+            )
+            if existing:
+                return existing
+
+        quiz_data = self._parse_quiz_payload(payload)
+
+        question_data = []
+        if quiz_data["question_count"] > 0:
+            await sync_to_async(token_usage.check_quota)(account)
+            question_data, shared = await _generations.ado(
+                self._generation_key(quiz_data),
+                lambda: self._generate_question_data_async(quiz_data),
+            )
+            self._record_token_usage(account)
+            if shared:
+                logger.info(
+                    "Reused in-flight AI generation for '%s'", quiz_data["topic"]
+                )
+
+            if not question_data:
+                metrics.empty_ai_quizzes.inc()
+
+        question_data, self.duplicates = await sync_to_async(find_duplicates)(
+            account.id, question_data
         )
 
-        return quiz_obj, question_objs
+        try:
+            return await sync_to_async(self._create_quiz_and_questions)(
+                account, quiz_data, question_data, idempotency_key
+            )
+        except IntegrityError:
+            existing = idempotency_key and await sync_to_async(
+                self._find_idempotent
+            )(account, idempotency_key)
+            if not existing:
+                raise
+            return existing
+
+    def _record_token_usage(self, account):
+        # Only completions this service requested: a shared generation is
+        # paid for by the account that started it
+        for completion in self.completions:
+            token_usage.record(account.pk, completion)
+
+    def _find_idempotent(self, account, idempotency_key):
+        """
+        Returns (quiz_obj, question_objs) created earlier under the key, or None.
+        """
+        quiz_obj = Quiz.objects.filter(
+            account=account, idempotency_key=idempotency_key
+        ).first()
+        if quiz_obj is None:
+            return None
+        self.replayed = True
+        return quiz_obj, list(quiz_obj.questions.order_by("id"))
+
+    def _generation_key(self, quiz_data):
+        """
+        Identifies generations that would send the same prompt: the backend
+        plus the prompt parameters, case- and whitespace-normalized.
+        """
+
+        def normalize(value):
+            return " ".join(str(value or "").casefold().split())
+
+        params = [
+            quiz_data["question_count"],
+            quiz_data["option_count"],
+            normalize(quiz_data["difficulty"]),
+            normalize(quiz_data["topic"]),
+            normalize(quiz_data["knowledge_base"]),
+        ]
+        digest = hashlib.sha256(json.dumps(params).encode()).hexdigest()
+        return id(self.ai_backend), digest
+
+    def _generate_question_data(self, quiz_data):
+        generated_text = self._generate_ai_questions(quiz_data)
+        if not generated_text:
+            return []
+        question_data = self._parse_ai_question_data(
+            generated_text, quiz_data["option_count"]
+        )
+        remainder = self._remainder_request(quiz_data, question_data)
+        if remainder:
+            generated_text = self._generate_ai_questions(remainder)
+            question_data += self._parse_ai_question_data(
+                generated_text, quiz_data["option_count"]
+            )[: remainder["question_count"]]
+        return question_data
+
+    async def _generate_question_data_async(self, quiz_data):
+        generated_text = await self._generate_ai_questions_async(quiz_data)
+        if not generated_text:
+            return []
+        question_data = self._parse_ai_question_data(
+            generated_text, quiz_data["option_count"]
+        )
+        remainder = self._remainder_request(quiz_data, question_data)
+        if remainder:
+            generated_text = await self._generate_ai_questions_async(remainder)
+            question_data += self._parse_ai_question_data(
+                generated_text, quiz_data["option_count"]
+            )[: remainder["question_count"]]
+        return question_data
+
+    def _remainder_request(self, quiz_data, question_data):
+        """
+        When the response was cut off or partly malformed, returns quiz_data
+        for one follow-up call asking only for the missing questions (and
+        not to repeat the salvaged ones). None when nothing is missing.
+        """
+        missing = quiz_data["question_count"] - len(question_data)
+        if missing <= 0 or getattr(question_data, "complete", True):
+            return None
+        logger.info(
+            "Salvaged %d of %d AI questions; requesting the remaining %d",
+            len(question_data),
+            quiz_data["question_count"],
+            missing,
+        )
+        return {
+            **quiz_data,
+            "question_count": missing,
+            "exclude_questions": [q["question_text"] for q in question_data],
+        }
 
     def _parse_quiz_payload(self, payload):
         """
@@ -101,10 +288,42 @@ class QuizCreationService:
 
     def _generate_ai_questions(self, quiz_data):
         """
-        Build the OpenAI prompt from the quiz_data and call the API.
+        Build the AI prompt from the quiz_data and call the backend.
         If AI fails, logs the error and returns empty string
         so we can still create the quiz without questions.
         """
+        generated_text = ""
+        try:
+            generated_text = self.ai_backend.complete(
+                self._build_messages(quiz_data), **COMPLETION_PARAMS
+            )
+            self.completions.append(generated_text)
+            logger.info("Generated Text from AI: %s", generated_text)
+        except AIBackendError as e:
+            logger.warning("AI error occurred; continuing with empty quiz: %s", e)
+
+        return generated_text
+
+    async def _generate_ai_questions_async(self, quiz_data):
+        """
+        Same as _generate_ai_questions, awaiting the backend.
+        """
+        generated_text = ""
+        try:
+            generated_text = await self.ai_backend.acomplete(
+                self._build_messages(quiz_data), **COMPLETION_PARAMS
+            )
+            self.completions.append(generated_text)
+            logger.info("Generated Text from AI: %s", generated_text)
+        except AIBackendError as e:
+            logger.warning("AI error occurred; continuing with empty quiz: %s", e)
+
+        return generated_text
+
+    def _build_messages(self, quiz_data):
+        """
+        Build the chat prompt from the quiz_data.
+        """
         question_count = quiz_data["question_count"]
         option_count = quiz_data["option_count"]
         difficulty = quiz_data["difficulty"]
@@ -124,43 +343,41 @@ class QuizCreationService:
                 f"each with {option_count} options labeled A, B, C, etc. Return JSON with 'questions' array."
             )
 
-        generated_text = ""
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000,
-                temperature=0.7,
+        if quiz_data.get("exclude_questions"):
+            prompt += " Do not repeat any of these questions: " + json.dumps(
+                quiz_data["exclude_questions"]
             )
-            generated_text = response.choices[0].message.content.strip()
-            logger.info("Generated Text from OpenAI: %s", generated_text)
-        except (APIError, APIConnectionError, RateLimitError) as e:
-            logger.warning("OpenAI error occurred; continuing with empty quiz: %s", e)
 
-        return generated_text
+        return [{"role": "user", "content": prompt}]
 
     def _parse_ai_question_data(self, generated_text, option_count):
         """
-        Parse the AI response JSON into a list of question dicts.
-        If parse fails, we can choose to return empty or raise an error.
+        Parse the AI response into a list of question dicts (ParsedQuestions).
+        Whatever can be salvaged from a malformed response is kept.
         """
-        question_data = []
-        parsed = parse_quiz_text(generated_text, "multiple-choice", option_count)
-        if parsed:
-            question_data = parsed
-        else:
+        question_data = salvage_quiz_questions(generated_text, option_count)
+        metrics.quiz_parses.inc(outcome=question_data.outcome)
+        if not question_data:
             logger.warning(
                 "Failed to parse AI questions; continuing with no questions."
             )
+        elif not question_data.complete:
+            logger.warning(
+                "Salvaged %d questions from a malformed AI response.",
+                question_data.salvaged,
+            )
         return question_data
 
-    @transaction.atomic
-    def _create_quiz_and_questions(self, account, quiz_data, question_data):
+    @sharding.atomic
+    def _create_quiz_and_questions(
+        self, account, quiz_data, question_data, idempotency_key=None
+    ):
         """
         Use a DB transaction so that if question creation fails, the quiz won't remain half-created.
         """
         from ..models.quiz import Quiz
         from ..models.question import Question
+        from ..models.quiz_event import QuizEvent
 
         # 1) Create Quiz object
         quiz_obj = Quiz.objects.create(
@@ -192,7 +409,10 @@ class QuizCreationService:
             is_testing=quiz_data["is_testing"],
             is_published=quiz_data["is_published"],
             access_control=quiz_data["access_control"],
+            idempotency_key=idempotency_key or None,
+            num_questions=len(question_data),
         )
+        counters.quiz_created(quiz_obj)
 
         # 2) Create question records
         question_objs = []
@@ -213,4 +433,20 @@ class QuizCreationService:
             )
             question_objs.append(question)
 
+        QuizEvent.objects.bulk_create(
+            [
+                QuizEvent(
+                    quiz=quiz_obj,
+                    event_type=QuizEvent.AI_GENERATION,
+                    event_detail=json.dumps(
+                        {"model": completion.model, **completion.usage}
+                    ),
+                    tokens=completion.total_tokens,
+                )
+                for completion in self.completions
+            ]
+        )
+
+        transaction.on_commit(lambda: index_questions(account.id, question_objs))
+        transaction.on_commit(lambda: topic_added(account.id, quiz_obj.topic))
         return quiz_obj, question_objs
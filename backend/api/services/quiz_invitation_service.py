@@ -0,0 +1,131 @@
+# backend/api/services/quiz_invitation_service.py
+
+import csv
+import io
+import re
+
+from .. import sharding
+from ..models.quiz_invite import InvitedUser
+from .email_outbox import queue_emails
+
+# Deliberately loose: catches typos and junk cells, not RFC edge cases
+EMAIL_RE = re.compile(r"^[^@\s,;]+@[^@\s,;]+\.[^@\s,;]+$")
+
+
+def normalize_email(raw):
+    """
+    Lower-cases and trims an address. Returns None if it doesn't look valid.
+    """
+    if not isinstance(raw, str):
+        return None
+    email = raw.strip().lower()
+    return email if EMAIL_RE.match(email) else None
+
+
+def iter_csv_emails(uploaded_file):
+    """
+    Streams addresses out of an uploaded CSV without loading it in memory.
+    Uses the "email" column when the first row is a header, else column 0.
+    """
+    reader = csv.reader(
+        io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    )
+    first = next(reader, None)
+    if first is None:
+        return
+
+    header = [cell.strip().lower() for cell in first]
+    if "email" in header:
+        column = header.index("email")
+    else:
+        column = 0
+        if first:
+            yield first[0]
+
+    for row in reader:
+        if len(row) > column:
+            yield row[column]
+
+
+class QuizInvitationService:
+    """
+    Invites addresses to an invitation-only quiz in batches.
+    Emails are normalized and de-duplicated in memory, inserted with
+    bulk_create(ignore_conflicts=True) against the (quiz, email) unique
+    constraint, and notification emails are queued in the outbox per batch,
+    only for the rows actually inserted.
+    """
+
+    def __init__(self, quiz, batch_size=1000, notify=True):
+        self.quiz = quiz
+        self.batch_size = batch_size
+        self.notify = notify
+        self.summary = {
+            "received": 0,
+            "invalid": 0,
+            "duplicates": 0,
+            "already_invited": 0,
+            "invited": 0,
+            "emails_queued": 0,
+        }
+
+    def invite(self, raw_emails):
+        """
+        Consumes any iterable of raw addresses and returns the summary counts.
+        """
+        seen = set()
+        batch = []
+        for raw in raw_emails:
+            self.summary["received"] += 1
+            email = normalize_email(raw)
+            if email is None:
+                self.summary["invalid"] += 1
+                continue
+            if email in seen:
+                self.summary["duplicates"] += 1
+                continue
+            seen.add(email)
+            batch.append(email)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+        return self.summary
+
+    @sharding.atomic
+    def _flush(self, emails):
+        existing = set(
+            InvitedUser.objects.filter(quiz=self.quiz, email__in=emails).values_list(
+                "email", flat=True
+            )
+        )
+        invites = [
+            InvitedUser(quiz=self.quiz, email=email)
+            for email in emails
+            if email not in existing
+        ]
+        InvitedUser.objects.bulk_create(invites, ignore_conflicts=True)
+        new_emails = []
+        if invites:
+            # Only the rows this batch inserted carry its ids; a concurrent
+            # upload may have invited some of the same addresses first
+            inserted = set(
+                InvitedUser.objects.filter(
+                    id__in=[invite.id for invite in invites]
+                ).values_list("id", flat=True)
+            )
+            new_emails = [invite.email for invite in invites if invite.id in inserted]
+            existing.update(
+                invite.email for invite in invites if invite.id not in inserted
+            )
+
+        if self.notify and new_emails:
+            self.summary["emails_queued"] += queue_emails(
+                "You've been invited to a quiz",
+                f"Hello,\n\nYou've been invited to take the quiz '{self.quiz.title}'.",
+                new_emails,
+            )
+
+        self.summary["already_invited"] += len(existing)
+        self.summary["invited"] += len(new_emails)
@@ -0,0 +1,264 @@
+# backend/api/services/quiz_search.py
+
+"""
+Full-text search over an account's quizzes (title, topic) and questions
+(text and options), on the index created by migration 0011: tsvector
+columns with GIN indexes on PostgreSQL, FTS5 tables on SQLite. Triggers
+keep the index current on every write path (ORM, bulk_create, update(),
+raw SQL); SQLITE_TRIGGERS are the SQLite ones.
+
+Each quiz appears once, ranked by its best match (the quiz itself or one
+of its questions), with the matching text highlighted between <mark> tags.
+The highlight is HTML: the indexed text in it is escaped.
+
+To keep latency flat on very common terms, at most
+QUIZ_SEARCH_MAX_CANDIDATES matching quizzes and questions are ranked; the
+rest of the matches are not considered.
+"""
+
+import html
+import re
+
+from django.conf import settings
+from django.db import connections, router
+
+from ..models.quiz import Quiz
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# What the database wraps matches in: private use characters, which survive
+# escaping and cannot be confused with markup in the indexed text
+_START_SENTINEL = "\ue000"
+_STOP_SENTINEL = "\ue001"
+MAX_LIMIT = 100
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# The triggers the SQLite index relies on. Migrations keep their own frozen
+# copy (0011, restored by later migrations rebuilding the tables); a change
+# here needs a migration replacing them
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS api_quiz_fts_insert AFTER INSERT ON api_quiz BEGIN
+        INSERT INTO api_quiz_fts (quiz_id, account_id, title, topic)
+        VALUES (new.id, new.account_id, new.title, new.topic);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_quiz_fts_update
+    AFTER UPDATE OF title, topic, account_id ON api_quiz BEGIN
+        UPDATE api_quiz_fts
+        SET account_id = new.account_id, title = new.title, topic = new.topic
+        WHERE quiz_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_quiz_fts_delete AFTER DELETE ON api_quiz BEGIN
+        DELETE FROM api_quiz_fts WHERE quiz_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_question_fts_insert
+    AFTER INSERT ON api_question BEGIN
+        INSERT INTO api_question_fts (
+            rowid, question_text, option_a, option_b, option_c, option_d, option_e
+        ) VALUES (
+            new.id, new.question_text, new.option_a, new.option_b, new.option_c,
+            new.option_d, new.option_e
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_question_fts_delete
+    AFTER DELETE ON api_question BEGIN
+        INSERT INTO api_question_fts (
+            api_question_fts, rowid, question_text, option_a, option_b, option_c,
+            option_d, option_e
+        ) VALUES (
+            'delete', old.id, old.question_text, old.option_a, old.option_b,
+            old.option_c, old.option_d, old.option_e
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_question_fts_update
+    AFTER UPDATE ON api_question BEGIN
+        INSERT INTO api_question_fts (
+            api_question_fts, rowid, question_text, option_a, option_b, option_c,
+            option_d, option_e
+        ) VALUES (
+            'delete', old.id, old.question_text, old.option_a, old.option_b,
+            old.option_c, old.option_d, old.option_e
+        );
+        INSERT INTO api_question_fts (
+            rowid, question_text, option_a, option_b, option_c, option_d, option_e
+        ) VALUES (
+            new.id, new.question_text, new.option_a, new.option_b, new.option_c,
+            new.option_d, new.option_e
+        );
+    END
+    """,
+]
+
+# Only the best-ranked rows get headlines: ts_headline re-parses the text
+POSTGRES_SQL = """
+WITH query AS (SELECT websearch_to_tsquery('english', %(q)s) AS tsq),
+matches AS (
+    (
+        SELECT quiz.id AS quiz_id, NULL::integer AS question_id,
+               ts_rank_cd(quiz.search_vector, query.tsq) AS rank
+        FROM api_quiz quiz, query
+        WHERE quiz.account_id = %(account_id)s AND quiz.search_vector @@ query.tsq
+        LIMIT %(candidates)s
+    )
+    UNION ALL
+    (
+        SELECT question.quiz_id, question.id,
+               ts_rank_cd(question.search_vector, query.tsq)
+        FROM api_question question
+        JOIN api_quiz quiz ON quiz.id = question.quiz_id, query
+        WHERE quiz.account_id = %(account_id)s
+          AND question.search_vector @@ query.tsq
+        LIMIT %(candidates)s
+    )
+),
+best AS (
+    SELECT DISTINCT ON (quiz_id) quiz_id, question_id, rank
+    FROM matches
+    ORDER BY quiz_id, rank DESC
+),
+page AS (
+    SELECT * FROM best ORDER BY rank DESC, quiz_id LIMIT %(limit)s OFFSET %(offset)s
+)
+SELECT page.quiz_id, page.question_id, page.rank,
+       CASE WHEN page.question_id IS NULL THEN
+           ts_headline('english', quiz.title || ' — ' || quiz.topic, query.tsq, %(options)s)
+       ELSE
+           ts_headline(
+               'english',
+               concat_ws(' · ', question.question_text, question.option_a,
+                         question.option_b, question.option_c, question.option_d,
+                         question.option_e),
+               query.tsq,
+               %(options)s
+           )
+       END
+FROM page
+JOIN api_quiz quiz ON quiz.id = page.quiz_id
+LEFT JOIN api_question question ON question.id = page.question_id, query
+ORDER BY page.rank DESC, page.quiz_id
+"""
+
+# SQLite returns the bare columns of the row holding MIN(rank) per group
+SQLITE_SQL = """
+SELECT quiz_id, question_id, -MIN(rank), highlighted FROM (
+    SELECT * FROM (
+        SELECT api_quiz_fts.quiz_id AS quiz_id, NULL AS question_id,
+               bm25(api_quiz_fts, 0, 0, 10.0, 5.0) AS rank,
+               highlight(api_quiz_fts, 2, %(start)s, %(stop)s) || ' — ' ||
+               highlight(api_quiz_fts, 3, %(start)s, %(stop)s) AS highlighted
+        FROM api_quiz_fts
+        WHERE api_quiz_fts MATCH %(q)s
+          AND api_quiz_fts.account_id = %(account_id)s
+        LIMIT %(candidates)s
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT question.quiz_id, question.id,
+               bm25(api_question_fts, 10.0, 2.0, 2.0, 2.0, 2.0, 2.0),
+               snippet(api_question_fts, -1, %(start)s, %(stop)s, '…', 32)
+        FROM api_question_fts
+        JOIN api_question question ON question.id = api_question_fts.rowid
+        JOIN api_quiz quiz ON quiz.id = question.quiz_id
+        WHERE api_question_fts MATCH %(q)s AND quiz.account_id = %(account_id)s
+        LIMIT %(candidates)s
+    )
+)
+GROUP BY quiz_id
+ORDER BY MIN(rank), quiz_id
+LIMIT %(limit)s OFFSET %(offset)s
+"""
+
+
+def _fts5_query(text):
+    """
+    Turns free text into an FTS5 query: every word must match (quoted, so
+    FTS5 operators in the input are taken literally); the last word also
+    matches as a prefix, for search-as-you-type.
+    """
+    terms = _TERM_RE.findall(text)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _search_rows(account_id, text, limit, offset):
+    params = {
+        "account_id": account_id,
+        "limit": limit,
+        "offset": offset,
+        "candidates": getattr(settings, "QUIZ_SEARCH_MAX_CANDIDATES", 1000),
+    }
+    # The database the account's quizzes are read from (see api.sharding)
+    connection = connections[router.db_for_read(Quiz)]
+    if connection.vendor == "postgresql":
+        params["q"] = text
+        params["options"] = (
+            f'StartSel="{_START_SENTINEL}", StopSel="{_STOP_SENTINEL}", '
+            "MaxWords=35, MinWords=15, MaxFragments=1"
+        )
+        sql = POSTGRES_SQL
+    elif connection.vendor == "sqlite":
+        params["q"] = _fts5_query(text)
+        if params["q"] is None:
+            return []
+        params["start"], params["stop"] = _START_SENTINEL, _STOP_SENTINEL
+        sql = SQLITE_SQL
+    else:
+        raise NotImplementedError(
+            f"Quiz search is not available on {connection.vendor}."
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _highlight_html(highlighted):
+    """Escapes the highlighted text, then marks the matches."""
+    return (
+        html.escape(highlighted or "")
+        .replace(_START_SENTINEL, HIGHLIGHT_START)
+        .replace(_STOP_SENTINEL, HIGHLIGHT_STOP)
+    )
+
+
+def search_quizzes(account_id, text, limit=20, offset=0):
+    """
+    Returns up to `limit` results for `text` in the account, best first:
+    dicts with id, title, topic, rank, question_id (None when the quiz
+    itself matched best) and highlight.
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    offset = max(0, int(offset))
+
+    rows = _search_rows(account_id, text, limit, offset)
+    quizzes = Quiz.objects.only("id", "title", "topic").in_bulk(
+        [row[0] for row in rows]
+    )
+    return [
+        {
+            "id": quiz_id,
+            "title": quizzes[quiz_id].title,
+            "topic": quizzes[quiz_id].topic,
+            "rank": round(float(rank), 4),
+            "question_id": question_id,
+            "highlight": _highlight_html(highlighted),
+        }
+        for quiz_id, question_id, rank, highlighted in rows
+        if quiz_id in quizzes
+    ]
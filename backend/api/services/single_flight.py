@@ -0,0 +1,65 @@
+# backend/api/services/single_flight.py
+
+import asyncio
+import threading
+import weakref
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the
+    function, callers arriving while it is in flight wait and share its
+    result (or exception). Nothing is cached once the call finishes.
+
+    `do` coalesces threads (WSGI workers), `ado` coroutines on the same
+    event loop (ASGI workers). Both return (result, shared), where `shared`
+    is True for callers that reused another caller's result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = weakref.WeakKeyDictionary()  # event loop -> {key: task}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def ado(self, key, coroutine_fn):
+        loop = asyncio.get_running_loop()
+        tasks = self._tasks.setdefault(loop, {})
+        task = tasks.get(key)
+        shared = task is not None
+        if not shared:
+            task = tasks[key] = loop.create_task(coroutine_fn())
+            task.add_done_callback(lambda _: tasks.pop(key, None))
+        # Shielded: a waiter that is cancelled (e.g. the client went away)
+        # must not cancel the call the other waiters depend on
+        return await asyncio.shield(task), shared
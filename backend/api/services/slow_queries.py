@@ -0,0 +1,312 @@
+# backend/api/services/slow_queries.py
+
+"""
+Slow-query log: a database execute wrapper that records every query
+slower than SLOW_QUERIES["THRESHOLD_MS"], aggregated by fingerprint (the
+SQL with literals, placeholders and IN / VALUES lists normalized) in a
+bounded per-process table.
+
+Each entry keeps counts and timings, the views that issued the query, the
+application call sites (innermost STACK_DEPTH frames under BASE_DIR) and
+the shapes (types, never values) of its parameters. The table is served
+to staff at /api/ops/slow-queries/, and a daemon thread logs what was
+recorded since its last run to the "api.slow_queries" logger every
+LOG_INTERVAL seconds.
+
+The wrapper is installed on each connection by ServerTimingMiddleware,
+next to its query timer, and reads the view from the request the
+middleware is timing (imported lazily: the middleware imports this
+module). It costs a perf_counter() pair per query; fingerprints and
+stacks are only computed for slow queries.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+logger = logging.getLogger("api.slow_queries")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\?")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES_RE = re.compile(r"VALUES\s*\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))*", re.IGNORECASE)
+_SAVEPOINT_RE = re.compile(r'"s\d+_x\d+"')
+_SPACE_RE = re.compile(r"\s+")
+
+# Per-entry caps on the views, call sites and parameter shapes kept
+MAX_VARIANTS = 5
+
+
+def _config(name, default):
+    return getattr(settings, "SLOW_QUERIES", {}).get(name, default)
+
+
+def fingerprint(sql):
+    """
+    Normalizes `sql` so that queries differing only in literal values or
+    list lengths compare equal.
+    """
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _LIST_RE.sub("(...)", sql)
+    sql = _VALUES_RE.sub("VALUES (...)", sql)
+    sql = _SAVEPOINT_RE.sub('"s?"', sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def param_shape(params, many=False):
+    """Types of `params` (never their values), e.g. "(int, str, NoneType)"."""
+    if many:
+        rows = list(params or [])
+        first = param_shape(rows[0]) if rows else "()"
+        return f"{len(rows)} x {first}"
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        types = (f"{key}: {type(value).__name__}" for key, value in params.items())
+        return "{" + ", ".join(types) + "}"
+    types = [type(value).__name__ for value in params]
+    if len(types) > 8:
+        most_common, _ = Counter(types).most_common(1)[0]
+        return f"({len(types)} params, mostly {most_common})"
+    return "(" + ", ".join(types) + ")"
+
+
+def _call_site(depth):
+    """
+    The innermost `depth` application frames (files under BASE_DIR, other
+    than the execute wrappers'), innermost first.
+    """
+    from ..middleware import server_timing
+
+    base = str(Path(settings.BASE_DIR).resolve())
+    wrappers = {__file__, server_timing.__file__}
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None and len(frames) < depth:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(base)
+            and filename not in wrappers
+            and "site-packages" not in filename
+        ):
+            frames.append(
+                f"{Path(filename).relative_to(base)}:{frame.f_lineno} "
+                f"in {frame.f_code.co_name}"
+            )
+        frame = frame.f_back
+    return " < ".join(frames) or "(no application frame)"
+
+
+def _view_name():
+    """The view handling the current request ("-" outside requests)."""
+    from ..middleware.server_timing import current_timings
+
+    timings = current_timings()
+    request = getattr(timings, "request", None)
+    if request is None:
+        return "-"
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        # Queries from middleware run before the URL is resolved
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return "unmatched"
+    return match.view_name
+
+
+class SlowQueryLog:
+    """
+    Bounded table of slow queries by fingerprint. When MAX_FINGERPRINTS
+    entries exist, a new fingerprint evicts the one with the least total
+    time.
+    """
+
+    def __init__(self, threshold_ms=None, max_fingerprints=None, stack_depth=None):
+        self.threshold_ms = threshold_ms
+        self.max_fingerprints = max_fingerprints
+        self.stack_depth = stack_depth
+        self._lock = threading.Lock()
+        self._entries = {}  # fingerprint id -> entry
+        self._logged = {}  # fingerprint id -> count at the last log dump
+        self.evicted = 0
+        self.since = timezone.now()
+        self._thread = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A forked worker keeps a table of its own, and needs its own thread
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset()
+
+    def _threshold(self):
+        if self.threshold_ms is None:
+            return _config("THRESHOLD_MS", 100)
+        return self.threshold_ms
+
+    def __call__(self, execute, sql, params, many, context):
+        # The execute wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            threshold = self._threshold()
+            if threshold is not None and elapsed_ms >= threshold:
+                try:
+                    self.record(sql, params, many, elapsed_ms, context)
+                except Exception:
+                    logger.exception("Failed to record a slow query.")
+
+    def install(self, connection):
+        """Installs the wrapper on `connection`, once (see the module docstring)."""
+        if self._threshold() is None or self in connection.execute_wrappers:
+            return
+        # At the bottom of the stack: execute_wrapper() blocks pop whatever
+        # wrapper is last on exit
+        connection.execute_wrappers.insert(0, self)
+
+    def record(self, sql, params, many, elapsed_ms, context=None):
+        normalized = fingerprint(sql)
+        key = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+        view = _view_name()
+        depth = self.stack_depth or _config("STACK_DEPTH", 6)
+        site = _call_site(depth)
+        shape = param_shape(params, many)
+        alias = context["connection"].alias if context else "default"
+        now = timezone.now()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._make_room()
+                entry = self._entries[key] = {
+                    "fingerprint": key,
+                    "sql": normalized,
+                    "example": sql[:2000],
+                    "database": alias,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "first_seen": now,
+                    "last_seen": now,
+                    "views": Counter(),
+                    "call_sites": Counter(),
+                    "param_shapes": Counter(),
+                }
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_seen"] = now
+            for field, value in (
+                ("views", view),
+                ("call_sites", site),
+                ("param_shapes", shape),
+            ):
+                variants = entry[field]
+                if value in variants or len(variants) < MAX_VARIANTS:
+                    variants[value] += 1
+        self._ensure_worker()
+
+    def _make_room(self):
+        limit = self.max_fingerprints or _config("MAX_FINGERPRINTS", 500)
+        while len(self._entries) >= limit:
+            key = min(self._entries, key=lambda k: self._entries[k]["total_ms"])
+            del self._entries[key]
+            self._logged.pop(key, None)
+            self.evicted += 1
+
+    def snapshot(self):
+        """The entries, slowest in total first, as JSON-ready dicts."""
+        with self._lock:
+            entries = [self._export(entry) for entry in self._entries.values()]
+        entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return {
+            "threshold_ms": self._threshold(),
+            "since": self.since,
+            "evicted": self.evicted,
+            "queries": entries,
+        }
+
+    @staticmethod
+    def _export(entry):
+        exported = dict(entry)
+        exported["total_ms"] = round(entry["total_ms"], 2)
+        exported["max_ms"] = round(entry["max_ms"], 2)
+        exported["mean_ms"] = round(entry["total_ms"] / entry["count"], 2)
+        for field in ("views", "call_sites", "param_shapes"):
+            exported[field] = dict(entry[field].most_common())
+        return exported
+
+    def reset(self):
+        with self._lock:
+            self._entries = {}
+            self._logged = {}
+            self.evicted = 0
+            self.since = timezone.now()
+
+    def log_new(self, top=None):
+        """
+        Logs the fingerprints seen since the previous call, the most total
+        time first (at most `top`, LOG_TOP by default).
+        """
+        top = top or _config("LOG_TOP", 10)
+        with self._lock:
+            new = []
+            for key, entry in self._entries.items():
+                seen = entry["count"] - self._logged.get(key, 0)
+                if seen:
+                    new.append((seen, self._export(entry)))
+                    self._logged[key] = entry["count"]
+        new.sort(key=lambda item: item[1]["total_ms"], reverse=True)
+        for seen, entry in new[:top]:
+            view, _ = max(entry["views"].items(), key=lambda item: item[1])
+            logger.warning(
+                "slow query %s: %s new, %s total, mean %sms, max %sms, view %s: %s",
+                entry["fingerprint"],
+                seen,
+                entry["count"],
+                entry["mean_ms"],
+                entry["max_ms"],
+                view,
+                entry["sql"][:500],
+                extra={"slow_query": entry},
+            )
+
+    def _ensure_worker(self):
+        interval = _config("LOG_INTERVAL", 300)
+        if self._thread is not None or not interval:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(interval,), name="slow-query-log", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.log_new()
+            except Exception:
+                logger.exception("Failed to log slow queries.")
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,282 @@
+# backend/api/services/token_usage.py
+
+"""
+Per-account AI token accounting and monthly plan quotas.
+
+record() only adds a completion's tokens (and estimated cost) to in-memory
+counters; a daemon thread writes them to AccountTokenUsage every
+AI_TOKEN_QUOTAS["FLUSH_INTERVAL"] seconds with F() increments, so several
+workers can flush the same rows. check_quota() runs before every AI call
+and is a dict lookup: the account's flushed total is re-read at most every
+REFRESH_SECONDS, and this process's usage since is added to it. Usage of
+other workers shows up once they flush and this one refreshes, so a quota
+can be overrun by what the server spends in that interval.
+
+Rows are written on each account's shard (see api.sharding); usage of an
+account being moved stays buffered until the move is over.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .. import sharding
+from ..models.usage import AccountTokenUsage
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("calls", "prompt_tokens", "completion_tokens", "cost_micros")
+
+
+def _config(name, default):
+    return getattr(settings, "AI_TOKEN_QUOTAS", {}).get(name, default)
+
+
+def current_period():
+    """First day of the current month (UTC)."""
+    return timezone.now().date().replace(day=1)
+
+
+def _next_period(period):
+    if period.month == 12:
+        return date(period.year + 1, 1, 1)
+    return date(period.year, period.month + 1, 1)
+
+
+def quota_for(plan):
+    """Tokens per month allowed on `plan`; None when unlimited."""
+    plans = _config("PLANS", {})
+    return plans[plan] if plan in plans else _config("DEFAULT", None)
+
+
+def cost_micros(completion):
+    """Estimated cost of a Completion in millionths of a dollar."""
+    prices = _config("PRICES", {}).get(completion.model)
+    if not prices:
+        return 0
+    prompt_price, completion_price = prices  # dollars per 1M tokens
+    return round(
+        completion.prompt_tokens * prompt_price
+        + completion.completion_tokens * completion_price
+    )
+
+
+class QuotaExceeded(Exception):
+    """The account used up its plan's AI tokens for the month."""
+
+    def __init__(self, used, quota, retry_after):
+        super().__init__(
+            f"AI token quota of {quota} tokens for this month reached ({used} used)."
+        )
+        self.used = used
+        self.quota = quota
+        self.retry_after = retry_after  # seconds until the next period
+
+
+class TokenUsageTracker:
+    """Write-behind AI token counters per account (see the module docstring)."""
+
+    def __init__(self, flush_interval=None):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Flushes and refreshes must not interleave, see _refresh
+        self._flush_lock = threading.Lock()
+        # (account_id, period) -> [calls, prompt, completion, cost_micros]
+        self._pending = {}
+        # account_id -> [period, flushed tokens when read, tokens since, read at]
+        self._totals = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def record(self, account_id, completion):
+        """Counts a Completion against the account (current period)."""
+        period = current_period()
+        figures = (
+            1,
+            completion.prompt_tokens,
+            completion.completion_tokens,
+            cost_micros(completion),
+        )
+        with self._lock:
+            pending = self._pending.setdefault((account_id, period), [0, 0, 0, 0])
+            for index, value in enumerate(figures):
+                pending[index] += value
+            total = self._totals.get(account_id)
+            if total is not None and total[0] == period:
+                total[2] += completion.total_tokens
+        self._ensure_worker()
+
+    def used(self, account_id):
+        """Tokens the account used this period, as far as this process knows."""
+        period = current_period()
+        total = self._totals.get(account_id)
+        if (
+            total is None
+            or total[0] != period
+            or time.monotonic() - total[3] > _config("REFRESH_SECONDS", 60)
+        ):
+            total = self._refresh(account_id, period)
+        return total[1] + total[2]
+
+    def check_quota(self, account):
+        """Raises QuotaExceeded when `account` used up its plan's quota."""
+        quota = quota_for(account.subscription_plan)
+        if quota is None:
+            return
+        used = self.used(account.pk)
+        if used >= quota:
+            next_period = _next_period(current_period())
+            resets_at = datetime(
+                next_period.year, next_period.month, 1, tzinfo=dt_timezone.utc
+            )
+            retry_after = (resets_at - timezone.now()).total_seconds()
+            raise QuotaExceeded(used, quota, max(int(retry_after), 1))
+
+    def _refresh(self, account_id, period):
+        # Under the flush lock, the row holds everything flushed so far and
+        # _pending everything since, so nothing is counted twice or missed
+        with self._flush_lock:
+            database = sharding.directory.database_for(account_id)
+            flushed = (
+                AccountTokenUsage.objects.using(database)
+                .filter(account_id=account_id, period=period)
+                .values_list("prompt_tokens", "completion_tokens")
+                .first()
+            )
+            with self._lock:
+                pending = self._pending.get((account_id, period), [0, 0, 0, 0])
+                total = [
+                    period,
+                    sum(flushed or (0, 0)),
+                    pending[1] + pending[2],
+                    time.monotonic(),
+                ]
+                self._totals[account_id] = total
+        return total
+
+    def flush(self):
+        """Writes the counters buffered so far. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            try:
+                for database, keys in self._placements(pending).items():
+                    with transaction.atomic(using=database):
+                        for account_id, period in keys:
+                            figures = pending[account_id, period]
+                            self._add(
+                                database,
+                                account_id,
+                                period,
+                                dict(zip(FIELDS, figures)),
+                            )
+                    for key in keys:
+                        del pending[key]
+            except Exception:
+                logger.exception("Failed to flush AI token usage; will retry.")
+            # Whatever was not written (accounts being moved, failures)
+            self._requeue(pending)
+
+    def _placements(self, pending):
+        """{database: pending keys of its accounts}, without frozen accounts."""
+        placements = {}
+        for key in pending:
+            database, frozen = sharding.directory.lookup(key[0])
+            if not frozen:
+                placements.setdefault(database, []).append(key)
+        return placements
+
+    def _add(self, database, account_id, period, figures):
+        rows = AccountTokenUsage.objects.using(database).filter(
+            account_id=account_id, period=period
+        )
+        increments = {field: F(field) + value for field, value in figures.items()}
+        if rows.update(**increments):
+            return
+        try:
+            with transaction.atomic(using=database):
+                AccountTokenUsage.objects.using(database).create(
+                    account_id=account_id, period=period, **figures
+                )
+        except IntegrityError:
+            # Another worker created the row meanwhile
+            rows.update(**increments)
+
+    def _requeue(self, pending):
+        with self._lock:
+            for key, figures in pending.items():
+                current = self._pending.setdefault(key, [0, 0, 0, 0])
+                for index, value in enumerate(figures):
+                    current[index] += value
+
+    def _flush_interval(self):
+        if self.flush_interval is None:
+            return _config("FLUSH_INTERVAL", 30)
+        return self.flush_interval
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="token-usage", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self._flush_interval())
+            self._wakeup.clear()
+            self.flush()
+            close_old_connections()
+
+
+token_usage = TokenUsageTracker()
+
+
+def account_token_usage(account, months=12):
+    """
+    The account's plan quota, usage this period and monthly history (from
+    AccountTokenUsage, so the last FLUSH_INTERVAL seconds may be missing).
+    """
+    period = current_period()
+    history = AccountTokenUsage.objects.filter(account=account).order_by("-period")[
+        :months
+    ]
+    quota = quota_for(account.subscription_plan)
+    months_out = [
+        {
+            "period": row.period.strftime("%Y-%m"),
+            "calls": row.calls,
+            "prompt_tokens": row.prompt_tokens,
+            "completion_tokens": row.completion_tokens,
+            "total_tokens": row.total_tokens,
+            "cost_usd": round(row.cost_micros / 1_000_000, 4),
+        }
+        for row in history
+    ]
+    current = next(
+        (row for row in months_out if row["period"] == period.strftime("%Y-%m")), None
+    )
+    used = current["total_tokens"] if current else 0
+    return {
+        "plan": account.subscription_plan,
+        "quota_tokens": quota,
+        "used_tokens": used,
+        "remaining_tokens": None if quota is None else max(quota - used, 0),
+        "resets_on": _next_period(period).isoformat(),
+        "months": months_out,
+    }
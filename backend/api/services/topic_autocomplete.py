@@ -0,0 +1,237 @@
+# backend/api/services/topic_autocomplete.py
+
+"""
+Topic suggestions for the create-quiz form, from a per-account prefix trie.
+
+Topics are weighted by how many of the account's quizzes use them. Every
+trie node caches its TOP_K heaviest topics, so a lookup walks the prefix and
+returns that cached list: its cost depends on the prefix length, not on the
+number of topics. Topics match from their start or from any later word
+("bio" suggests "Molecular biology").
+
+Like the question dedup indexes, each worker keeps one trie per account,
+built lazily from the database with a single aggregate query, updated as
+quizzes are created, renamed or deleted, rebuilt after
+TOPIC_AUTOCOMPLETE["INDEX_TTL"] seconds and evicted least recently used
+beyond TOPIC_AUTOCOMPLETE["MAX_ACCOUNTS"].
+"""
+
+import heapq
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.db.models import Count
+
+from ..models.quiz import Quiz
+
+TOP_K = 10
+MAX_TOPIC_LENGTH = 100  # longer topics are indexed by their first characters
+
+
+def _config(name, default):
+    return getattr(settings, "TOPIC_AUTOCOMPLETE", {}).get(name, default)
+
+
+def normalize_topic(topic):
+    """The key topics are grouped and matched by: case-folded, single-spaced."""
+    return " ".join((topic or "").casefold().split())[:MAX_TOPIC_LENGTH]
+
+
+def _suffixes(key):
+    """The key and the part of it starting at each later word."""
+    yield key
+    for position, char in enumerate(key):
+        if char == " ":
+            yield key[position + 1 :]
+
+
+class _Node:
+    __slots__ = ("children", "keys", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.keys = set()  # topics whose key (or a word suffix) ends here
+        self.top = []  # [(weight, key)], heaviest first
+
+
+class TopicTrie:
+    """Prefix trie of one account's topics with per-node top-K caches."""
+
+    def __init__(self):
+        self.root = _Node()
+        self.weights = Counter()  # key -> quizzes using the topic
+        self.labels = {}  # key -> Counter of spellings, the commonest is shown
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, topic_weights):
+        """A trie of (topic, weight) pairs, computing every top list once."""
+        trie = cls()
+        for topic, weight in topic_weights:
+            key = normalize_topic(topic)
+            if key and weight > 0:
+                trie.weights[key] += weight
+                trie.labels.setdefault(key, Counter())[topic.strip()] += weight
+        for key in trie.weights:
+            for suffix in _suffixes(key):
+                node = trie.root
+                for char in suffix:
+                    child = node.children.get(char)
+                    if child is None:
+                        child = node.children[char] = _Node()
+                    node = child
+                node.keys.add(key)
+        # Children before parents: reversed pre-order
+        order, stack = [], [trie.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children.values())
+        for node in reversed(order):
+            trie._compute_top(node)
+        return trie
+
+    def update(self, topic, delta):
+        """Adds `delta` (usually +1 or -1) to the weight of `topic`."""
+        key = normalize_topic(topic)
+        if not key or not delta:
+            return
+        with self._lock:
+            weight = self.weights[key] + delta
+            labels = self.labels.setdefault(key, Counter())
+            labels[topic.strip()] += delta
+            if weight <= 0:
+                del self.weights[key], self.labels[key]
+            else:
+                self.weights[key] = weight
+                self.labels[key] = +labels  # drops spellings no longer used
+            for suffix in _suffixes(key):
+                self._refresh(suffix, key, weight > 0)
+
+    def _refresh(self, suffix, key, present):
+        # Walk down (creating nodes), then recompute the cached top lists
+        # bottom-up along the path from the node's own keys and its
+        # children's lists
+        path = [self.root]
+        for char in suffix:
+            node = path[-1].children.get(char)
+            if node is None:
+                if not present:
+                    return
+                node = path[-1].children[char] = _Node()
+            path.append(node)
+        if present:
+            path[-1].keys.add(key)
+        else:
+            path[-1].keys.discard(key)
+
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            self._compute_top(node)
+            if depth and not node.top and not node.children:
+                del path[depth - 1].children[suffix[depth - 1]]
+
+    def _compute_top(self, node):
+        if not node.keys and len(node.children) == 1:
+            # Most nodes are links in a chain: share the child's list (top
+            # lists are replaced, never mutated in place)
+            (child,) = node.children.values()
+            node.top = child.top
+            return
+        candidates = {key: self.weights[key] for key in node.keys}
+        for child in node.children.values():
+            for weight, key in child.top:
+                candidates[key] = weight
+        node.top = heapq.nsmallest(
+            TOP_K, ((weight, key) for key, weight in candidates.items()), key=_heaviest
+        )
+
+    def suggest(self, prefix, limit=TOP_K):
+        """[(label, weight)] of the heaviest topics matching `prefix`."""
+        with self._lock:
+            node = self.root
+            for char in normalize_topic(prefix):
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            return [
+                (self.labels[key].most_common(1)[0][0], weight)
+                for weight, key in node.top[:limit]
+            ]
+
+    def __len__(self):
+        return len(self.weights)
+
+
+def _heaviest(item):
+    weight, key = item
+    return (-weight, key)
+
+
+class _AccountTries:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tries = OrderedDict()
+
+    def get(self, account_id):
+        ttl = _config("INDEX_TTL", 600)
+        with self._lock:
+            trie = self._tries.get(account_id)
+            if trie is not None and time.monotonic() - trie.built_at < ttl:
+                self._tries.move_to_end(account_id)
+                return trie
+        trie = self._build(account_id)
+        with self._lock:
+            self._tries[account_id] = trie
+            self._tries.move_to_end(account_id)
+            while len(self._tries) > _config("MAX_ACCOUNTS", 200):
+                self._tries.popitem(last=False)
+        return trie
+
+    def update(self, account_id, topic, delta):
+        """Applies a topic change to the account's trie, if it is loaded."""
+        with self._lock:
+            trie = self._tries.get(account_id)
+        if trie is not None:  # Otherwise built from the database on next use
+            trie.update(topic, delta)
+
+    def _build(self, account_id):
+        rows = (
+            Quiz.objects.filter(account_id=account_id)
+            .exclude(topic="")
+            .values_list("topic")
+            .annotate(quizzes=Count("id"))
+            .order_by()
+        )
+        return TopicTrie.build(rows)
+
+    def clear(self):
+        with self._lock:
+            self._tries.clear()
+
+
+account_tries = _AccountTries()
+
+
+def suggest_topics(account_id, prefix="", limit=TOP_K):
+    """
+    Returns up to `limit` (at most TOP_K) suggestions for `prefix` as dicts
+    with topic and quiz_count, most used first. An empty prefix returns the
+    account's most used topics.
+    """
+    limit = max(1, min(int(limit), TOP_K))
+    return [
+        {"topic": label, "quiz_count": weight}
+        for label, weight in account_tries.get(account_id).suggest(prefix, limit)
+    ]
+
+
+def topic_added(account_id, topic):
+    account_tries.update(account_id, topic, 1)
+
+
+def topic_removed(account_id, topic):
+    account_tries.update(account_id, topic, -1)
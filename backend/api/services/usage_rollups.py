@@ -0,0 +1,267 @@
+# backend/api/services/usage_rollups.py
+
+"""
+Daily usage rollups (AccountDailyUsage, GroupDailyUsage), so the usage
+dashboard never aggregates Quiz, QuizEvent or UserResult rows live.
+
+run_rollups() aggregates the source rows timestamped between the watermark
+and now minus USAGE_ROLLUPS["SETTLE_SECONDS"], in windows of at most
+USAGE_ROLLUPS["CHUNK_HOURS"]. Each window is added to the rollups and
+advances the watermark in one short transaction, so backfilling years of
+history never holds locks for long, and an interrupted run resumes where
+it stopped. The settle delay leaves time for transactions still in flight
+to commit rows timestamped before it.
+
+Each shard (see api.sharding) rolls up its own rows, with a watermark of
+its own: run_rollups() covers the shard of the current routing (on_shard()).
+
+Results are attributed to the group their quiz is in when they are rolled
+up. Rows deleted after being rolled up stay counted: the rollups are a
+history.
+"""
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    Exists,
+    Min,
+    OuterRef,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .. import sharding
+from ..models.quiz import Quiz
+from ..models.quiz_event import QuizEvent
+from ..models.usage import AccountDailyUsage, GroupDailyUsage, RollupWatermark
+from ..models.user import UserResult
+
+WATERMARK = "daily_usage"
+ACCOUNT_FIELDS = (
+    "quizzes_created",
+    "ai_generations",
+    "ai_tokens",
+    "results",
+    "participants",
+    "score_total",
+)
+GROUP_FIELDS = ("results", "participants", "score_total")
+
+
+def _config(name, default):
+    return getattr(settings, "USAGE_ROLLUPS", {}).get(name, default)
+
+
+def _sources_start():
+    """Timestamp of the oldest source row, or None when there are none."""
+    starts = [
+        Quiz.objects.aggregate(start=Min("created_at"))["start"],
+        QuizEvent.objects.aggregate(start=Min("timestamp"))["start"],
+        UserResult.objects.aggregate(start=Min("completed_at"))["start"],
+    ]
+    starts = [start for start in starts if start is not None]
+    return min(starts) if starts else None
+
+
+def _is_new_participant():
+    """Whether a result is its participant's first on the quiz."""
+    earlier = UserResult.objects.filter(quiz=OuterRef("quiz"), pk__lt=OuterRef("pk"))
+    return Case(
+        When(user__isnull=False, then=~Exists(earlier.filter(user=OuterRef("user")))),
+        When(
+            anonymous_id__isnull=False,
+            then=~Exists(
+                earlier.filter(user__isnull=True, anonymous_id=OuterRef("anonymous_id"))
+            ),
+        ),
+        default=Value(True),
+        output_field=BooleanField(),
+    )
+
+
+def aggregate_window(start, end):
+    """
+    Aggregates source rows timestamped in [start, end). Returns
+    ({(account_id, day): Counter}, {(account_id, group_id, day): Counter}).
+    """
+    accounts = defaultdict(Counter)
+    groups = defaultdict(Counter)
+
+    quizzes = (
+        Quiz.objects.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(day=TruncDate("created_at"))
+        .values("account_id", "day")
+        .annotate(created=Count("pk"))
+        .order_by()
+    )
+    for row in quizzes:
+        accounts[row["account_id"], row["day"]]["quizzes_created"] += row["created"]
+
+    generations = (
+        QuizEvent.objects.filter(
+            event_type=QuizEvent.AI_GENERATION,
+            timestamp__gte=start,
+            timestamp__lt=end,
+        )
+        .annotate(day=TruncDate("timestamp"))
+        .values("quiz__account_id", "day")
+        .annotate(calls=Count("pk"), tokens=Sum("tokens"))
+        .order_by()
+    )
+    for row in generations:
+        totals = accounts[row["quiz__account_id"], row["day"]]
+        totals["ai_generations"] += row["calls"]
+        totals["ai_tokens"] += row["tokens"] or 0
+
+    results = (
+        UserResult.objects.filter(completed_at__gte=start, completed_at__lt=end)
+        .annotate(day=TruncDate("completed_at"), is_new=_is_new_participant())
+        .values("quiz__account_id", "quiz__group_id", "day")
+        .annotate(
+            results=Count("pk"),
+            participants=Count("pk", filter=Q(is_new=True)),
+            score_total=Sum("score"),
+        )
+        .order_by()
+    )
+    for row in results:
+        account_id, day = row["quiz__account_id"], row["day"]
+        figures = {field: row[field] or 0 for field in GROUP_FIELDS}
+        accounts[account_id, day].update(figures)
+        groups[account_id, row["quiz__group_id"], day].update(figures)
+
+    return accounts, groups
+
+
+def _add_to_rollups(model, key_fields, fields, totals):
+    """Adds {key: Counter} totals to the rows of `model` keyed by key_fields."""
+    if not totals:
+        return
+    rows = model.objects.filter(
+        account_id__in={key[0] for key in totals},
+        day__in={key[-1] for key in totals},
+    )
+    rows = {tuple(getattr(row, name) for name in key_fields): row for row in rows}
+    updated, created = [], []
+    for key, figures in totals.items():
+        row = rows.get(key)
+        if row is None:
+            row = model(**dict(zip(key_fields, key)))
+            created.append(row)
+        else:
+            updated.append(row)
+        for field in fields:
+            setattr(row, field, getattr(row, field) + figures[field])
+    model.objects.bulk_update(updated, fields, batch_size=500)
+    model.objects.bulk_create(created, batch_size=500)
+
+
+def run_rollups(until=None, max_windows=None):
+    """
+    Rolls up source rows up to `until` (default: now) minus the settle
+    delay, at most `max_windows` windows. Returns the windows processed.
+    Concurrent runs serialize on the watermark row.
+    """
+    chunk = timedelta(hours=_config("CHUNK_HOURS", 24))
+    horizon = (until or timezone.now()) - timedelta(
+        seconds=_config("SETTLE_SECONDS", 300)
+    )
+    RollupWatermark.objects.get_or_create(name=WATERMARK)
+
+    processed = 0
+    while max_windows is None or processed < max_windows:
+        with sharding.atomic():
+            watermark = RollupWatermark.objects.select_for_update().get(
+                name=WATERMARK
+            )
+            start = watermark.position or _sources_start()
+            if start is None or start >= horizon:
+                break
+            end = min(start + chunk, horizon)
+            accounts, groups = aggregate_window(start, end)
+            _add_to_rollups(
+                AccountDailyUsage, ("account_id", "day"), ACCOUNT_FIELDS, accounts
+            )
+            _add_to_rollups(
+                GroupDailyUsage,
+                ("account_id", "group_id", "day"),
+                GROUP_FIELDS,
+                groups,
+            )
+            watermark.position = end
+            watermark.save(update_fields=["position", "updated_at"])
+        processed += 1
+    return processed
+
+
+def rolled_up_until():
+    """The watermark: source rows before it are included in the rollups."""
+    return (
+        RollupWatermark.objects.filter(name=WATERMARK)
+        .values_list("position", flat=True)
+        .first()
+    )
+
+
+def _average(score_total, results):
+    return round(score_total / results, 2) if results else None
+
+
+def account_usage(account, months=12):
+    """
+    Monthly usage of the account over the last `months` months (including
+    the current one), read from the rollups only. Months without activity
+    are omitted.
+    """
+    today = timezone.now().date()
+    month_index = today.year * 12 + today.month - 1 - (months - 1)
+    since = today.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+
+    totals = (
+        AccountDailyUsage.objects.filter(account=account, day__gte=since)
+        .annotate(month=TruncMonth("day"))
+        .values("month")
+        .annotate(**{field: Sum(field) for field in ACCOUNT_FIELDS})
+        .order_by("month")
+    )
+    group_totals = (
+        GroupDailyUsage.objects.filter(account=account, day__gte=since)
+        .annotate(month=TruncMonth("day"))
+        .values("month", "group_id", "group__name")
+        .annotate(**{field: Sum(field) for field in GROUP_FIELDS})
+        .order_by("month", "group__name")
+    )
+    groups_by_month = defaultdict(list)
+    for row in group_totals:
+        groups_by_month[row["month"]].append(
+            {
+                "group_id": row["group_id"],
+                "group_name": row["group__name"],
+                "results": row["results"],
+                "participants": row["participants"],
+                "average_score": _average(row["score_total"], row["results"]),
+            }
+        )
+
+    return [
+        {
+            "month": row["month"].strftime("%Y-%m"),
+            "quizzes_created": row["quizzes_created"],
+            "ai_generations": row["ai_generations"],
+            "ai_tokens": row["ai_tokens"],
+            "results": row["results"],
+            "participants": row["participants"],
+            "average_score": _average(row["score_total"], row["results"]),
+            "groups": groups_by_month[row["month"]],
+        }
+        for row in totals
+    ]
@@ -0,0 +1,410 @@
+# backend/api/sharding.py
+
+"""
+Tenant placement: every account's data lives on one database, its shard,
+as recorded in the AccountPlacement directory (accounts without a
+placement live on "default").
+
+TENANT_MODELS (an account's groups and quizzes, everything hanging off
+them, its usage rollups and token usage) are routed by ShardRouter to the
+account's shard. Users, accounts, memberships, the directory and the rest
+of the control plane always stay on "default"; tenant tables reference
+them without database constraints. RollupWatermark is kept per shard, for
+jobs that run over a whole shard (on_shard()).
+
+The account a query is for comes from, in order:
+- the row it is about (router hints): the database it was loaded from,
+  else its account_id;
+- the request: the quiz, group, question or result in its URL (or, for
+  submitted results, the quiz they are for), else the requested account
+  (route_to_account(): URL, X-Account-ID header, token claim, then the
+  membership);
+- account_routing() and on_shard() blocks, for commands and threads.
+Tenant queries with none of these go to "default" (and ReplicaRouter).
+
+transaction.atomic() only covers "default": tenant writes use atomic()
+from this module, which opens a transaction on the tenant's shard too
+(the two commit one after the other, there are no distributed ones).
+
+Moving an account (api.services.account_moves) freezes it for the final
+pass: its writes raise AccountMoving (503) until the cutover. Placements
+are cached per process for CACHE_SECONDS; a move waits that long after
+freezing and after the cutover, so that every process has seen them.
+
+Rows keep their primary keys when they move, so integer keys must be
+unique across shards: each shard allocates them from its own block of
+ID_RANGE ids, the block of its position in TENANT_SHARDS["SHARDS"] (which
+therefore only ever grows at the end); see preserve_id_range().
+
+With no shard besides "default", none of this costs a query.
+"""
+
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .db_routing import current_state, request_routing
+from .models.placement import AccountPlacement
+from .models.quiz import Quiz
+from .models.user import Account
+
+# Placed with their account
+TENANT_MODELS = frozenset(
+    {
+        "api.Group",
+        "api.Quiz",
+        "api.SharedQuiz",
+        "api.Question",
+        "api.InvitedUser",
+        "api.QuizEvent",
+        "api.UserResult",
+        "api.UserQuizHistory",
+        "api.AccountDailyUsage",
+        "api.GroupDailyUsage",
+        "api.AccountTokenUsage",
+    }
+)
+# On every shard, with rows of its own
+SHARD_LOCAL_MODELS = TENANT_MODELS | {"api.RollupWatermark"}
+
+# Bound on the cached placements and quiz owners, per process
+MAX_CACHED = 10000
+
+
+def _config(name, default):
+    return getattr(settings, "TENANT_SHARDS", {}).get(name, default)
+
+
+def shards():
+    """Every shard alias, "default" first."""
+    return list(_config("SHARDS", [DEFAULT_DB_ALIAS]))
+
+
+def is_sharded():
+    return len(shards()) > 1
+
+
+class AccountMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "This account is being moved; retry in a few seconds."
+    default_code = "account_moving"
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = _config("CACHE_SECONDS", 30)  # Retry-After
+
+
+class ShardDirectory:
+    """Cached AccountPlacement lookups, and the account of each quiz."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._placements = {}  # account id -> (expires at, database, frozen)
+        self._quiz_accounts = {}  # quiz id -> account id (never changes)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def lookup(self, account_id):
+        """(database, frozen) of `account_id`, at most CACHE_SECONDS old."""
+        now = time.monotonic()
+        cached = self._placements.get(account_id)
+        if cached is not None and cached[0] > now:
+            return cached[1], cached[2]
+        row = (
+            AccountPlacement.objects.using(DEFAULT_DB_ALIAS)
+            .filter(account_id=account_id)
+            .values_list("database", "state")
+            .first()
+        )
+        database, state = row or (DEFAULT_DB_ALIAS, AccountPlacement.ACTIVE)
+        frozen = state == AccountPlacement.FROZEN
+        with self._lock:
+            if len(self._placements) >= MAX_CACHED:
+                self._placements.clear()
+            expires = now + _config("CACHE_SECONDS", 30)
+            self._placements[account_id] = (expires, database, frozen)
+        return database, frozen
+
+    def database_for(self, account_id):
+        return self.lookup(account_id)[0]
+
+    def account_of_quiz(self, quiz_id):
+        """The account owning `quiz_id` (looked for on every shard), or None."""
+        account_id = self._quiz_accounts.get(quiz_id)
+        if account_id is None:
+            account_id = owner_of(Quiz, quiz_id)
+            if account_id is None:
+                return None
+            with self._lock:
+                if len(self._quiz_accounts) >= MAX_CACHED:
+                    self._quiz_accounts.clear()
+                self._quiz_accounts[quiz_id] = account_id
+        return account_id
+
+    def forget(self, account_id=None):
+        """Drops cached placements (of one account, or all)."""
+        with self._lock:
+            if account_id is None:
+                self._placements.clear()
+            else:
+                self._placements.pop(account_id, None)
+
+
+directory = ShardDirectory()
+
+
+def owner_of(model, pk, account_field="account_id"):
+    """The account owning `model` row `pk` (looked for on every shard), or None."""
+    for alias in shards():
+        account_id = (
+            model.objects.using(alias)
+            .filter(pk=pk)
+            .values_list(account_field, flat=True)
+            .first()
+        )
+        if account_id is not None:
+            return account_id
+    return None
+
+
+# Routing context
+
+
+def route_to_account(account_id):
+    """
+    Routes the current request's tenant queries to `account_id`'s shard,
+    unless an earlier source already chose the account.
+    """
+    state = current_state()
+    if state is None or state.account_id is not None or account_id is None:
+        return
+    try:
+        state.account_id = int(account_id)
+    except (TypeError, ValueError):
+        pass  # Not an account: no membership matches it either
+
+
+def route_to_quiz(quiz_id):
+    """
+    Routes the current request's tenant queries to the shard of the quiz's
+    account, whichever account the request was for.
+    """
+    state = current_state()
+    if state is None or not quiz_id or not is_sharded():
+        return
+    account_id = directory.account_of_quiz(quiz_id)
+    if account_id is not None:
+        state.account_id = account_id
+
+
+def route_to_row(model, pk, account_field="account_id"):
+    """
+    Routes the current request's tenant queries to the shard of the account
+    owning the `model` row `pk` (`account_field` leads to its account).
+    """
+    state = current_state()
+    if state is None or not is_sharded():
+        return
+    account_id = owner_of(model, pk, account_field)
+    if account_id is not None:
+        state.account_id = account_id
+
+
+@contextmanager
+def account_routing(account_id):
+    """Routes the block's tenant queries to `account_id`'s shard."""
+    with request_routing() as state:
+        state.account_id = account_id
+        yield state
+
+
+@contextmanager
+def on_shard(alias):
+    """Routes the block's tenant (and shard-local) queries to `alias`."""
+    with request_routing() as state:
+        state.shard = alias
+        yield state
+
+
+def current_database():
+    """The shard tenant queries currently go to (by default, "default")."""
+    state = current_state()
+    if state is None or not is_sharded():
+        return DEFAULT_DB_ALIAS
+    if state.shard:
+        return state.shard
+    if state.account_id is not None:
+        return directory.database_for(state.account_id)
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def _atomic(savepoint):
+    with ExitStack() as stack:
+        stack.enter_context(transaction.atomic(savepoint=savepoint))
+        database = current_database()
+        if database != DEFAULT_DB_ALIAS:
+            stack.enter_context(transaction.atomic(using=database, savepoint=savepoint))
+        yield
+
+
+def atomic(func=None, savepoint=True):
+    """
+    transaction.atomic() on "default" and on the current tenant's shard;
+    a decorator too, with or without arguments.
+    """
+    if callable(func):
+        return _atomic(savepoint)(func)
+    return _atomic(savepoint)
+
+
+# Integer primary keys
+
+
+def _id_range(alias):
+    size = _config("ID_RANGE", 10**12)
+    floor = shards().index(alias) * size
+    return floor, floor + size
+
+
+def _sequenced_models():
+    from django.apps import apps
+
+    return [
+        model
+        for model in apps.get_models()
+        if model._meta.label in SHARD_LOCAL_MODELS
+        and isinstance(model._meta.pk, models.AutoField)
+    ]
+
+
+def _sequence_position(cursor, vendor, table, column):
+    """The last id the table's sequence handed out (0: none yet)."""
+    if vendor == "postgresql":
+        cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [table, column])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT last_value, is_called FROM {sequence}")
+        last_value, is_called = cursor.fetchone()
+        return last_value if is_called else last_value - 1
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [table])
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def _set_sequence_position(cursor, vendor, table, column, position):
+    if vendor == "postgresql":
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, %s), %s, %s)",
+            [table, column, max(position, 1), position > 0],
+        )
+        return
+    cursor.execute(
+        "UPDATE sqlite_sequence SET seq = %s WHERE name = %s", [position, table]
+    )
+    if not cursor.rowcount:
+        cursor.execute(
+            "INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)",
+            [table, position],
+        )
+
+
+@contextmanager
+def preserve_id_range(alias):
+    """
+    Moves `alias`'s id sequences into its block of ids (see the module
+    docstring) and keeps them there across the block, in which rows are
+    written with the ids they had on other shards (SQLite bumps its
+    sequences past explicit ids; PostgreSQL does not).
+
+    SQLite also allocates past the largest id in the table, so there a
+    shard holding rows from a later block allocates after them: only
+    PostgreSQL keeps the blocks apart (SQLite shards are for local tests).
+    """
+    connection = connections[alias]
+    if connection.vendor not in ("postgresql", "sqlite"):
+        yield
+        return
+    floor, ceiling = _id_range(alias)
+    positions = {}
+    with connection.cursor() as cursor:
+        for model in _sequenced_models():
+            table, column = model._meta.db_table, model._meta.pk.column
+            position = _sequence_position(cursor, connection.vendor, table, column)
+            if not floor <= position < ceiling:
+                position = floor
+                _set_sequence_position(
+                    cursor, connection.vendor, table, column, position
+                )
+            positions[table, column] = position
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for (table, column), position in positions.items():
+                current = _sequence_position(cursor, connection.vendor, table, column)
+                if not floor <= current < ceiling:
+                    _set_sequence_position(
+                        cursor, connection.vendor, table, column, position
+                    )
+
+
+class ShardRouter:
+    """
+    Database router: see the module docstring. Chained before
+    api.db_routing.ReplicaRouter, which routes whatever it leaves (None):
+    the control plane, and tenants on "default".
+    """
+
+    def _route(self, model, hints, write):
+        if not is_sharded():
+            return None
+        others = shards()[1:]
+        instance = hints.get("instance")
+        loaded_from = getattr(getattr(instance, "_state", None), "db", None)
+        if model._meta.label not in SHARD_LOCAL_MODELS:
+            # Also for relations of rows loaded from a shard
+            return DEFAULT_DB_ALIAS if loaded_from in others else None
+
+        state = current_state()
+        if state is not None and state.shard:
+            return state.shard
+        account_id = None
+        if isinstance(instance, Account):
+            account_id = instance.pk  # Relation assignment: the new row's account
+        if getattr(instance, "_meta", None) is None or (
+            instance._meta.label not in SHARD_LOCAL_MODELS
+        ):
+            loaded_from = None  # Users and accounts are loaded from "default"
+        else:
+            account_id = getattr(instance, "account_id", None)
+        if account_id is None and state is not None:
+            account_id = state.account_id
+        database = loaded_from
+        if account_id is not None:
+            placed_on, frozen = directory.lookup(account_id)
+            if write and frozen:
+                raise AccountMoving()
+            database = loaded_from or placed_on
+        return database if database in others else None
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints, write=False)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints, write=True)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Shards carry the whole schema; their control plane tables stay empty
+        return True if db in shards()[1:] else None
@@ -0,0 +1,58 @@
+import json
+import tempfile
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, override_settings
+
+from ..services.ai_backends import AIBackendError, get_ai_backend
+
+MESSAGES = [{"role": "user", "content": "Generate 2 questions about 'rivers'."}]
+
+
+class RecordReplayBackendTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+
+    def _settings(self, mode):
+        return override_settings(
+            AI_BACKENDS={
+                "fake": {"BACKEND": "api.services.ai_backends.FakeBackend"},
+                "recorded": {
+                    "BACKEND": "api.services.ai_backends.RecordReplayBackend",
+                    "OPTIONS": {"PATH": self.path, "MODE": mode, "TARGET": "fake"},
+                },
+            }
+        )
+
+    def test_recorded_completion_is_replayed(self):
+        with self._settings("record"):
+            recorded = get_ai_backend("recorded").complete(MESSAGES, temperature=0)
+            self.assertEqual(get_ai_backend("recorded").metrics.snapshot()["calls"], 1)
+            self.assertEqual(get_ai_backend("fake").metrics.snapshot()["calls"], 1)
+
+        with self._settings("replay"):
+            backend = get_ai_backend("recorded")
+            replayed = backend.complete(MESSAGES, temperature=0)
+            async_replayed = async_to_sync(backend.acomplete)(MESSAGES, temperature=0)
+            self.assertEqual(backend.metrics.snapshot()["calls"], 2)
+
+        (recording,) = Path(self.path).glob("*.json")
+        self.assertEqual(json.loads(recording.read_text())["response"], recorded)
+        for completion in (replayed, async_replayed):
+            self.assertEqual(str(completion), str(recorded))
+            self.assertEqual(completion.usage, recorded.usage)
+
+    def test_async_completion_is_recorded(self):
+        with self._settings("auto"):
+            recorded = async_to_sync(get_ai_backend("recorded").acomplete)(MESSAGES)
+        with self._settings("replay"):
+            self.assertEqual(get_ai_backend("recorded").complete(MESSAGES), recorded)
+
+    def test_replay_fails_without_a_recording(self):
+        with self._settings("replay"):
+            with self.assertRaises(AIBackendError):
+                get_ai_backend("recorded").complete(MESSAGES)
+            self.assertEqual(get_ai_backend("recorded").metrics.snapshot()["errors"], 1)
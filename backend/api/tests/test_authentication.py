@@ -0,0 +1,120 @@
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..authentication import (
+    ACCOUNT_ID_CLAIM,
+    ACCOUNT_ROLE_CLAIM,
+    MEMBERSHIP_VERSION_CLAIM,
+)
+from ..benchmarks import auth_headers, seed_tenant
+from ..models.user import AccountMembership
+from ..serializers.user_serializer import MyTokenObtainPairSerializer
+from ..services.activity_tracker import activity_tracker
+
+
+class MembershipClaimsTests(TestCase):
+    def setUp(self):
+        # Refreshes record activity, written behind: write it while the
+        # tables exist
+        self.addCleanup(activity_tracker.flush)
+        tenant = seed_tenant("claims", groups=1, quizzes_per_group=1, members=1)
+        self.account, self.owner = tenant["account"], tenant["owner"]
+        self.quiz = tenant["quizzes"][0]
+        self.admin = tenant["users"][1]
+        self.membership = AccountMembership.objects.get(user=self.admin)
+        self.membership.role = "admin"
+        self.membership.save()
+        self.headers = auth_headers(self.admin)  # As issued at login
+
+    def _edit_quiz(self, headers=None):
+        return self.client.put(
+            reverse("quiz_detail", kwargs={"quiz_id": self.quiz.id}),
+            {"title": "Renamed"},
+            content_type="application/json",
+            **(self.headers if headers is None else headers),
+        )
+
+    def _refresh(self, user, refresh=None):
+        refresh = refresh or str(MyTokenObtainPairSerializer.get_token(user))
+        response = self.client.post(
+            reverse("token_refresh"),
+            {"refresh": refresh},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return AccessToken(response.json()["access"])
+
+    def test_write_with_current_claims(self):
+        self.assertEqual(self._edit_quiz().status_code, 200)
+
+    def test_role_change_rejects_stale_writes(self):
+        response = self.client.patch(
+            reverse(
+                "manage_user",
+                kwargs={"account_id": self.account.id, "user_id": self.admin.id},
+            ),
+            {"role": "member"},
+            content_type="application/json",
+            **auth_headers(self.owner, self.account),
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self._edit_quiz()
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "membership_changed")
+
+    def test_removal_rejects_stale_writes(self):
+        self.membership.delete()
+
+        response = self._edit_quiz()
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "membership_changed")
+
+    def test_refresh_reads_the_current_membership(self):
+        AccountMembership.objects.filter(pk=self.membership.pk).update(
+            role="member", version=F("version") + 1
+        )
+
+        access = self._refresh(self.admin)
+
+        self.assertEqual(access[ACCOUNT_ID_CLAIM], self.account.id)
+        self.assertEqual(access[ACCOUNT_ROLE_CLAIM], "member")
+        self.assertEqual(access[MEMBERSHIP_VERSION_CLAIM], self.membership.version + 1)
+        # Accepted, and authorized by the new role
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {access}"}
+        self.assertEqual(self._edit_quiz(headers).status_code, 403)
+
+    def test_refresh_drops_a_revoked_account(self):
+        other = seed_tenant("other", groups=0, members=0)["account"]
+        AccountMembership.objects.create(account=other, user=self.admin, role="member")
+        refresh = str(MyTokenObtainPairSerializer.get_token(self.admin))
+        self.membership.delete()
+
+        access = self._refresh(self.admin, refresh)
+
+        # Falls back to the remaining membership
+        self.assertEqual(access[ACCOUNT_ID_CLAIM], other.id)
+        self.assertEqual(access[ACCOUNT_ROLE_CLAIM], "member")
+
+        AccountMembership.objects.filter(user=self.admin).delete()
+        access = self._refresh(self.admin)
+        for claim in (ACCOUNT_ID_CLAIM, ACCOUNT_ROLE_CLAIM, MEMBERSHIP_VERSION_CLAIM):
+            self.assertNotIn(claim, access)
+
+    def test_reads_run_no_auth_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("quiz_detail", kwargs={"quiz_id": self.quiz.id}), **self.headers
+            )
+
+        self.assertEqual(response.status_code, 200)
+        tables = ("api_user", "api_accountmembership")
+        self.assertEqual(
+            [q["sql"] for q in queries if any(t in q["sql"] for t in tables)], []
+        )
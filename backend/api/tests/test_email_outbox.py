@@ -0,0 +1,134 @@
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from ..benchmarks import auth_headers, seed_tenant
+from ..models import OutboxEmail
+from ..models.user import AccountMembership
+from ..services.email_outbox import deliver_outbox, queue_email
+
+
+class FlakyBackend(locmem.EmailBackend):
+    """locmem backend refusing recipients starting with "bad"."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.to[0].startswith("bad"):
+                raise SMTPException("mailbox unavailable")
+        return super().send_messages(messages)
+
+
+def _queue(*recipients):
+    return [queue_email("Subject", "Body", recipient) for recipient in recipients]
+
+
+def _make_due(*emails):
+    OutboxEmail.objects.filter(pk__in=[e.pk for e in emails]).update(
+        next_attempt_at=now() - timedelta(seconds=1)
+    )
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        self.tenant = seed_tenant("outbox", groups=0, members=0)
+        self.url = f"/api/accounts/{self.tenant['account'].id}/invite/"
+        self.headers = auth_headers(self.tenant["owner"], self.tenant["account"])
+
+    def test_invitation_is_queued_with_the_membership(self):
+        response = self.client.post(
+            self.url, {"email": "new@example.com"}, **self.headers
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(
+            AccountMembership.objects.filter(user__email="new@example.com").exists()
+        )
+        queued = OutboxEmail.objects.get(recipient="new@example.com")
+        self.assertEqual(queued.status, "pending")
+        self.assertEqual(mail.outbox, [])  # Only sent by deliver_outbox()
+
+    def test_invitation_rolls_back_with_the_membership(self):
+        with mock.patch(
+            "api.views.account_views.AccountMembershipSerializer",
+            side_effect=RuntimeError("after the email was queued"),
+        ):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.url, {"email": "new@example.com"}, **self.headers)
+
+        self.assertFalse(
+            AccountMembership.objects.filter(user__email="new@example.com").exists()
+        )
+        self.assertFalse(OutboxEmail.objects.exists())
+
+
+class DeliveryTests(TestCase):
+    def test_batch_is_sent_over_one_connection(self):
+        _queue("a@example.com", "b@example.com", "c@example.com")
+
+        with mock.patch(
+            "api.services.email_outbox.get_connection", wraps=get_connection
+        ) as connect:
+            counts = deliver_outbox()
+
+        connect.assert_called_once()
+        self.assertEqual(counts, {"sent": 3, "retried": 0, "dead": 0})
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            ["a@example.com", "b@example.com", "c@example.com"],
+        )
+        self.assertEqual(OutboxEmail.objects.filter(status="sent").count(), 3)
+
+    def test_failure_is_retried_with_backoff(self):
+        bad, good = _queue("bad@example.com", "good@example.com")
+
+        started = now()
+        counts = deliver_outbox(connection=FlakyBackend())
+
+        self.assertEqual(counts, {"sent": 1, "retried": 1, "dead": 0})
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), ("pending", 1))
+        self.assertIn("mailbox unavailable", bad.last_error)
+        self.assertGreaterEqual(bad.next_attempt_at, started + timedelta(seconds=30))
+        # Not due again yet
+        self.assertEqual(
+            deliver_outbox(connection=FlakyBackend()),
+            {"sent": 0, "retried": 0, "dead": 0},
+        )
+
+        _make_due(bad)
+        deliver_outbox(connection=FlakyBackend())
+        bad.refresh_from_db()
+        self.assertEqual(bad.attempts, 2)
+        # Doubled after every failed attempt
+        self.assertGreaterEqual(bad.next_attempt_at, now() + timedelta(seconds=59))
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_dead_lettered_after_max_attempts(self):
+        (bad,) = _queue("bad@example.com")
+
+        deliver_outbox(connection=FlakyBackend())
+        _make_due(bad)
+        counts = deliver_outbox(connection=FlakyBackend())
+
+        self.assertEqual(counts, {"sent": 0, "retried": 0, "dead": 1})
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), ("dead", 2))
+        _make_due(bad)
+        self.assertEqual(deliver_outbox(), {"sent": 0, "retried": 0, "dead": 0})
+
+    def test_retried_email_clears_its_error_once_sent(self):
+        (email,) = _queue("bad@example.com")
+        deliver_outbox(connection=FlakyBackend())
+        _make_due(email)
+
+        self.assertEqual(deliver_outbox()["sent"], 1)
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("sent", 2))
+        self.assertIsNone(email.last_error)
@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from ..benchmarks import seed_tenant
+from ..models import OutboxEmail
+from ..models.user import AccountMembership, User
+from ..services.member_provisioning_service import MemberProvisioningService
+
+
+class ProvisioningTests(TestCase):
+    def setUp(self):
+        self.account = seed_tenant("roster", groups=0, members=0)["account"]
+
+    def _provision(self, *rows):
+        return MemberProvisioningService(self.account).provision(rows)
+
+    def test_existing_user_is_matched_in_any_case(self):
+        user = User.objects.create_user(email="Mixed.Case@Example.com", password="x")
+        User.objects.filter(pk=user.pk).update(email="Mixed.Case@Example.com")
+
+        report = self._provision({"email": "mixed.case@example.com"})
+
+        self.assertEqual(report["summary"]["added"], 1)
+        self.assertEqual(report["results"][0]["user_id"], user.id)
+        self.assertEqual(User.objects.filter(email__iexact=user.email).count(), 1)
+        user.refresh_from_db()
+        self.assertEqual(user.email, "Mixed.Case@Example.com")
+
+    def test_rows_inserted_concurrently_are_added_not_created(self):
+        rival = {}
+
+        def insert_first(objs, **kwargs):
+            # Another request inserts the same email between lookup and insert
+            rival["user"] = User.objects.create_user(
+                email="race@example.com", password="x"
+            )
+            return original(objs, **kwargs)
+
+        original = User.objects.bulk_create
+        with mock.patch.object(User.objects, "bulk_create", side_effect=insert_first):
+            report = self._provision(
+                {"email": "race@example.com"}, {"email": "fresh@example.com"}
+            )
+
+        race, fresh = report["results"]
+        self.assertEqual((race["outcome"], fresh["outcome"]), ("added", "created"))
+        self.assertEqual(race["user_id"], rival["user"].id)
+        self.assertTrue(
+            AccountMembership.objects.filter(
+                account=self.account, user=rival["user"]
+            ).exists()
+        )
+        invitations = dict(OutboxEmail.objects.values_list("recipient", "body"))
+        self.assertIn("set your password", invitations["fresh@example.com"])
+        self.assertNotIn("set your password", invitations["race@example.com"])
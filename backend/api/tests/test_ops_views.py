@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase, override_settings
+
+URL = "/api/ops/metrics/"
+
+
+@override_settings(METRICS={"TOKEN": "s3cret"})
+class MetricsAccessTests(SimpleTestCase):
+    def test_scrape_with_the_token(self):
+        response = self.client.get(URL, HTTP_AUTHORIZATION="Bearer s3cret")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("http_requests_total", response.content.decode())
+
+    def test_local_address_alone_is_refused(self):
+        # The test client connects from 127.0.0.1, as a local proxy would
+        self.assertEqual(self.client.get(URL).status_code, 403)
+
+    def test_wrong_token_is_refused(self):
+        for header in ("Bearer wrong", "Basic s3cret", "s3cret", "Bearer"):
+            with self.subTest(header=header):
+                response = self.client.get(URL, HTTP_AUTHORIZATION=header)
+                self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS={"TOKEN": None})
+    def test_refused_without_a_configured_token(self):
+        response = self.client.get(URL, HTTP_AUTHORIZATION="Bearer ")
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,38 @@
+from django.test import TestCase
+
+from ..benchmarks.query_budgets import (
+    DATASETS,
+    SCENARIOS,
+    api_url_names,
+    check_budgets,
+    seed_budget_tenant,
+)
+from ..services.activity_tracker import activity_tracker
+from ..services.token_usage import token_usage
+
+
+class QueryBudgetTests(TestCase):
+    """
+    The check of `manage.py check_query_budgets`, on the test database:
+    every endpoint, against a small and a large tenant.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants = {size: seed_budget_tenant(size) for size in DATASETS}
+
+    def test_every_endpoint_has_a_scenario(self):
+        scenarios = {scenario.url_name for scenario in SCENARIOS}
+        self.assertEqual(api_url_names() - scenarios, set())
+
+    def test_endpoints_are_within_budget(self):
+        # Drop what the rolled back requests left to write behind, while the
+        # tables still exist (see benchmark_database)
+        self.addCleanup(token_usage.flush)
+        self.addCleanup(activity_tracker.flush)
+
+        report = check_budgets(self.tenants)
+
+        for entry in report:
+            with self.subTest(entry["label"]):
+                self.assertEqual(entry["problems"], [], entry)
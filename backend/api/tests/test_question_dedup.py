@@ -0,0 +1,83 @@
+from django.test import TestCase
+
+from ..benchmarks import auth_headers, seed_tenant
+from ..services.question_dedup import account_indexes
+
+CAPITAL = {
+    "question_text": "What is the capital city of France?",
+    "option_a": "Paris",
+    "option_b": "Lyon",
+    "option_c": "Marseille",
+    "correct_answer": "a",
+}
+PLANET = {
+    "question_text": "Which planet is the largest in the solar system?",
+    "option_a": "Jupiter",
+    "option_b": "Mars",
+    "correct_answer": "a",
+}
+
+
+class QuestionDedupViewTests(TestCase):
+    def setUp(self):
+        account_indexes.clear()
+        tenant = seed_tenant("dedup", groups=1, quizzes_per_group=2, members=0)
+        self.quiz, self.other_quiz = tenant["quizzes"]
+        self.headers = auth_headers(tenant["owner"], tenant["account"])
+
+    def _create(self, quiz, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                f"/api/questions/create/{quiz.id}/",
+                data,
+                content_type="application/json",
+                **self.headers,
+            )
+
+    def _detail(self, method, question_id, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(
+                f"/api/questions/{question_id}/",
+                data,
+                content_type="application/json",
+                **self.headers,
+            )
+
+    def test_duplicate_in_the_same_quiz_is_refused(self):
+        # The account's index is loaded before the first question is created
+        # and must pick it up without a rebuild
+        created = self._create(self.quiz, CAPITAL)
+        self.assertEqual(created.status_code, 201)
+
+        response = self._create(self.quiz, {**CAPITAL, "option_c": "Nice"})
+
+        self.assertEqual(response.status_code, 409)
+        (duplicate,) = response.json()["duplicate_questions"]
+        self.assertEqual(duplicate["duplicate_of"], created.json()["id"])
+        self.assertEqual(self.quiz.questions.filter(option_a="Paris").count(), 1)
+
+    def test_duplicate_of_another_quiz_is_created_and_reported(self):
+        self._create(self.other_quiz, CAPITAL)
+
+        response = self._create(self.quiz, CAPITAL)
+
+        self.assertEqual(response.status_code, 201)
+        (duplicate,) = response.json()["duplicate_questions"]
+        self.assertEqual(duplicate["quiz_id"], self.other_quiz.id)
+        self.assertFalse(duplicate["dropped"])
+
+    def test_edited_question_no_longer_matches_its_old_text(self):
+        question_id = self._create(self.quiz, CAPITAL).json()["id"]
+
+        edited = self._detail("put", question_id, {**PLANET, "quiz": self.quiz.id})
+        self.assertEqual(edited.status_code, 200)
+
+        self.assertEqual(self._create(self.quiz, CAPITAL).status_code, 201)
+        self.assertEqual(self._create(self.quiz, PLANET).status_code, 409)
+
+    def test_deleted_question_no_longer_matches(self):
+        question_id = self._create(self.quiz, CAPITAL).json()["id"]
+
+        self.assertEqual(self._detail("delete", question_id).status_code, 204)
+
+        self.assertEqual(self._create(self.quiz, CAPITAL).status_code, 201)
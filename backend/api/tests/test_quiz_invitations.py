@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from ..benchmarks import seed_tenant
+from ..models import OutboxEmail
+from ..models.quiz_invite import InvitedUser
+from ..services.quiz_invitation_service import QuizInvitationService
+
+
+class QuizInvitationTests(TestCase):
+    def setUp(self):
+        tenant = seed_tenant("invites", groups=1, quizzes_per_group=1, members=0)
+        self.quiz = tenant["quizzes"][0]
+
+    def _recipients(self):
+        return sorted(OutboxEmail.objects.values_list("recipient", flat=True))
+
+    def test_summary(self):
+        InvitedUser.objects.create(quiz=self.quiz, email="old@example.com")
+        emails = ["A@example.com", "a@example.com ", "old@example.com", "nope"]
+
+        summary = QuizInvitationService(self.quiz, batch_size=2).invite(
+            emails + ["b@example.com"]
+        )
+
+        self.assertEqual(
+            summary,
+            {
+                "received": 5,
+                "invalid": 1,
+                "duplicates": 1,
+                "already_invited": 1,
+                "invited": 2,
+                "emails_queued": 2,
+            },
+        )
+        self.assertEqual(self._recipients(), ["a@example.com", "b@example.com"])
+
+    def test_address_invited_concurrently_is_not_counted_or_emailed(self):
+        bulk_create = InvitedUser.objects.bulk_create
+
+        def after_a_concurrent_upload(invites, **kwargs):
+            # Committed by another request after this one's SELECT
+            InvitedUser.objects.create(quiz=self.quiz, email="race@example.com")
+            return bulk_create(invites, **kwargs)
+
+        with mock.patch.object(
+            InvitedUser.objects, "bulk_create", side_effect=after_a_concurrent_upload
+        ):
+            summary = QuizInvitationService(self.quiz).invite(
+                ["race@example.com", "new@example.com"]
+            )
+
+        self.assertEqual((summary["invited"], summary["already_invited"]), (1, 1))
+        self.assertEqual(summary["emails_queued"], 1)
+        self.assertEqual(self._recipients(), ["new@example.com"])
+        self.assertEqual(InvitedUser.objects.filter(quiz=self.quiz).count(), 2)
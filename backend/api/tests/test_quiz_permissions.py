@@ -0,0 +1,78 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from ..benchmarks import auth_headers, seed_tenant
+from ..models.quiz import Quiz
+from ..models.user import AccountMembership
+
+
+class SecondAccountTests(TestCase):
+    """
+    The SPA sends no X-Account-ID: the token's account is the user's first
+    one, and rows of their other accounts are reached by id.
+    """
+
+    def setUp(self):
+        first = seed_tenant("first", groups=1, quizzes_per_group=1, members=1)
+        second = seed_tenant("second", groups=1, quizzes_per_group=1, members=0)
+        self.user, self.member = first["owner"], first["users"][1]
+        self.account = second["account"]
+        self.quiz = second["quizzes"][0]
+        Quiz.objects.filter(pk=self.quiz.pk).update(access_control="invitation")
+        self.headers = auth_headers(self.user)
+
+    def _join(self, user, role):
+        AccountMembership.objects.create(account=self.account, user=user, role=role)
+
+    def _edit(self, headers=None):
+        return self.client.put(
+            reverse("quiz_detail", kwargs={"quiz_id": self.quiz.id}),
+            {"title": "Renamed"},
+            content_type="application/json",
+            **(self.headers if headers is None else headers),
+        )
+
+    def _invite(self, url_name, headers=None):
+        return self.client.post(
+            reverse(url_name, kwargs={"quiz_id": self.quiz.id}),
+            {"emails": ["guest@example.com"]},
+            content_type="application/json",
+            **(self.headers if headers is None else headers),
+        )
+
+    def test_admin_of_the_quiz_account_edits_and_deletes(self):
+        self._join(self.user, "admin")
+
+        self.assertEqual(self._edit().status_code, 200)
+        response = self.client.delete(
+            reverse("quiz_detail", kwargs={"quiz_id": self.quiz.id}), **self.headers
+        )
+        self.assertEqual(response.status_code, 204)
+
+    def test_owner_of_the_quiz_account_invites(self):
+        self.account.transfer_ownership(self.user)
+
+        for url_name in (
+            "invite_users_to_quiz",
+            "bulk_invite_users_to_quiz",
+            "invite_users_to_quiz_async",
+        ):
+            with self.subTest(url_name=url_name):
+                self.assertEqual(self._invite(url_name).status_code, 201)
+
+    def test_role_in_the_quiz_account_is_checked(self):
+        # An owner of their own account, an admin of the quiz's
+        self._join(self.user, "admin")
+        self.assertEqual(self._invite("invite_users_to_quiz").status_code, 403)
+
+        # A member of the quiz's account, an admin elsewhere
+        self._join(self.member, "member")
+        AccountMembership.objects.filter(user=self.member).exclude(
+            account=self.account
+        ).update(role="admin")
+        self.assertEqual(self._edit(auth_headers(self.member)).status_code, 403)
+
+    def test_non_members_are_refused(self):
+        self.assertEqual(self._edit().status_code, 403)
+        self.assertEqual(self._invite("bulk_invite_users_to_quiz").status_code, 403)
+        self.assertEqual(Quiz.objects.get(pk=self.quiz.pk).title, self.quiz.title)
@@ -0,0 +1,154 @@
+from django.db import connection
+from django.test import TestCase
+
+from ..benchmarks import seed_tenant
+from ..models.question import Question
+from ..models.quiz import Quiz
+from ..services.quiz_search import SQLITE_TRIGGERS, search_quizzes
+
+
+def _normalized(sql):
+    return " ".join(sql.replace("IF NOT EXISTS ", "").split())
+
+
+def _question(quiz, text, *options):
+    options = options or ("Yes", "No")
+    return Question(
+        quiz=quiz,
+        question_text=text,
+        **dict(zip(("option_a", "option_b", "option_c"), options)),
+        correct_answer="a",
+    )
+
+
+class QuizSearchTests(TestCase):
+    """Runs on SQLite, through the FTS5 tables of migration 0011."""
+
+    def setUp(self):
+        tenant = seed_tenant("search", groups=0, members=0)
+        self.account = tenant["account"]
+        self.other_account = seed_tenant("other", groups=0, members=0)["account"]
+
+    def _quiz(self, title, topic="General", account=None):
+        return Quiz.objects.create(
+            account=account or self.account, title=title, topic=topic
+        )
+
+    def _ids(self, text):
+        return [result["id"] for result in search_quizzes(self.account.id, text)]
+
+    def test_orm_writes_are_indexed(self):
+        quiz = self._quiz("Volcano basics", topic="Geology")
+        question = _question(quiz, "Where does magma come from?")
+        question.save()
+        self.assertEqual(self._ids("volcano"), [quiz.id])
+        self.assertEqual(self._ids("magma"), [quiz.id])
+
+        quiz.title = "Glacier basics"
+        quiz.save()
+        question.question_text = "How do moraines form?"
+        question.save()
+        self.assertEqual(self._ids("volcano"), [])
+        self.assertEqual(self._ids("magma"), [])
+        self.assertEqual(self._ids("glacier"), [quiz.id])
+        self.assertEqual(self._ids("moraines"), [quiz.id])
+
+        question.delete()
+        self.assertEqual(self._ids("moraines"), [])
+        quiz.delete()
+        self.assertEqual(self._ids("glacier"), [])
+
+    def test_bulk_writes_are_indexed(self):
+        quiz = self._quiz("Ocean currents")
+        Question.objects.bulk_create(
+            [_question(quiz, "What drives the Gulf Stream?"), _question(quiz, "Tides?")]
+        )
+        self.assertEqual(self._ids("gulf stream"), [quiz.id])
+
+        Quiz.objects.filter(pk=quiz.pk).update(title="Atmosphere")
+        Question.objects.filter(quiz=quiz).update(question_text="What is ozone?")
+        self.assertEqual(self._ids("ocean"), [])
+        self.assertEqual(self._ids("gulf"), [])
+        self.assertEqual(self._ids("atmosphere"), [quiz.id])
+        self.assertEqual(self._ids("ozone"), [quiz.id])
+
+        Question.objects.filter(quiz=quiz).delete()
+        self.assertEqual(self._ids("ozone"), [])
+        Quiz.objects.filter(pk=quiz.pk).delete()
+        self.assertEqual(self._ids("atmosphere"), [])
+
+    def test_moving_a_quiz_moves_it_between_accounts(self):
+        quiz = self._quiz("Rainforest canopy")
+        Quiz.objects.filter(pk=quiz.pk).update(account=self.other_account)
+
+        self.assertEqual(self._ids("rainforest"), [])
+        self.assertEqual(
+            [r["id"] for r in search_quizzes(self.other_account.id, "rainforest")],
+            [quiz.id],
+        )
+
+    def test_results_stay_within_the_account(self):
+        self._quiz("Desert ecology", account=self.other_account)
+        self.assertEqual(self._ids("desert"), [])
+
+    def test_title_matches_rank_above_option_matches(self):
+        in_option = self._quiz("Weather")
+        _question(in_option, "Which is a cloud type?", "Cirrus", "Basalt").save()
+        in_title = self._quiz("Cirrus clouds")
+        in_topic = self._quiz("Sky", topic="Cirrus")
+
+        self.assertEqual(self._ids("cirrus"), [in_title.id, in_topic.id, in_option.id])
+
+    def test_quiz_appears_once_with_its_best_match(self):
+        quiz = self._quiz("Tornado safety")
+        _question(quiz, "When do tornado sirens sound?").save()
+        _question(quiz, "What is a tornado watch?").save()
+
+        (result,) = search_quizzes(self.account.id, "tornado")
+        self.assertEqual(result["id"], quiz.id)
+        self.assertIsNone(result["question_id"])
+
+    def test_matches_are_highlighted(self):
+        quiz = self._quiz("Earthquakes", topic="Seismology")
+        question = _question(quiz, "What does a seismograph record?")
+        question.save()
+
+        (by_title,) = search_quizzes(self.account.id, "earthquakes")
+        self.assertEqual(
+            by_title["highlight"], "<mark>Earthquakes</mark> — Seismology"
+        )
+
+        (by_question,) = search_quizzes(self.account.id, "seismograph")
+        self.assertEqual(by_question["question_id"], question.id)
+        self.assertIn("<mark>seismograph</mark>", by_question["highlight"])
+
+    def test_indexed_markup_is_escaped(self):
+        quiz = self._quiz("<script>alert(1)</script> storms", topic="<b>Weather</b>")
+        _question(quiz, "Is <img src=x onerror=alert(1)> a hail image?").save()
+
+        (by_title,) = search_quizzes(self.account.id, "storms")
+        self.assertEqual(
+            by_title["highlight"],
+            "&lt;script&gt;alert(1)&lt;/script&gt; <mark>storms</mark>"
+            " — &lt;b&gt;Weather&lt;/b&gt;",
+        )
+
+        (by_question,) = search_quizzes(self.account.id, "hail")
+        self.assertIn("&lt;img src=x onerror=alert(1)&gt;", by_question["highlight"])
+        self.assertIn("<mark>hail</mark>", by_question["highlight"])
+        self.assertNotIn("<img", by_question["highlight"])
+
+    def test_last_term_matches_as_a_prefix(self):
+        quiz = self._quiz("Photosynthesis")
+        self.assertEqual(self._ids("photo"), [quiz.id])
+        self.assertEqual(self._ids('photo" OR "x'), [])  # Operators are literal
+
+    def test_migrated_triggers_are_the_ones_the_search_relies_on(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' "
+                "AND name LIKE 'api_%%_fts_%%'"
+            )
+            migrated = {_normalized(sql) for (sql,) in cursor.fetchall()}
+
+        self.assertEqual(migrated, {_normalized(sql) for sql in SQLITE_TRIGGERS})
@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..benchmarks import auth_headers, seed_tenant
+from ..db_routing import replica_health
+from ..models.user import UserResult
+
+
+REPLICAS = {**settings.REPLICA_ROUTING, "REPLICAS": ["replica_1"]}
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    replica_1 only has the users, not the results written to "default", so
+    a read that finds a result was served by the primary. A
+    TransactionTestCase: inside a TestCase's transaction every read goes to
+    the primary.
+    """
+
+    databases = {"default", "replica_1"}
+
+    def setUp(self):
+        # Not for the whole class: replica_1 would not be flushed after each
+        # test (replicas are not migrated)
+        self.enterContext(override_settings(REPLICA_ROUTING=REPLICAS))
+        replica_health._checks.clear()
+        cache.clear()
+        tenant = seed_tenant("replicas", groups=1, quizzes_per_group=1, members=1)
+        self.quiz = tenant["quizzes"][0]
+        self.owner, self.member = tenant["users"][:2]
+        self.headers = auth_headers(self.owner, tenant["account"])
+        # Replicated long ago; the results below are not
+        for user in (self.owner, self.member):
+            user.save(using="replica_1", force_insert=True)
+        self.result = UserResult.objects.create(quiz=self.quiz, user=self.owner, score=1)
+
+    def _get_result(self, result_id, headers=None):
+        return self.client.get(
+            reverse("get_quiz_result", kwargs={"result_id": result_id}),
+            **(self.headers if headers is None else headers),
+        )
+
+    def _submit(self):
+        response = self.client.post(
+            reverse("submit_quiz_results"),
+            {"quiz_id": self.quiz.id, "score": 4},
+            content_type="application/json",
+            **self.headers,
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self._get_result(self.result.id).status_code, 404)
+
+    def test_unreachable_replica_is_skipped(self):
+        with mock.patch.object(replica_health, "_measure", return_value=None):
+            self.assertEqual(self._get_result(self.result.id).status_code, 200)
+
+    @override_settings(REPLICA_ROUTING={**REPLICAS, "MAX_LAG_SECONDS": 5})
+    def test_lagging_replica_is_skipped(self):
+        with mock.patch.object(replica_health, "_measure", return_value=60.0):
+            self.assertEqual(self._get_result(self.result.id).status_code, 200)
+
+    def test_writer_reads_its_writes(self):
+        result_id = self._submit()
+        # The SPA sends no cookies: the pin follows the token's user
+        self.client.cookies.clear()
+
+        response = self._get_result(result_id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["score"], 4)
+
+    def test_pin_is_per_user(self):
+        result_id = self._submit()
+        self.client.cookies.clear()
+
+        self.assertEqual(
+            self._get_result(result_id, auth_headers(self.member)).status_code, 404
+        )
+
+    def test_pin_expires(self):
+        result_id = self._submit()
+        self.client.cookies.clear()
+
+        with mock.patch("api.middleware.replica_routing.time.time") as now:
+            now.return_value = 10**10
+            self.assertEqual(self._get_result(result_id).status_code, 404)
+
+    def test_pin_cookie_for_clients_without_a_token(self):
+        self._submit()
+
+        self.assertIn(settings.REPLICA_ROUTING["COOKIE"], self.client.cookies)
+        self.assertEqual(self._get_result(self.result.id, headers={}).status_code, 200)
@@ -0,0 +1,42 @@
+import json
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..log_formatters import JSONFormatter
+from ..middleware.server_timing import ServerTimingMiddleware
+
+
+def _view(request):
+    return HttpResponse("ok")
+
+
+class TimingLogTests(SimpleTestCase):
+    def _get(self):
+        return ServerTimingMiddleware(_view)(RequestFactory().get("/api/quizzes/"))
+
+    def test_fast_requests_are_not_logged_by_default(self):
+        with self.assertNoLogs("api.timing"):
+            response = self._get()
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    @override_settings(SERVER_TIMING={"LOG_THRESHOLD_MS": None})
+    def test_logging_can_be_disabled(self):
+        with self.assertNoLogs("api.timing"):
+            self._get()
+
+    @override_settings(SERVER_TIMING={"LOG_THRESHOLD_MS": 0})
+    def test_record_is_formatted_as_json(self):
+        with self.assertLogs("api.timing") as logs:
+            self._get()
+
+        entry = json.loads(JSONFormatter().format(logs.records[0]))
+        self.assertEqual(entry["logger"], "api.timing")
+        self.assertEqual(entry["level"], "INFO")
+        timing = entry["timing"]
+        self.assertEqual(
+            (timing["method"], timing["path"], timing["status"]),
+            ("GET", "/api/quizzes/", 200),
+        )
+        self.assertEqual(timing["db_queries"], 0)
+        self.assertIn("total_ms", timing)
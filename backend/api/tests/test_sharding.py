@@ -0,0 +1,286 @@
+from django.conf import settings
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import sharding
+from ..benchmarks import auth_headers, seed_tenant
+from ..models.group import Group
+from ..models.placement import AccountPlacement
+from ..models.question import Question
+from ..models.quiz import Quiz
+from ..models.user import AccountMembership, UserResult
+from ..services.account_moves import MOVED_MODELS, AccountMove, MoveError
+
+SHARDS = {
+    **settings.TENANT_SHARDS,
+    "SHARDS": ["default", "shard_1", "shard_2"],
+    "CACHE_SECONDS": 0,
+}
+
+
+def _counts(account, alias):
+    """{model name: rows of the account on `alias`}"""
+    return {
+        model.__name__: model.objects.using(alias)
+        .filter(**{account_field: account.pk})
+        .count()
+        for model, account_field in MOVED_MODELS
+    }
+
+
+@override_settings(TENANT_SHARDS=SHARDS)
+class ShardTestCase(TestCase):
+    databases = {"default", "shard_1", "shard_2"}
+
+    def setUp(self):
+        # Placements are cached across tests; the ids of rolled back
+        # accounts are reused
+        sharding.directory.forget()
+        self.addCleanup(sharding.directory.forget)
+        self.tenant = seed_tenant(
+            "moved", groups=2, quizzes_per_group=2, results_per_quiz=2
+        )
+        self.account = self.tenant["account"]
+        self.headers = auth_headers(self.tenant["owner"], self.account)
+        self.other = seed_tenant("stays", groups=1, quizzes_per_group=1)
+
+    def _move(self, target="shard_1", **kwargs):
+        return AccountMove(self.account.pk, target, chunk_size=3, wait=0).run(
+            **kwargs
+        )
+
+
+class AccountMoveTests(ShardTestCase):
+    def test_move(self):
+        before = _counts(self.account, "default")
+
+        report = self._move()
+
+        self.assertEqual(_counts(self.account, "shard_1"), before)
+        self.assertFalse(any(_counts(self.account, "default").values()))
+        self.assertEqual(report["copied"], sum(before.values()))
+        self.assertEqual(report["purged"], sum(before.values()))
+        placement = AccountPlacement.objects.get(account=self.account)
+        self.assertEqual(
+            (placement.database, placement.state), ("shard_1", AccountPlacement.ACTIVE)
+        )
+        # Other accounts stay where they are
+        self.assertEqual(
+            Quiz.objects.using("default").filter(account=self.other["account"]).count(),
+            1,
+        )
+
+    def test_keep_source(self):
+        before = _counts(self.account, "default")
+
+        report = self._move(keep_source=True)
+
+        self.assertEqual(report["purged"], 0)
+        self.assertEqual(_counts(self.account, "default"), before)
+        self.assertEqual(_counts(self.account, "shard_1"), before)
+        self.assertEqual(sharding.directory.database_for(self.account.pk), "shard_1")
+
+    def test_moving_again_replaces_a_stale_copy(self):
+        self._move("shard_1", keep_source=True)
+        self._move("default", keep_source=True)
+        Group.objects.using("shard_1").filter(account=self.account).update(name="stale")
+        Group.objects.using("default").filter(account=self.account).first().delete()
+        expected = _counts(self.account, "default")
+
+        self._move("shard_1")
+
+        self.assertEqual(_counts(self.account, "shard_1"), expected)
+        self.assertFalse(
+            Group.objects.using("shard_1").filter(name="stale").exists()
+        )
+
+    def test_mismatch_aborts_the_move(self):
+        quiz = self.tenant["quizzes"][0]
+
+        class SkippedFinalPass(AccountMove):
+            def _sync(self, strict):
+                return (0, 0, 0) if strict else super()._sync(strict)
+
+        def progress(line):
+            if line.startswith("frozen"):
+                # Written before the freeze took effect everywhere
+                Quiz.objects.using("default").filter(pk=quiz.pk).update(
+                    title="Changed"
+                )
+
+        move = SkippedFinalPass(
+            self.account.pk, "shard_1", chunk_size=3, wait=0, progress=progress
+        )
+        with self.assertRaisesMessage(MoveError, "Copies differ"):
+            move.run()
+
+        placement = AccountPlacement.objects.get(account=self.account)
+        self.assertEqual(
+            (placement.database, placement.state), ("default", AccountPlacement.ACTIVE)
+        )
+        self.assertFalse(any(_counts(self.account, "shard_1").values()))
+        self.assertEqual(Quiz.objects.using("default").get(pk=quiz.pk).title, "Changed")
+
+    def test_invalid_moves(self):
+        for target, message in [
+            ("default", "on default already"),
+            ("nope", "not a shard"),
+        ]:
+            with self.subTest(target=target):
+                with self.assertRaisesMessage(MoveError, message):
+                    self._move(target)
+
+
+class RoutingTests(ShardTestCase):
+    def setUp(self):
+        super().setUp()
+        self._move()
+        self.quiz = Quiz.objects.using("shard_1").filter(account=self.account).first()
+
+    def _get(self, url_name, headers=None, **kwargs):
+        return self.client.get(
+            reverse(url_name, kwargs=kwargs),
+            **(self.headers if headers is None else headers),
+        )
+
+    def test_rows_in_the_url(self):
+        group = Group.objects.using("shard_1").filter(account=self.account).first()
+        question = Question.objects.using("shard_1").filter(quiz=self.quiz).first()
+        result = UserResult.objects.using("shard_1").filter(quiz=self.quiz).first()
+        # No account in the request: the row decides
+        anonymous = {}
+        other_owner = auth_headers(self.other["owner"], self.other["account"])
+
+        self.assertEqual(
+            self._get("quiz_detail", quiz_id=self.quiz.id).json()["title"],
+            self.quiz.title,
+        )
+        self.assertEqual(self._get("group_detail", group_id=group.id).status_code, 200)
+        self.assertEqual(
+            self._get("question_detail", question_id=question.id).json()["id"],
+            question.id,
+        )
+        for headers in (self.headers, other_owner, anonymous):
+            with self.subTest(headers=headers):
+                response = self._get("get_quiz_result", headers, result_id=result.id)
+                self.assertEqual(response.json()["id"], result.id)
+
+    def test_account_header(self):
+        # Another membership in the token; the header picks the account
+        member = self.other["owner"]
+        AccountMembership.objects.create(
+            account=self.account, user=member, role="admin"
+        )
+        headers = {
+            **auth_headers(member, self.other["account"]),
+            "HTTP_X_ACCOUNT_ID": str(self.account.pk),
+        }
+
+        response = self._get("list_quizzes", headers)
+
+        self.assertEqual(len(response.json()), 4)
+
+    def test_token_claims(self):
+        headers = auth_headers(self.tenant["owner"])  # No X-Account-ID
+
+        self.assertEqual(len(self._get("list_quizzes", headers).json()), 4)
+
+        response = self.client.post(
+            reverse("group_list"),
+            {"name": "New"},
+            content_type="application/json",
+            **headers,
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(
+            Group.objects.using("shard_1").filter(pk=response.json()["id"]).exists()
+        )
+
+    def test_submitted_result_follows_its_quiz(self):
+        response = self.client.post(
+            reverse("submit_quiz_results"),
+            {"quiz_id": self.quiz.id, "score": 5},
+            content_type="application/json",
+            **auth_headers(self.other["owner"], self.other["account"]),
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(
+            UserResult.objects.using("shard_1")
+            .filter(pk=response.json()["id"])
+            .exists()
+        )
+
+    def test_commands_and_threads(self):
+        with sharding.account_routing(self.account.pk):
+            self.assertEqual(Quiz.objects.count(), 4)
+        with sharding.on_shard("shard_1"):
+            self.assertEqual(Quiz.objects.count(), 4)
+        self.assertEqual(Quiz.objects.count(), 1)  # "default": the other account
+
+
+@override_settings(TENANT_SHARDS={**SHARDS, "CACHE_SECONDS": 5})
+class FrozenAccountTests(ShardTestCase):
+    def setUp(self):
+        super().setUp()
+        AccountPlacement.objects.create(
+            account=self.account,
+            database="default",
+            state=AccountPlacement.FROZEN,
+            moving_to="shard_1",
+        )
+        sharding.directory.forget()
+
+    def _create_group(self, headers):
+        return self.client.post(
+            reverse("group_list"),
+            {"name": "During the move"},
+            content_type="application/json",
+            **headers,
+        )
+
+    def test_writes_get_503(self):
+        response = self._create_group(self.headers)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+        self.assertFalse(Group.objects.filter(name="During the move").exists())
+
+    def test_reads_and_other_accounts_go_on(self):
+        self.assertEqual(
+            len(self.client.get(reverse("list_quizzes"), **self.headers).json()), 4
+        )
+        other = auth_headers(self.other["owner"], self.other["account"])
+        self.assertEqual(self._create_group(other).status_code, 201)
+
+
+@override_settings(TENANT_SHARDS={**SHARDS, "ID_RANGE": 1000})
+class PreserveIdRangeTests(TestCase):
+    databases = {"default", "shard_1", "shard_2"}
+
+    def _sequence(self, alias):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = %s",
+                [Group._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def test_ids_come_from_the_shards_block(self):
+        account = seed_tenant("ids", groups=0, quizzes_per_group=0)["account"]
+
+        with sharding.preserve_id_range("shard_2"):
+            first = Group.objects.using("shard_2").create(account=account, name="a")
+            # A moved row keeps the id it had elsewhere
+            Group.objects.using("shard_2").create(id=5, account=account, name="b")
+            Group.objects.using("shard_2").create(id=3500, account=account, name="c")
+        Group.objects.using("shard_2").filter(id=3500).delete()
+
+        self.assertEqual(first.id, 2001)
+        # Back in the block; SQLite then allocates past the largest id
+        self.assertEqual(self._sequence("shard_2"), 2000)
+        second = Group.objects.using("shard_2").create(account=account, name="d")
+        self.assertEqual(second.id, 2002)
+        self.assertEqual(self._sequence("shard_1"), 0)  # Untouched
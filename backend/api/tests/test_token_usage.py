@@ -0,0 +1,129 @@
+from unittest import mock
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import sharding
+from ..benchmarks import auth_headers, seed_tenant
+from ..models.placement import AccountPlacement
+from ..models.usage import AccountTokenUsage
+from ..services.ai_backends import Completion
+from ..services.token_usage import (
+    QuotaExceeded,
+    TokenUsageTracker,
+    current_period,
+)
+
+QUOTAS = {**settings.AI_TOKEN_QUOTAS, "PLANS": {"Free Plan": 100, "Pro Plan": None}}
+
+
+class Tracker(TokenUsageTracker):
+    """Flushed by the tests only, not by a worker thread."""
+
+    def _ensure_worker(self):
+        pass
+
+
+def _completion(prompt_tokens, completion_tokens):
+    return Completion("text", prompt_tokens, completion_tokens, model="gpt-3.5-turbo")
+
+
+@override_settings(AI_TOKEN_QUOTAS=QUOTAS)
+class TokenUsageTests(TestCase):
+    def setUp(self):
+        sharding.directory.forget()
+        self.addCleanup(sharding.directory.forget)
+        self.tenant = seed_tenant("tokens", groups=0, members=0)
+        self.account = self.tenant["account"]
+        self.tracker = Tracker()
+
+    def _row(self):
+        return AccountTokenUsage.objects.filter(
+            account=self.account, period=current_period()
+        ).first()
+
+    def test_quota_is_enforced(self):
+        self.tracker.record(self.account.pk, _completion(40, 40))
+        self.tracker.check_quota(self.account)
+
+        self.tracker.record(self.account.pk, _completion(10, 20))
+        with self.assertRaises(QuotaExceeded) as raised:
+            self.tracker.check_quota(self.account)
+
+        self.assertEqual((raised.exception.used, raised.exception.quota), (110, 100))
+        self.assertTrue(1 <= raised.exception.retry_after <= 31 * 24 * 3600)
+
+    def test_unlimited_plan(self):
+        self.account.subscription_plan = "Pro Plan"
+        self.tracker.record(self.account.pk, _completion(10**6, 10**6))
+
+        self.tracker.check_quota(self.account)
+
+    def test_flush_adds_to_the_row(self):
+        self.tracker.record(self.account.pk, _completion(1000, 2000))
+        self.tracker.record(self.account.pk, _completion(1000, 0))
+        self.tracker.flush()
+        self.tracker.record(self.account.pk, _completion(0, 2000))
+        self.tracker.flush()
+        self.tracker.flush()  # Nothing pending
+
+        row = self._row()
+        self.assertEqual(
+            (row.calls, row.prompt_tokens, row.completion_tokens), (3, 2000, 4000)
+        )
+        # $0.50 and $1.50 per million prompt and completion tokens
+        self.assertEqual(row.cost_micros, 2000 * 0.50 + 4000 * 1.50)
+
+    def test_other_workers_see_flushed_usage(self):
+        self.tracker.record(self.account.pk, _completion(60, 60))
+        other_worker = Tracker()
+        self.assertEqual(other_worker.used(self.account.pk), 0)
+
+        self.tracker.flush()
+
+        with self.assertRaises(QuotaExceeded):
+            Tracker().check_quota(self.account)
+        self.assertEqual(self.tracker.used(self.account.pk), 120)  # Not twice
+
+    def test_usage_of_a_frozen_account_waits(self):
+        placement = AccountPlacement.objects.create(
+            account=self.account, database="default", state=AccountPlacement.FROZEN
+        )
+        self.tracker.record(self.account.pk, _completion(10, 10))
+
+        self.tracker.flush()
+        self.assertIsNone(self._row())
+
+        placement.state = AccountPlacement.ACTIVE
+        placement.save()
+        sharding.directory.forget()
+        self.tracker.flush()
+        self.assertEqual(self._row().calls, 1)
+
+    def test_failed_flush_is_retried(self):
+        self.tracker.record(self.account.pk, _completion(10, 10))
+
+        with mock.patch.object(self.tracker, "_add", side_effect=DatabaseError):
+            with self.assertLogs("api.services.token_usage", "ERROR"):
+                self.tracker.flush()
+        self.assertIsNone(self._row())
+
+        self.tracker.flush()
+        self.assertEqual((self._row().calls, self._row().prompt_tokens), (1, 10))
+
+    def test_create_quiz_is_refused_past_the_quota(self):
+        self.tracker.record(self.account.pk, _completion(100, 0))
+
+        with mock.patch("api.services.quiz_creation_service.token_usage", self.tracker):
+            response = self.client.post(
+                reverse("create_quiz"),
+                {"title": "Rivers", "topic": "Rivers", "question_count": 3},
+                content_type="application/json",
+                **auth_headers(self.tenant["owner"], self.account),
+            )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()["quota_tokens"], 100)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
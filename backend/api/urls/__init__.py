@@ -8,6 +8,8 @@ urlpatterns = [
     path("quizzes/", include("api.urls.quiz_urls")),
     path("questions/", include("api.urls.question_urls")),
     path("users/", include("api.urls.user_urls")),
+    path("async/", include("api.urls.async_urls")),
+    path("ops/", include("api.urls.ops_urls")),
     path(
         "create-quiz/", create_quiz, name="create_quiz"
     ),  # Directly linking the create_quiz view
@@ -5,8 +5,11 @@ from ..views.account_views import (
     list_account_members,
     invite_member,
     get_account,
+    account_usage,
+    account_ai_usage,
     set_password,
     create_user,
+    bulk_create_users,
     manage_user,  # Unified route for user updates and deletion
 )
 
@@ -24,8 +27,15 @@ urlpatterns = [
     ),
     path("<int:account_id>/invite/", invite_member, name="invite_member"),
     path("<int:account_id>/", get_account, name="get_account"),
+    path("<int:account_id>/usage/", account_usage, name="account_usage"),
+    path("<int:account_id>/ai-usage/", account_ai_usage, name="account_ai_usage"),
     path("set-password/", set_password, name="set_password"),
     path("<int:account_id>/create-user/", create_user, name="create_user"),
+    path(
+        "<int:account_id>/users/bulk/",
+        bulk_create_users,
+        name="bulk_create_users",
+    ),
     path(
         "<int:account_id>/users/<str:user_id>/",
         manage_user,
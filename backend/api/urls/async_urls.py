@@ -0,0 +1,17 @@
+from django.urls import path
+from ..views.async_views import (
+    create_quiz_async,
+    invite_users_to_quiz_async,
+    submit_quiz_results_async,
+)
+
+# backend/api/urls/async_urls.py
+urlpatterns = [
+    path("create-quiz/", create_quiz_async, name="create_quiz_async"),
+    path(
+        "quizzes/<str:quiz_id>/invite/",
+        invite_users_to_quiz_async,
+        name="invite_users_to_quiz_async",
+    ),
+    path("submit-results/", submit_quiz_results_async, name="submit_quiz_results_async"),
+]
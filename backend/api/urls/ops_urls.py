@@ -0,0 +1,10 @@
+from django.urls import path
+from ..views.ops_views import ai_backend_stats, metrics, replica_status, slow_queries
+
+# backend/api/urls/ops_urls.py
+urlpatterns = [
+    path("ai-backends/", ai_backend_stats, name="ai_backend_stats"),
+    path("metrics/", metrics, name="metrics"),
+    path("slow-queries/", slow_queries, name="slow_queries"),
+    path("replicas/", replica_status, name="replica_status"),
+]
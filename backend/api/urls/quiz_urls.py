@@ -7,14 +7,29 @@ from ..views.quiz_views import (
     share_quiz,
     move_quiz_to_group,
     update_quiz_order,
+    invite_users_to_quiz,
+    bulk_invite_users_to_quiz,
+    search_quizzes,
+    autocomplete_topics,
 )
 
 urlpatterns = [
     path("", list_quizzes, name="list_quizzes"),
     path("create/", create_quiz, name="create_quiz"),
+    path("search/", search_quizzes, name="search_quizzes"),
+    path(
+        "topics/autocomplete/", autocomplete_topics, name="autocomplete_topics"
+    ),
+    # Before "<str:quiz_id>/", which would otherwise match it
+    path("update-order/", update_quiz_order, name="update_quiz_order"),
     path("<str:quiz_id>/", quiz_detail, name="quiz_detail"),
     path("<str:quiz_id>/duplicate/", duplicate_quiz, name="duplicate_quiz"),
     path("<str:quiz_id>/share/", share_quiz, name="share_quiz"),
     path("<str:quiz_id>/move-to-group/", move_quiz_to_group, name="move_quiz_to_group"),
-    path("update-order/", update_quiz_order, name="update_quiz_order"),
+    path("<str:quiz_id>/invite/", invite_users_to_quiz, name="invite_users_to_quiz"),
+    path(
+        "<str:quiz_id>/invite/bulk/",
+        bulk_invite_users_to_quiz,
+        name="bulk_invite_users_to_quiz",
+    ),
 ]
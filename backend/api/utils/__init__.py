@@ -1,6 +1,11 @@
 # backend/api/utils/__init__.py
 
-from .parse_quiz_text import parse_quiz_text
+from .parse_quiz_text import ParsedQuestions, parse_quiz_text, salvage_quiz_questions
 from .generate_prefixed_uuid import generate_prefixed_uuid
 
-__all__ = ["parse_quiz_text", "generate_prefixed_uuid"]
+__all__ = [
+    "ParsedQuestions",
+    "parse_quiz_text",
+    "salvage_quiz_questions",
+    "generate_prefixed_uuid",
+]
@@ -1,6 +1,123 @@
 # backend/api/utils.py
 
 import json
+import logging
+import re
+
+from ..services.metrics import quiz_parses
+
+logger = logging.getLogger(__name__)
+
+_decoder = json.JSONDecoder()
+_QUESTIONS_ARRAY_RE = re.compile(r'"questions"\s*:\s*\[')
+_SEPARATORS_RE = re.compile(r"[\s,]*")
+
+
+class ParsedQuestions(list):
+    """
+    The questions recovered from an AI response (a list of question dicts).
+
+    `complete` is False when the response had to be salvaged: it was cut
+    off, or some question objects were malformed and skipped. `salvaged` is
+    the number of questions recovered either way.
+    """
+
+    def __init__(self, questions=(), complete=True):
+        super().__init__(questions)
+        self.complete = complete
+
+    @property
+    def salvaged(self):
+        return len(self)
+
+    @property
+    def outcome(self):
+        """'complete', 'salvaged' or 'failed' (nothing recovered)."""
+        if not self:
+            return "failed"
+        return "complete" if self.complete else "salvaged"
+
+
+def _to_question(item, option_count):
+    # Extract options dynamically based on the option count
+    options = item.get("options")
+    if not isinstance(options, dict):
+        options = {}
+    options = {chr(65 + i): options.get(chr(65 + i)) for i in range(option_count)}
+
+    # Safely retrieve 'correct_answer' or fallback to 'A'
+    correct_answer = item.get("correct_answer") or "A"
+
+    return {
+        "question_text": item.get("question", ""),  # fallback if missing
+        "option_a": options.get("A"),
+        "option_b": options.get("B"),
+        "option_c": options.get("C") if option_count > 2 else None,
+        "option_d": options.get("D") if option_count > 3 else None,
+        "option_e": options.get("E") if option_count > 4 else None,
+        "correct_answer": correct_answer,
+    }
+
+
+def _array_start(text):
+    """
+    Returns (index, in_array): where the question objects start, and whether
+    that is just past the opening bracket of an array. Prefers the
+    "questions" array, then the first bracket, then the first object, which
+    also skips Markdown code fences and leading prose.
+    """
+    match = _QUESTIONS_ARRAY_RE.search(text)
+    if match:
+        return match.end(), True
+    bracket = text.find("[")
+    brace = text.find("{")
+    if bracket != -1 and (brace == -1 or bracket < brace):
+        return bracket + 1, True
+    return (brace if brace != -1 else len(text)), False
+
+
+def salvage_quiz_questions(generated_text, option_count):
+    """
+    Tolerant parse of an AI response: recovers every complete question
+    object, even from fenced, prose-wrapped, truncated or partly malformed
+    JSON. Returns ParsedQuestions (empty when nothing could be recovered).
+
+    Objects are decoded in place with raw_decode, so no substring of the
+    response is copied. A malformed object is skipped by resuming at the
+    next "{"; scanning stops at the closing bracket of the array.
+    """
+    questions = ParsedQuestions()
+    text = generated_text or ""
+    end = len(text)
+    index, in_array = _array_start(text)
+    while True:
+        index = _SEPARATORS_RE.match(text, index).end()
+        if index >= end:
+            # Cut off before the closing bracket
+            questions.complete = questions.complete and not in_array
+            break
+        if in_array and text[index] == "]":
+            break
+        try:
+            item, index = _decoder.raw_decode(text, index)
+        except json.JSONDecodeError:
+            questions.complete = False
+            index = text.find("{", index + 1)
+            if index == -1:
+                break
+            continue
+        if isinstance(item, dict) and "question" in item:
+            questions.append(_to_question(item, option_count))
+        else:
+            # Not a question, e.g. the options of a skipped broken object
+            questions.complete = False
+        if not in_array:
+            # Loose objects (e.g. one per line): move on to the next one
+            next_brace = text.find("{", index)
+            if next_brace == -1:
+                break
+            index = next_brace
+    return questions
 
 
 def parse_quiz_text(generated_text, quiz_type, option_count):
@@ -13,39 +130,15 @@ def parse_quiz_text(generated_text, quiz_type, option_count):
         option_count (int): Number of options per question.
 
     Returns:
-        list: A list of question dictionaries or None if parsing fails.
-    """
-    questions = []
-    try:
-        # Load the generated text as JSON
-        data = json.loads(generated_text)
-
-        if quiz_type == "multiple-choice" and "questions" in data:
-            for item in data["questions"]:
-                # Extract options dynamically based on the option count
-                options = {
-                    chr(65 + i): item.get("options", {}).get(chr(65 + i), None)
-                    for i in range(option_count)
-                }
-
-                # Safely retrieve 'correct_answer' or fallback to 'A'
-                correct_answer = item.get("correct_answer") or "A"
-
-                questions.append(
-                    {
-                        "question_text": item.get(
-                            "question", ""
-                        ),  # fallback if missing
-                        "option_a": options.get("A"),
-                        "option_b": options.get("B"),
-                        "option_c": options.get("C") if option_count > 2 else None,
-                        "option_d": options.get("D") if option_count > 3 else None,
-                        "option_e": options.get("E") if option_count > 4 else None,
-                        "correct_answer": correct_answer,
-                    }
-                )
-    except (json.JSONDecodeError, KeyError) as e:
-        print(f"Error parsing quiz text: {e}")
+        ParsedQuestions: the recovered question dictionaries (see
+        salvage_quiz_questions), or None if none could be parsed.
+    """
+    if quiz_type != "multiple-choice":
         return None
-
+    questions = salvage_quiz_questions(generated_text, option_count)
+    quiz_parses.inc(outcome=questions.outcome)
+    if not questions.complete:
+        logger.warning(
+            "Salvaged %d questions from a malformed AI response", questions.salvaged
+        )
     return questions if questions else None
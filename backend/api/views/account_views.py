@@ -1,14 +1,29 @@
-from django.core.mail import send_mail
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    parser_classes,
+    permission_classes,
+)
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 import logging
+from ..authentication import ClaimsJWTAuthentication
+from ..db_routing import replica_reads
+from ..services import usage_rollups
+from ..services.email_outbox import queue_email
+from ..services.token_usage import account_token_usage
+from ..services.member_provisioning_service import (
+    MemberProvisioningService,
+    iter_csv_roster,
+)
 from ..utils.generate_prefixed_uuid import generate_prefixed_uuid
 
-from ..models.user import Account, AccountMembership, User
+from ..models.user import AccountMembership, User
 from ..serializers.account_serializer import (
     AccountSerializer,
     AccountMembershipSerializer,
@@ -37,7 +52,12 @@ def transfer_ownership(request, account_id):
     """
     Allows the owner of an account to transfer ownership to another user.
     """
-    account = get_object_or_404(Account, id=account_id, owner=request.user)
+    if request.account_role != "owner":
+        return Response(
+            {"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN
+        )
+
+    account = request.account
     serializer = TransferOwnershipSerializer(data=request.data)
     if serializer.is_valid():
         new_owner_email = serializer.validated_data["new_owner_email"]
@@ -50,32 +70,41 @@ def transfer_ownership(request, account_id):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@replica_reads
 @api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def list_account_members(request, account_id):
     """
     Lists all members of a specified account.
     """
-    account = get_object_or_404(Account, id=account_id)
-
-    if request.user not in account.members.all() and account.owner != request.user:
+    # request.account is only set when the user is a member of account_id
+    account = request.account
+    if not account:
         return Response(
             {"error": "You do not have permission to view this account."},
             status=status.HTTP_403_FORBIDDEN,
         )
 
-    memberships = AccountMembership.objects.filter(account=account)
+    memberships = AccountMembership.objects.filter(account=account).select_related(
+        "user"
+    )
     serializer = AccountMembershipSerializer(memberships, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def invite_member(request, account_id):
     """
     Invites a new member to the account via email.
     """
-    account = get_object_or_404(Account, id=account_id)
+    account = request.account
+    if not account:
+        return Response(
+            {"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN
+        )
 
     email = request.data.get("email")
     role = request.data.get("role", "member")
@@ -101,28 +130,27 @@ def invite_member(request, account_id):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    # Send invitation email
-    send_mail(
+    # Queue the invitation email; it commits with the membership and is
+    # delivered by `manage.py send_outbox_emails`
+    queue_email(
         subject="You've been invited to Inteqra",
         message=f"Hello,\n\nYou've been invited to join the account '{account.name}'.",
-        from_email="no-reply@inteqra.com",
-        recipient_list=[email],
-        fail_silently=False,
+        recipient=email,
     )
 
     serializer = AccountMembershipSerializer(membership)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@replica_reads
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_account(request, account_id):
     """
     Retrieves details about a specific account.
     """
-    account = get_object_or_404(Account, id=account_id)
-
-    if request.user not in account.members.all() and account.owner != request.user:
+    account = request.account
+    if not account:
         return Response(
             {"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN
         )
@@ -131,6 +159,79 @@ def get_account(request, account_id):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@replica_reads
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def account_usage(request, account_id):
+    """
+    Monthly usage of the account (quizzes created, AI generations and
+    tokens, results, participants and average scores per group), read from
+    the daily rollups. Query params: months (default 12, max 36).
+    "rolled_up_until" tells how recent the figures are.
+    """
+    account = request.account
+    if (
+        not account
+        or account.id != account_id
+        or request.account_role not in ["owner", "admin"]
+    ):
+        return Response(
+            {"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        months = int(request.query_params.get("months", 12))
+    except ValueError:
+        return Response(
+            {"error": "months must be an integer."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    months = max(1, min(months, 36))
+
+    return Response(
+        {
+            "account": account.id,
+            "rolled_up_until": usage_rollups.rolled_up_until(),
+            "months": usage_rollups.account_usage(account, months=months),
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@replica_reads
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def account_ai_usage(request, account_id):
+    """
+    AI token usage of the account against its plan's monthly quota, with
+    calls, tokens and estimated cost per month, read from AccountTokenUsage.
+    Query params: months (default 12, max 36).
+    """
+    account = request.account
+    if (
+        not account
+        or account.id != account_id
+        or request.account_role not in ["owner", "admin"]
+    ):
+        return Response(
+            {"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        months = int(request.query_params.get("months", 12))
+    except ValueError:
+        return Response(
+            {"error": "months must be an integer."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    months = max(1, min(months, 36))
+
+    return Response(
+        {"account": account.id, **account_token_usage(account, months=months)},
+        status=status.HTTP_200_OK,
+    )
+
+
 @api_view(["POST"])
 def set_password(request):
     """
@@ -156,20 +257,16 @@ def set_password(request):
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def create_user(request, account_id):
-    account = get_object_or_404(Account, id=account_id)
-
     # Permission check
-    if (
-        request.user != account.owner
-        and not AccountMembership.objects.filter(
-            account=account, user=request.user, role="admin"
-        ).exists()
-    ):
+    if request.account_role not in ["owner", "admin"]:
         return Response(
             {"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN
         )
 
+    account = request.account
+
     email = request.data.get("email")
     role = request.data.get("role", "member")
     password = request.data.get("password")
@@ -211,18 +308,53 @@ def create_user(request, account_id):
         )
 
     if send_invitation:
-        send_mail(
+        queue_email(
             "Account Invitation",
             f"You've been added to the account {account.name}.",
-            "no-reply@inteqra.com",
-            [email],
-            fail_silently=False,
+            email,
         )
 
     serializer = UserSerializer(user)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONParser, MultiPartParser])
+def bulk_create_users(request, account_id):
+    """
+    Provisions many users from a roster: a JSON body {"users": [...]} or an
+    uploaded CSV "file" with columns email, role, first_name, last_name and
+    an optional password. Reports an outcome per row; re-submitting the same
+    roster resumes after a failure.
+    """
+    if request.account_role not in ["owner", "admin"]:
+        return Response(
+            {"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN
+        )
+
+    upload = request.FILES.get("file")
+    if upload is not None:
+        rows = iter_csv_roster(upload)
+    else:
+        rows = request.data.get("users")
+        if not isinstance(rows, list):
+            return Response(
+                {"error": "Provide a 'users' array or a CSV 'file'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    send_invitation = str(request.data.get("send_invitation", True)).lower() not in (
+        "false",
+        "0",
+    )
+    service = MemberProvisioningService(
+        request.account, send_invitation=send_invitation
+    )
+    report = service.provision(rows)
+    return Response(report, status=status.HTTP_200_OK)
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -236,12 +368,19 @@ def manage_user(request, account_id, user_id):
         f"Managing user: {user_id} in account: {account_id} by user: {request.user.id}"
     )
 
-    account = get_object_or_404(Account, id=account_id)
+    # Check permissions
+    if request.account_role not in ["owner", "admin"]:
+        return Response(
+            {"error": "Permission denied. Only owners or admins can modify users."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
 
     # Validate the user is part of the account
-    membership = AccountMembership.objects.filter(
-        account=account, user_id=user_id
-    ).first()
+    membership = (
+        AccountMembership.objects.filter(account=request.account, user_id=user_id)
+        .select_related("user")
+        .first()
+    )
     if not membership:
         return Response(
             {"error": f"User with ID {user_id} is not part of account {account_id}."},
@@ -250,18 +389,6 @@ def manage_user(request, account_id, user_id):
 
     user = membership.user
 
-    # Check permissions
-    if (
-        request.user != account.owner
-        and not AccountMembership.objects.filter(
-            account=account, user=request.user, role="admin"
-        ).exists()
-    ):
-        return Response(
-            {"error": "Permission denied. Only owners or admins can modify users."},
-            status=status.HTTP_403_FORBIDDEN,
-        )
-
     if request.method == "PATCH":
         # Update user role or attributes
         role = request.data.get("role")
@@ -271,8 +398,10 @@ def manage_user(request, account_id, user_id):
         last_name = request.data.get("last_name")
 
         if role:
-            membership.role = role
-            membership.save()
+            # Bumping the version invalidates JWT claims carrying the old role
+            AccountMembership.objects.filter(pk=membership.pk).update(
+                role=role, version=F("version") + 1
+            )
 
         if user_name:
             user.username = user_name  # Update the username field
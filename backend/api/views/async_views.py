@@ -0,0 +1,203 @@
+# backend/api/views/async_views.py
+
+"""
+Async variants of the I/O-bound endpoints, for ASGI deployments.
+
+DRF function views are sync-only, so these are plain Django async views:
+they authenticate with the same JWT class, read the active account the same
+way the middleware does, and return the same payloads as their sync
+counterparts. Under WSGI they still work (Django runs them in an event loop
+per request) but only pay off when served by an ASGI server.
+"""
+
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import APIException
+
+from .. import sharding
+from ..authentication import ClaimsJWTAuthentication
+from ..middleware import account_role_in, get_active_membership
+from ..models.quiz import Quiz
+from ..models.quiz_invite import InvitedUser
+from ..serializers.question_serializer import QuestionSerializer
+from ..serializers.quiz_serializer import InvitedUserSerializer, QuizSerializer
+from ..serializers.user_serializer import UserResultSerializer
+from ..services import counters
+from ..services.quiz_creation_service import (
+    IDEMPOTENCY_HEADER,
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    IDEMPOTENT_REPLAY_HEADER,
+    QuizCreationError,
+    QuizCreationService,
+)
+from ..services.quiz_invitation_service import QuizInvitationService, normalize_email
+from ..services.token_usage import QuotaExceeded
+
+logger = logging.getLogger(__name__)
+
+
+def _error(message, status):
+    return JsonResponse({"error": message}, status=status)
+
+
+async def _authenticate(request):
+    """
+    Authenticates the request and resolves its active membership.
+    Returns an error response, or None when the user is authenticated.
+    """
+    try:
+        result = await sync_to_async(ClaimsJWTAuthentication().authenticate)(request)
+    except APIException as exc:
+        return JsonResponse({"detail": exc.detail}, status=exc.status_code)
+    if result is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+    request.user, request.auth = result
+    await sync_to_async(get_active_membership)(request)
+    return None
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+@csrf_exempt
+@require_POST
+async def create_quiz_async(request):
+    """
+    Creates a new quiz, optionally leveraging AI to generate questions.
+    Same contract as quiz_views.create_quiz; the AI call is awaited.
+    """
+    error = await _authenticate(request)
+    if error:
+        return error
+
+    membership = request._active_membership
+    if membership is None:
+        return _error("No account associated with the user.", 400)
+
+    data = _json_body(request)
+    if data is None:
+        return _error("Invalid JSON body.", 400)
+
+    idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+    if idempotency_key and len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return _error(f"{IDEMPOTENCY_HEADER} is too long.", 400)
+
+    service = QuizCreationService()
+    try:
+        quiz_obj, question_objs = await service.create_quiz_with_ai_async(
+            membership.account, data, idempotency_key=idempotency_key
+        )
+    except QuotaExceeded as e:
+        response = _error(str(e), 429)
+        response["Retry-After"] = str(e.retry_after)
+        return response
+    except (ValueError, QuizCreationError) as e:
+        return _error(str(e), 400)
+    except Exception as exc:
+        logger.exception("Unexpected error in create_quiz_async")
+        return _error(str(exc), 500)
+
+    def serialize():
+        data_out = {
+            "quiz": QuizSerializer(quiz_obj).data,
+            "questions": QuestionSerializer(question_objs, many=True).data,
+            "id": quiz_obj.id,
+        }
+        if service.duplicates:
+            data_out["duplicates"] = service.duplicates
+        return data_out
+
+    response = JsonResponse(await sync_to_async(serialize)(), status=201)
+    if service.replayed:
+        response[IDEMPOTENT_REPLAY_HEADER] = "true"
+    return response
+
+
+@csrf_exempt
+@require_POST
+async def invite_users_to_quiz_async(request, quiz_id):
+    """
+    Invites external emails to an invitation-only quiz; the notification
+    emails are queued in the outbox and sent by send_outbox_emails.
+    """
+    error = await _authenticate(request)
+    if error:
+        return error
+
+    quiz_obj = await Quiz.objects.filter(id=quiz_id).afirst()
+    if quiz_obj is None:
+        return _error("Quiz not found.", 404)
+
+    role = await sync_to_async(account_role_in)(request, quiz_obj.account_id)
+    if role != "owner":
+        return _error("No permission.", 403)
+
+    if quiz_obj.access_control != "invitation":
+        return _error("Quiz is not in invitation-only mode.", 400)
+
+    data = _json_body(request)
+    if data is None:
+        return _error("Invalid JSON body.", 400)
+    emails = data.get("emails", [])
+
+    await sync_to_async(QuizInvitationService(quiz_obj).invite)(emails)
+
+    invited = [
+        invite
+        async for invite in InvitedUser.objects.filter(
+            quiz=quiz_obj, email__in=[normalize_email(email) for email in emails]
+        )
+    ]
+    return JsonResponse(
+        InvitedUserSerializer(invited, many=True).data, safe=False, status=201
+    )
+
+
+@csrf_exempt
+@require_POST
+async def submit_quiz_results_async(request):
+    """
+    Submit results for a quiz.
+    """
+    error = await _authenticate(request)
+    if error:
+        return error
+
+    data = _json_body(request)
+    if data is None:
+        return _error("Invalid JSON body.", 400)
+
+    quiz_id = data.get("quiz_id")
+    score = data.get("score")
+    if not quiz_id or score is None:
+        return _error("Quiz ID and score are required.", 400)
+
+    await sync_to_async(sharding.route_to_quiz)(quiz_id)
+    serializer = UserResultSerializer(data={**data, "quiz": quiz_id})
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    quiz = await Quiz.objects.filter(id=quiz_id).afirst()
+    if quiz is None:
+        return _error("Quiz not found.", 404)
+
+    result = await sync_to_async(counters.record_result)(
+        quiz,
+        user=request.user,
+        nickname=serializer.validated_data.get("nickname"),
+        score=serializer.validated_data["score"],
+        anonymous_id=serializer.validated_data.get("anonymous_id"),
+    )
+    return JsonResponse(UserResultSerializer(result).data, status=201)
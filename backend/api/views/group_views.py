@@ -1,18 +1,29 @@
 from django.shortcuts import get_object_or_404
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
 from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.response import Response
 from rest_framework import status
+from ..authentication import ClaimsJWTAuthentication
+from ..db_routing import replica_reads
 from ..models.group import Group
 
 from ..serializers.group_serializer import GroupSerializer
 
+# What GroupSerializer renders: quizzes, with their questions
+GROUP_PREFETCH = ("quizzes", "quizzes__questions")
 
+
+@replica_reads
 @api_view(["GET", "POST"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])  # Ensure the user is authenticated
 def group_list(request):
-    account = request.user.accounts.first()
+    account = request.account
     if not account:
         return Response(
             {"error": "No account associated with the user."},
@@ -20,7 +31,11 @@ def group_list(request):
         )
 
     if request.method == "GET":
-        groups = Group.objects.filter(account=account).order_by("order")
+        groups = (
+            Group.objects.filter(account=account)
+            .order_by("order")
+            .prefetch_related(*GROUP_PREFETCH)
+        )
         serializer = GroupSerializer(groups, many=True)
         return Response(serializer.data)
 
@@ -35,12 +50,17 @@ def group_list(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@replica_reads
 @api_view(["GET", "PUT", "DELETE"])
+@authentication_classes([ClaimsJWTAuthentication])
 def group_detail(request, group_id):
     """
     Handles retrieving, updating (name and color), and deleting a group.
     """
-    group = get_object_or_404(Group, pk=group_id)
+    groups = Group.objects.all()
+    if request.method != "DELETE":
+        groups = groups.prefetch_related(*GROUP_PREFETCH)
+    group = get_object_or_404(groups, pk=group_id)
 
     if request.method == "GET":
         serializer = GroupSerializer(group)
@@ -76,7 +96,9 @@ def update_group_order(request):
 
 @api_view(["PUT"])
 def rename_group(request, group_id):
-    group = get_object_or_404(Group, id=group_id)
+    group = get_object_or_404(
+        Group.objects.prefetch_related(*GROUP_PREFETCH), id=group_id
+    )
     new_name = request.data.get("name")
     if new_name:
         group.name = new_name
@@ -90,9 +112,7 @@ def delete_group(request, group_id):
     group = get_object_or_404(Group, id=group_id)
 
     # Ungroup all quizzes in the group before deleting
-    for quiz in group.quizzes.all():
-        quiz.group = None
-        quiz.save()
+    group.quizzes.update(group=None)
 
     group.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
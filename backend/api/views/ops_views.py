@@ -0,0 +1,75 @@
+# backend/api/views/ops_views.py
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from ..db_routing import replica_health
+from ..services.ai_backends import ai_backend_metrics
+from ..services.metrics import registry
+from ..services.slow_queries import slow_query_log
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def ai_backend_stats(request):
+    """
+    Staff only: call, error and latency statistics of the AI backends used
+    by this worker process since it started.
+    """
+    return Response(ai_backend_metrics(), status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def replica_status(request):
+    """
+    Staff only: replication lag of each read replica as this worker last
+    measured it, and whether reads are being sent to it.
+    """
+    return Response(
+        {
+            "max_lag_seconds": getattr(settings, "REPLICA_ROUTING", {}).get(
+                "MAX_LAG_SECONDS", 5
+            ),
+            "replicas": replica_health.status(),
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def slow_queries(request):
+    """
+    Staff only: the queries slower than SLOW_QUERIES["THRESHOLD_MS"] this
+    worker process has run, by fingerprint, with the views, call sites and
+    parameter shapes behind them. DELETE clears the table.
+    """
+    if request.method == "DELETE":
+        slow_query_log.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(slow_query_log.snapshot(), status=status.HTTP_200_OK)
+
+
+def metrics(request):
+    """
+    Prometheus text exposition of the process metrics (summed over all
+    workers when METRICS["DIR"] is set). Plain Django view: scrapers carry
+    no JWT but the shared secret METRICS["TOKEN"] as a bearer token (a
+    client address proves nothing behind a proxy). Forbidden without one.
+    """
+    token = getattr(settings, "METRICS", {}).get("TOKEN")
+    scheme, _, credentials = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+    if not token or scheme.lower() != "bearer" or not hmac.compare_digest(
+        credentials.strip().encode(), token.encode()
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
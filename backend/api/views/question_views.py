@@ -1,15 +1,28 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from django.db import transaction
 from django.shortcuts import get_object_or_404
+from .. import sharding
+from ..db_routing import replica_reads
 from ..models.question import Question
 from ..models.quiz import Quiz
 from ..serializers.question_serializer import QuestionSerializer
+from ..services import counters
+from ..services.question_dedup import (
+    find_duplicates,
+    forget_questions,
+    index_questions,
+)
 
 
+@replica_reads
 @api_view(["GET", "PUT", "DELETE"])
 def question_detail(request, question_id):
-    question = get_object_or_404(Question, id=question_id)
+    question = get_object_or_404(
+        Question.objects.select_related("quiz"), id=question_id
+    )
+    account_id = question.quiz.account_id
 
     if request.method == "GET":
         serializer = QuestionSerializer(question)
@@ -19,11 +32,15 @@ def question_detail(request, question_id):
         serializer = QuestionSerializer(question, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            transaction.on_commit(lambda: forget_questions(account_id))
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == "DELETE":
-        question.delete()
+        with sharding.atomic():
+            question.delete()
+            counters.questions_added(question.quiz_id, -1)
+            transaction.on_commit(lambda: forget_questions(account_id))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -31,8 +48,27 @@ def question_detail(request, question_id):
 def create_question(request, quiz_id):
     quiz = get_object_or_404(Quiz, id=quiz_id)
     serializer = QuestionSerializer(data=request.data)
-    if serializer.is_valid():
-        serializer.save(quiz=quiz)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    # A near-duplicate of a question of this quiz is refused; one resembling
+    # another quiz's question is created and reported
+    kept, duplicates = find_duplicates(
+        quiz.account_id, [serializer.validated_data], quiz_id=quiz.id
+    )
+    if not kept:
+        return Response(
+            {
+                "detail": "This quiz already has a nearly identical question.",
+                "duplicate_questions": duplicates,
+            },
+            status=status.HTTP_409_CONFLICT,
+        )
+    with sharding.atomic():
+        question = serializer.save(quiz=quiz)
+        counters.questions_added(quiz.id)
+        transaction.on_commit(lambda: index_questions(quiz.account_id, [question]))
+    data = serializer.data
+    if duplicates:
+        data = {**data, "duplicate_questions": duplicates}
+    return Response(data, status=status.HTTP_201_CREATED)
@@ -1,15 +1,38 @@
-import os
 from django.shortcuts import get_object_or_404
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    parser_classes,
+    permission_classes,
+)
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from ..services.quiz_creation_service import QuizCreationService, QuizCreationError
-
-# If you rely on OpenAI for quiz generation:
-from openai import OpenAI
-
-from ..models.user import AccountMembership
+from .. import sharding
+from ..authentication import ClaimsJWTAuthentication
+from ..db_routing import replica_reads
+from ..middleware import account_role_in
+from ..services.quiz_creation_service import (
+    IDEMPOTENCY_HEADER,
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    IDEMPOTENT_REPLAY_HEADER,
+    QuizCreationError,
+    QuizCreationService,
+)
+from ..services import counters, quiz_search
+from ..services.question_dedup import (
+    find_duplicates,
+    forget_questions,
+    index_questions,
+)
+from ..services.token_usage import QuotaExceeded
+from ..services import topic_autocomplete
+from ..services.quiz_invitation_service import (
+    QuizInvitationService,
+    iter_csv_emails,
+    normalize_email,
+)
 
 from ..models.quiz import Quiz, SharedQuiz
 from ..models.group import Group
@@ -21,10 +44,9 @@ from ..serializers.question_serializer import QuestionSerializer
 from ..models.quiz_invite import InvitedUser
 from ..serializers.quiz_serializer import InvitedUserSerializer
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
+@replica_reads
 @api_view(["GET", "POST"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])  # if you want only authenticated users
 def list_quizzes(request):
     """
@@ -32,14 +54,14 @@ def list_quizzes(request):
     POST: Could call create_quiz internally or do the same logic (but usually you'd just call /create/).
     """
     if request.method == "GET":
-        account = request.user.accounts.first()
+        account = request.account
         if not account:
             return Response(
                 {"error": "No account associated with this user."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        quizzes = Quiz.objects.filter(account=account)
+        quizzes = Quiz.objects.filter(account=account).prefetch_related("questions")
 
         # Optional filters:
         group_id = request.query_params.get("group_id", None)
@@ -68,19 +90,29 @@ def create_quiz(request):
     Creates a new quiz, optionally leveraging AI to generate questions.
     """
     # 1) Ensure user has an account
-    account = request.user.accounts.first()
+    account = request.account
     if not account:
         return Response(
             {"error": "No account associated with the user."},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    # 2) Instantiate the service
-    service = QuizCreationService(openai_client=client)
+    # Retries carrying the same key get the quiz created by the first attempt
+    idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+    if idempotency_key and len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return Response(
+            {"error": f"{IDEMPOTENCY_HEADER} is too long."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # 2) Instantiate the service (AI backend from settings.AI_BACKENDS)
+    service = QuizCreationService()
 
     try:
         # 3) Use the service to parse, call AI, and create the quiz
-        quiz_obj, question_objs = service.create_quiz_with_ai(account, request.data)
+        quiz_obj, question_objs = service.create_quiz_with_ai(
+            account, request.data, idempotency_key=idempotency_key
+        )
 
         # 4) Serialize and return
         from ..serializers.quiz_serializer import QuizSerializer
@@ -93,11 +125,22 @@ def create_quiz(request):
             "questions": question_serializer.data,
             "id": quiz_obj.id,
         }
-        return Response(data_out, status=status.HTTP_201_CREATED)
+        if service.duplicates:
+            data_out["duplicates"] = service.duplicates
+        response = Response(data_out, status=status.HTTP_201_CREATED)
+        if service.replayed:
+            response[IDEMPOTENT_REPLAY_HEADER] = "true"
+        return response
 
     except ValueError as e:
         # e.g. missing fields or parse errors
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except QuotaExceeded as e:
+        return Response(
+            {"error": str(e), "quota_tokens": e.quota, "used_tokens": e.used},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except QuizCreationError as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as exc:
@@ -108,7 +151,72 @@ def create_quiz(request):
         )
 
 
+@replica_reads
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def search_quizzes(request):
+    """
+    Full-text search over the account's quizzes and their questions.
+    Query params: q (required), limit (default 20, max 100), offset.
+    """
+    account = request.account
+    if not account:
+        return Response(
+            {"error": "No account associated with this user."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    query = request.query_params.get("q", "")
+    try:
+        limit = int(request.query_params.get("limit", 20))
+        offset = int(request.query_params.get("offset", 0))
+    except ValueError:
+        return Response(
+            {"error": "limit and offset must be integers."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results = quiz_search.search_quizzes(account.id, query, limit=limit, offset=offset)
+    return Response({"query": query, "results": results}, status=status.HTTP_200_OK)
+
+
+@replica_reads
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def autocomplete_topics(request):
+    """
+    Suggests the account's quiz topics starting with (or containing a word
+    starting with) the "q" prefix, most used first. Query params: q
+    (an empty prefix returns the most used topics), limit (default and
+    max 10).
+    """
+    account = request.account
+    if not account:
+        return Response(
+            {"error": "No account associated with this user."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    prefix = request.query_params.get("q", "")
+    try:
+        limit = int(request.query_params.get("limit", topic_autocomplete.TOP_K))
+    except ValueError:
+        return Response(
+            {"error": "limit must be an integer."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    suggestions = topic_autocomplete.suggest_topics(account.id, prefix, limit=limit)
+    return Response(
+        {"query": prefix, "suggestions": suggestions}, status=status.HTTP_200_OK
+    )
+
+
+@replica_reads
 @api_view(["GET", "PUT", "DELETE"])
+@authentication_classes([ClaimsJWTAuthentication])
 def quiz_detail(request, quiz_id):
     """
     Retrieve, update, or delete a quiz.
@@ -118,13 +226,8 @@ def quiz_detail(request, quiz_id):
 
     # For update/delete, ensure user is owner or admin in the quiz's account
     if request.method in ["PUT", "DELETE"]:
-        # 1) Find membership for request.user in the quiz's account
-        membership = AccountMembership.objects.filter(
-            account=quiz_obj.account, user=request.user
-        ).first()
-
-        # 2) If membership doesn't exist or role isn't "owner"/"admin", forbid
-        if not membership or membership.role not in ["owner", "admin"]:
+        # The user's role in the quiz's account, whichever account is active
+        if account_role_in(request, quiz_obj.account_id) not in ["owner", "admin"]:
             return Response({"error": "Permission denied."}, status=403)
 
     if request.method == "GET":
@@ -133,15 +236,31 @@ def quiz_detail(request, quiz_id):
 
     elif request.method == "PUT":
         # Update quiz fields
+        old_topic, old_group_id = quiz_obj.topic, quiz_obj.group_id
         serializer = QuizSerializer(quiz_obj, data=request.data, partial=True)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        serializer.save()
+        with sharding.atomic():
+            serializer.save()
+            counters.quiz_moved(quiz_obj, old_group_id)
+        if quiz_obj.topic != old_topic:
+            topic_autocomplete.topic_removed(quiz_obj.account_id, old_topic)
+            topic_autocomplete.topic_added(quiz_obj.account_id, quiz_obj.topic)
 
         # Optionally handle question updates if request.data has "questions"
         questions_data = request.data.get("questions", [])
+        duplicates = []
         if questions_data:
+            # New questions nearly duplicating one of this quiz are skipped;
+            # those resembling another quiz's questions are only reported
+            new_items = [q_item for q_item in questions_data if not q_item.get("id")]
+            kept_items, duplicates = find_duplicates(
+                quiz_obj.account_id, new_items, quiz_id=quiz_obj.id
+            )
+            kept_items = {id(q_item) for q_item in kept_items}
+            created_questions = []
             updated_questions = []
+            edited = False
             for q_item in questions_data:
                 q_id = q_item.get("id")
                 if q_id:  # update existing question
@@ -154,22 +273,40 @@ def quiz_detail(request, quiz_id):
                     )
                     if q_serializer.is_valid():
                         q_serializer.save()
+                        edited = True
                         updated_questions.append(q_serializer.data)
-                else:
+                elif id(q_item) in kept_items:
                     # create new question
                     q_item["quiz"] = quiz_obj.id
                     new_q_serializer = QuestionSerializer(data=q_item)
                     if new_q_serializer.is_valid():
-                        new_q_obj = new_q_serializer.save()
+                        with sharding.atomic():
+                            new_q_obj = new_q_serializer.save()
+                            counters.questions_added(quiz_obj.id)
+                        created_questions.append(new_q_obj)
                         updated_questions.append(QuestionSerializer(new_q_obj).data)
             # If desired, remove questions not in the new data here
+            if edited:
+                forget_questions(quiz_obj.account_id)
+            else:
+                index_questions(quiz_obj.account_id, created_questions)
+            quiz_obj.refresh_from_db(fields=Quiz.counter_fields)
 
         # Return the updated quiz
         updated_quiz_serializer = QuizSerializer(quiz_obj)
-        return Response(updated_quiz_serializer.data, status=status.HTTP_200_OK)
+        data_out = updated_quiz_serializer.data
+        if duplicates:
+            data_out = {**data_out, "duplicate_questions": duplicates}
+        return Response(data_out, status=status.HTTP_200_OK)
 
     elif request.method == "DELETE":
-        quiz_obj.delete()
+        with sharding.atomic():
+            # Locked so no result lands between reading the counts and deleting
+            quiz_obj = Quiz.objects.select_for_update().get(pk=quiz_obj.pk)
+            counters.quiz_deleted(quiz_obj)
+            quiz_obj.delete()
+        topic_autocomplete.topic_removed(quiz_obj.account_id, quiz_obj.topic)
+        forget_questions(quiz_obj.account_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -185,7 +322,18 @@ def duplicate_quiz(request, quiz_id):
     # if original_quiz.account.owner != request.user:
     #     return Response({"error": "Permission denied."}, status=403)
 
-    # Create the new quiz
+    # Create the new quiz and its questions
+    old_questions = list(original_quiz.questions.all())
+    with sharding.atomic():
+        duplicated_quiz = _duplicate_quiz(original_quiz, old_questions)
+        counters.quiz_created(duplicated_quiz)
+    topic_autocomplete.topic_added(duplicated_quiz.account_id, duplicated_quiz.topic)
+
+    serializer = QuizSerializer(duplicated_quiz)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+def _duplicate_quiz(original_quiz, old_questions):
     duplicated_quiz = Quiz.objects.create(
         account=original_quiz.account,
         title=f"Copy of {original_quiz.title}",
@@ -210,23 +358,26 @@ def duplicate_quiz(request, quiz_id):
         is_testing=original_quiz.is_testing,
         is_published=original_quiz.is_published,
         access_control=original_quiz.access_control,
+        num_questions=len(old_questions),
     )
 
     # Duplicate the questions
-    for old_q in original_quiz.questions.all():
-        Question.objects.create(
-            quiz=duplicated_quiz,
-            question_text=old_q.question_text,
-            option_a=old_q.option_a,
-            option_b=old_q.option_b,
-            option_c=old_q.option_c,
-            option_d=old_q.option_d,
-            option_e=old_q.option_e,
-            correct_answer=old_q.correct_answer,
-        )
-
-    serializer = QuizSerializer(duplicated_quiz)
-    return Response(serializer.data, status=status.HTTP_201_CREATED)
+    Question.objects.bulk_create(
+        [
+            Question(
+                quiz=duplicated_quiz,
+                question_text=old_q.question_text,
+                option_a=old_q.option_a,
+                option_b=old_q.option_b,
+                option_c=old_q.option_c,
+                option_d=old_q.option_d,
+                option_e=old_q.option_e,
+                correct_answer=old_q.correct_answer,
+            )
+            for old_q in old_questions
+        ]
+    )
+    return duplicated_quiz
 
 
 @api_view(["POST"])
@@ -246,6 +397,7 @@ def move_quiz_to_group(request, quiz_id):
     Move a quiz to a new group or ungroup it (group_id=null).
     """
     quiz_obj = get_object_or_404(Quiz, id=quiz_id)
+    old_group_id = quiz_obj.group_id
     group_id = request.data.get("group_id")
 
     if group_id:
@@ -255,7 +407,9 @@ def move_quiz_to_group(request, quiz_id):
         quiz_obj.group = None
 
     quiz_obj.order = request.data.get("order", quiz_obj.order)
-    quiz_obj.save()
+    with sharding.atomic():
+        quiz_obj.save()
+        counters.quiz_moved(quiz_obj, old_group_id)
 
     serializer = QuizSerializer(quiz_obj)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -295,7 +449,7 @@ def invite_users_to_quiz(request, quiz_id):
     quiz_obj = get_object_or_404(Quiz, id=quiz_id)
 
     # Check ownership or admin membership, etc.
-    if quiz_obj.account.owner != request.user:
+    if account_role_in(request, quiz_obj.account_id) != "owner":
         return Response({"error": "No permission."}, status=status.HTTP_403_FORBIDDEN)
 
     if quiz_obj.access_control != "invitation":
@@ -305,11 +459,45 @@ def invite_users_to_quiz(request, quiz_id):
         )
 
     emails = request.data.get("emails", [])
-    invited = []
-    for email in emails:
-        # Insert or get an invited user record
-        invited_user, _ = InvitedUser.objects.get_or_create(quiz=quiz_obj, email=email)
-        invited.append(invited_user)
+    QuizInvitationService(quiz_obj).invite(emails)
 
+    invited = InvitedUser.objects.filter(
+        quiz=quiz_obj, email__in=[normalize_email(email) for email in emails]
+    )
     serializer = InvitedUserSerializer(invited, many=True)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONParser, MultiPartParser])
+def bulk_invite_users_to_quiz(request, quiz_id):
+    """
+    Invites many addresses at once, from a JSON body {"emails": [...]} or an
+    uploaded CSV file (multipart field "file", streamed row by row).
+    Returns summary counts instead of the invitation rows.
+    """
+    quiz_obj = get_object_or_404(Quiz, id=quiz_id)
+
+    if account_role_in(request, quiz_obj.account_id) != "owner":
+        return Response({"error": "No permission."}, status=status.HTTP_403_FORBIDDEN)
+
+    if quiz_obj.access_control != "invitation":
+        return Response(
+            {"error": "Quiz is not in invitation-only mode."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    upload = request.FILES.get("file")
+    if upload is not None:
+        emails = iter_csv_emails(upload)
+    else:
+        emails = request.data.get("emails")
+        if not isinstance(emails, list):
+            return Response(
+                {"error": "Provide an 'emails' array or a CSV 'file'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    summary = QuizInvitationService(quiz_obj).invite(emails)
+    return Response(summary, status=status.HTTP_201_CREATED)
@@ -4,10 +4,15 @@ from rest_framework import status
 from django.contrib.auth.hashers import check_password
 from django.shortcuts import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
-from django.core.mail import send_mail
-from ..serializers.user_serializer import MyTokenObtainPairSerializer
-from rest_framework_simplejwt.views import TokenObtainPairView
-from django.utils.timezone import now
+from django.db import transaction
+from ..serializers.user_serializer import (
+    MyTokenObtainPairSerializer,
+    MyTokenRefreshSerializer,
+)
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .. import sharding
+from ..db_routing import replica_reads
+from ..models.quiz import Quiz
 from ..models.user import User, AccountMembership, Account, UserResult
 from ..serializers.user_serializer import (
     UserSerializer,
@@ -15,19 +20,19 @@ from ..serializers.user_serializer import (
     UserResultSerializer,
 )
 from ..serializers.account_serializer import AccountMembershipSerializer
+from ..services import counters
+from ..services.email_outbox import queue_email
 from ..utils.generate_prefixed_uuid import generate_prefixed_uuid
 
 
 class MyTokenObtainPairView(TokenObtainPairView):
+    # last_connected is recorded by the serializer through the activity
+    # tracker, so logging in no longer rewrites the user row
     serializer_class = MyTokenObtainPairSerializer
 
-    def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        if response.status_code == 200:
-            user = self.serializer_class().get_user()
-            user.last_connected = now()
-            user.save()
-        return response
+
+class MyTokenRefreshView(TokenRefreshView):
+    serializer_class = MyTokenRefreshSerializer
 
 
 @api_view(["PUT"])
@@ -69,11 +74,13 @@ def user_profile(request):
     user = request.user
 
     if request.method == "GET":
-        serializer = RegisterSerializer(user)
+        serializer = RegisterSerializer(user, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     elif request.method == "PUT":
-        serializer = RegisterSerializer(user, data=request.data, partial=True)
+        serializer = RegisterSerializer(
+            user, data=request.data, partial=True, context={"request": request}
+        )
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -82,11 +89,17 @@ def user_profile(request):
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def invite_user(request, account_id):
     """
     Allows the account owner to invite a user to join their account.
     """
-    account = get_object_or_404(Account, id=account_id, owner=request.user)
+    if request.account_role != "owner":
+        return Response(
+            {"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN
+        )
+
+    account = request.account
     email = request.data.get("email")
     role = request.data.get("role", "member")
 
@@ -111,17 +124,15 @@ def invite_user(request, account_id):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    # Send invitation email with instructions to set a password
-    send_mail(
+    # Queue the invitation email with instructions to set a password
+    queue_email(
         subject="You're invited to join Inteqra",
         message=(
             f"Hello,\n\nYou've been invited to join the account '{account.name}'. "
             "Please set your password to activate your account.\n\n"
             "Visit: <password_reset_link>"
         ),
-        from_email="no-reply@inteqra.com",
-        recipient_list=[email],
-        fail_silently=False,
+        recipient=email,
     )
 
     return Response(
@@ -180,11 +191,20 @@ def submit_quiz_results(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    quiz = get_object_or_404(UserResult, id=quiz_id)
-    serializer = UserResultSerializer(data=request.data)
+    sharding.route_to_quiz(quiz_id)
+    quiz = get_object_or_404(Quiz, id=quiz_id)
+    serializer = UserResultSerializer(data={**request.data, "quiz": quiz.id})
     if serializer.is_valid():
-        serializer.save(user=user, quiz=quiz)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        result = counters.record_result(
+            quiz,
+            user=user,
+            nickname=serializer.validated_data.get("nickname"),
+            score=serializer.validated_data["score"],
+            anonymous_id=serializer.validated_data.get("anonymous_id"),
+        )
+        return Response(
+            UserResultSerializer(result).data, status=status.HTTP_201_CREATED
+        )
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -194,34 +214,31 @@ def list_account_members(request, account_id):
     """
     List all members of an account, including their roles.
     """
-    account = get_object_or_404(Account, id=account_id)
-
-    if request.user not in account.members.all() and account.owner != request.user:
+    account = request.account
+    if not account:
         return Response(
             {"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN
         )
 
-    memberships = AccountMembership.objects.filter(account=account)
+    memberships = AccountMembership.objects.filter(account=account).select_related(
+        "user"
+    )
     serializer = AccountMembershipSerializer(memberships, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def create_user(request, account_id):
-    account = get_object_or_404(Account, id=account_id)
-
     # Permissions check
-    if (
-        request.user != account.owner
-        and not AccountMembership.objects.filter(
-            account=account, user=request.user, role="admin"
-        ).exists()
-    ):
+    if request.account_role not in ["owner", "admin"]:
         return Response(
             {"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN
         )
 
+    account = request.account
+
     email = request.data.get("email")
     role = request.data.get("role", "member")
     password = request.data.get("password")
@@ -265,18 +282,17 @@ def create_user(request, account_id):
         )
 
     if send_invitation:
-        send_mail(
+        queue_email(
             "Account Invitation",
             f"You've been added to the account {account.name}.",
-            "no-reply@inteqra.com",
-            [email],
-            fail_silently=False,
+            email,
         )
 
     serializer = UserSerializer(user)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@replica_reads
 @api_view(["GET"])
 def get_quiz_result(request, result_id):
     """
@@ -16,6 +16,7 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 import os
+import sys
 
 load_dotenv()
 
@@ -62,11 +63,14 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    "api.middleware.ServerTimingMiddleware",  # Outermost, to time the whole stack
+    "api.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.middleware.ActiveAccountMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -96,6 +100,21 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Connection pooling (psycopg 3): each process keeps up to max_size
+# connections per database, checked on checkout (CONN_HEALTH_CHECKS) and
+# replaced after max_lifetime, or max_idle unused, seconds. Requests wait
+# up to timeout seconds for one. Mind the server's connection limit: up to
+# max_size x processes x databases. Metrics: api.services.db_pool.
+# DB_POOL=False falls back to persistent connections (DB_CONN_MAX_AGE).
+DB_POOL = os.getenv("DB_POOL", "True") == "True"
+DB_POOL_OPTIONS = {
+    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+    "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -104,9 +123,105 @@ DATABASES = {
         "PASSWORD": os.getenv("SUPABASE_DB_PASSWORD"),
         "HOST": os.getenv("SUPABASE_DB_HOST"),
         "PORT": "5432",
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"pool": DB_POOL_OPTIONS} if DB_POOL else {},
+    }
+}
+
+# Read replicas: same credentials as the primary, one alias per host in
+# SUPABASE_DB_REPLICA_HOSTS (comma-separated). Only @replica_reads views
+# read from them (api.db_routing); tests and benchmarks use the primary.
+REPLICA_HOSTS = [
+    host.strip()
+    for host in os.getenv("SUPABASE_DB_REPLICA_HOSTS", "").split(",")
+    if host.strip()
+]
+DATABASES.update(
+    {
+        f"replica_{n}": {
+            **DATABASES["default"],
+            "HOST": host,
+            "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+            "TEST": {"MIRROR": "default"},
+        }
+        for n, host in enumerate(REPLICA_HOSTS, start=1)
+    }
+)
+
+# Tenant shards: same credentials as the primary, one alias per host in
+# SUPABASE_DB_SHARD_HOSTS (comma-separated; only ever append to it, the
+# position sets each shard's block of ids). Accounts live on "default"
+# until moved with `manage.py move_account` (api.sharding). Every shard is
+# migrated like the primary: `manage.py migrate --database shard_N`.
+SHARD_HOSTS = [
+    host.strip()
+    for host in os.getenv("SUPABASE_DB_SHARD_HOSTS", "").split(",")
+    if host.strip()
+]
+DATABASES.update(
+    {
+        f"shard_{n}": {
+            **DATABASES["default"],
+            "HOST": host,
+            "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        }
+        for n, host in enumerate(SHARD_HOSTS, start=1)
+    }
+)
+
+TENANT_SHARDS = {
+    "SHARDS": ["default"] + [f"shard_{n}" for n in range(1, len(SHARD_HOSTS) + 1)],
+    "ID_RANGE": 10**12,  # integer ids each shard allocates from
+    "CACHE_SECONDS": 30,  # placements are cached this long per process
+}
+
+DATABASE_ROUTERS = ["api.sharding.ShardRouter", "api.db_routing.ReplicaRouter"]
+
+REPLICA_ROUTING = {
+    "REPLICAS": [f"replica_{n}" for n in range(1, len(REPLICA_HOSTS) + 1)],
+    "PIN_SECONDS": 5,  # primary-only window after a client writes
+    "COOKIE": "primary_pin",  # also the prefix of the pins' cache keys
+    "CACHE": "default",  # cache alias holding the pins, by token user id
+    "MAX_LAG_SECONDS": 5,  # replicas further behind are skipped
+    "CHECK_INTERVAL": 10,  # seconds between lag measurements, per process
+}
+
+# Shared by the worker processes with REDIS_URL set (needed for the
+# read-your-writes pins of REPLICA_ROUTING with more than one process)
+REDIS_URL = os.getenv("REDIS_URL")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
     }
+    if REDIS_URL
+    else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
 }
 
+# `manage.py test` runs on local SQLite databases (tests live in api/tests).
+# replica_1 is a separate database: rows written to "default" are missing
+# from it, as from a lagging replica. Tests using it list it in REPLICAS,
+# tests of the shards list shard_1 and shard_2 in TENANT_SHARDS.
+TESTING = sys.argv[1:2] == ["test"]
+if TESTING:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        },
+        **{
+            alias: {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": BASE_DIR / f"{alias}.sqlite3",
+            }
+            for alias in ("replica_1", "shard_1", "shard_2")
+        },
+    }
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    REPLICA_ROUTING["REPLICAS"] = []
+    TENANT_SHARDS["SHARDS"] = ["default"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -153,6 +268,15 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # Allow Vue frontend during development
 ]
 
+from corsheaders.defaults import default_headers
+
+CORS_ALLOW_HEADERS = (
+    *default_headers,
+    "x-account-id",  # Selects the active account (see api.middleware)
+    "idempotency-key",  # Makes quiz creation retry-safe
+)
+CORS_EXPOSE_HEADERS = ["idempotent-replayed", "server-timing"]
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -163,3 +287,120 @@ SIMPLE_JWT = {
 }
 
 AUTH_USER_MODEL = "api.User"
+
+# Email: queued in the outbox (api.models.OutboxEmail) and delivered by
+# `manage.py send_outbox_emails`
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
+DEFAULT_FROM_EMAIL = "no-reply@inteqra.com"
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5  # then the email is dead-lettered
+OUTBOX_RETRY_BASE_SECONDS = 30  # doubled after every failed attempt
+OUTBOX_RETRY_MAX_SECONDS = 3600
+
+# Threads hashing roster passwords during bulk provisioning (default: CPUs)
+PROVISIONING_HASH_WORKERS = None
+
+# Write-behind last-seen tracking (api.services.activity_tracker)
+ACTIVITY_FLUSH_INTERVAL = int(os.getenv("ACTIVITY_FLUSH_INTERVAL", "30"))  # seconds
+ACTIVITY_MAX_PENDING = 1000  # buffered entries that trigger an early flush
+
+# AI completion backends (api.services.ai_backends), built lazily per alias.
+# Use "api.services.ai_backends.FakeBackend" for local development and load
+# tests, or RecordReplayBackend to replay recorded completions.
+AI_BACKENDS = {
+    "default": {
+        "BACKEND": os.getenv("AI_BACKEND", "api.services.ai_backends.OpenAIBackend"),
+        "OPTIONS": {"MODEL": "gpt-3.5-turbo"},
+    },
+}
+# Shared keep-alive HTTP pool of the OpenAI backend (per process)
+AI_HTTP_POOL = {
+    "MAX_CONNECTIONS": 100,
+    "MAX_KEEPALIVE_CONNECTIONS": 20,
+    "KEEPALIVE_EXPIRY": 30.0,  # seconds an idle connection is kept open
+    "TIMEOUT": 60.0,
+    "CONNECT_TIMEOUT": 5.0,
+}
+
+# Near-duplicate question detection (api.services.question_dedup)
+QUESTION_DEDUP = {
+    "ENABLED": True,
+    "THRESHOLD": 0.7,  # estimated Jaccard similarity of text + options
+    "CROSS_QUIZ": "flag",  # or "drop": near-duplicates of other quizzes
+    "INDEX_TTL": 600,  # seconds before an account's index is rebuilt
+    "MAX_ACCOUNTS": 100,  # indexes kept per process (least recently used)
+}
+
+# Full-text search (api.services.quiz_search): matches ranked per query
+QUIZ_SEARCH_MAX_CANDIDATES = 1000
+
+# Topic autocomplete tries (api.services.topic_autocomplete)
+TOPIC_AUTOCOMPLETE = {
+    "INDEX_TTL": 600,  # seconds before an account's trie is rebuilt
+    "MAX_ACCOUNTS": 200,  # tries kept per process (least recently used)
+}
+
+# Daily usage rollups (api.services.usage_rollups, manage.py rollup_usage)
+USAGE_ROLLUPS = {
+    "CHUNK_HOURS": 24,  # longest window aggregated per transaction
+    "SETTLE_SECONDS": 300,  # rows younger than this wait for the next run
+}
+
+# Per-request timing (api.middleware.ServerTimingMiddleware): SQL, serializer
+# and AI call time in a Server-Timing header, and logged to "api.timing"
+SERVER_TIMING = {
+    "HEADER": True,
+    "LOG_THRESHOLD_MS": 500,  # log requests at least this slow; None: never
+}
+
+# Slow-query log (api.services.slow_queries), served to staff at
+# /api/ops/slow-queries/ and logged to "api.slow_queries" every LOG_INTERVAL
+# seconds (0: never). Per worker process.
+SLOW_QUERIES = {
+    "THRESHOLD_MS": 100,  # None disables the recorder
+    "MAX_FINGERPRINTS": 500,
+    "STACK_DEPTH": 6,
+    "LOG_INTERVAL": 300,
+    "LOG_TOP": 10,
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    # One JSON object per line, with the record's timing / slow_query data
+    "formatters": {"json": {"()": "api.log_formatters.JSONFormatter"}},
+    "handlers": {"console": {"class": "logging.StreamHandler", "formatter": "json"}},
+    "loggers": {
+        "api.timing": {"handlers": ["console"], "level": "INFO", "propagate": False},
+        "api.slow_queries": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+# Prometheus metrics (api.services.metrics), served at /api/ops/metrics/.
+# With DIR set, each worker writes its metrics there every FLUSH_INTERVAL
+# seconds and a scrape sums them; clear it when the server starts.
+# Scrapers send "Authorization: Bearer <TOKEN>"; without a TOKEN the
+# endpoint answers 403 to everyone.
+METRICS = {
+    "DIR": os.getenv("METRICS_DIR") or None,
+    "FLUSH_INTERVAL": 5,
+    "TOKEN": os.getenv("METRICS_TOKEN") or None,
+}
+
+# AI token quotas per Account.subscription_plan (api.services.token_usage):
+# tokens per calendar month, None for unlimited. Usage is buffered per
+# process and written to AccountTokenUsage every FLUSH_INTERVAL seconds.
+AI_TOKEN_QUOTAS = {
+    "PLANS": {"Free Plan": 200_000, "Pro Plan": 5_000_000, "Enterprise Plan": None},
+    "DEFAULT": 200_000,  # plans not listed above
+    "FLUSH_INTERVAL": 30,
+    "REFRESH_SECONDS": 60,  # how stale another worker's usage can be
+    # Dollars per million prompt / completion tokens, for cost estimates
+    "PRICES": {"gpt-3.5-turbo": (0.50, 1.50)},
+}